@@ -0,0 +1,72 @@
+"""hot path indexes
+
+Indexes for foreign keys and the lookups on the login and CRUD paths. They
+are built CONCURRENTLY so the tables stay writable; before the partial
+unique index, tenants with several active plans keep only the one that
+started last.
+
+Revision ID: 566a78f0c8c1
+Revises: 6193963e6b83
+Create Date: 2026-10-18 18:56:56.222850
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '566a78f0c8c1'
+down_revision: Union[str, Sequence[str], None] = '6193963e6b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        UPDATE tenant_subscription_plan SET is_active = false
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY tenant_id
+                    ORDER BY starts_at DESC NULLS LAST, id DESC
+                ) AS position
+                FROM tenant_subscription_plan
+                WHERE is_active
+            ) AS plans
+            WHERE position > 1
+        )
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_class_code_students_student_id'), 'class_code_students', ['student_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_parent_student_relations_parent_id_student_id', 'parent_student_relations', ['parent_id', 'student_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_parent_student_relations_student_id'), 'parent_student_relations', ['student_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_student_profiles_user_id'), 'student_profiles', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_tenant_subscription_plan_tenant_id'), 'tenant_subscription_plan', ['tenant_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('uq_tenant_subscription_plan_active_tenant_id', 'tenant_subscription_plan', ['tenant_id'], unique=True, postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_user_roles_tenant_id_role_type', 'user_roles', ['tenant_id', 'role_type'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_user_roles_user_id_created_at', 'user_roles', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_user_subscription_plan_user_id_is_active', 'user_subscription_plan', ['user_id', 'is_active'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_lower_email', 'users', [sa.literal_column('lower(email)')], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_tenant_id_created_at', 'users', ['tenant_id', 'created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_tenant_id_created_at', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_lower_email', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_user_subscription_plan_user_id_is_active', table_name='user_subscription_plan', postgresql_concurrently=True)
+        op.drop_index('ix_user_roles_user_id_created_at', table_name='user_roles', postgresql_concurrently=True)
+        op.drop_index('ix_user_roles_tenant_id_role_type', table_name='user_roles', postgresql_concurrently=True)
+        op.drop_index('uq_tenant_subscription_plan_active_tenant_id', table_name='tenant_subscription_plan', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_tenant_subscription_plan_tenant_id'), table_name='tenant_subscription_plan', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_student_profiles_user_id'), table_name='student_profiles', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_parent_student_relations_student_id'), table_name='parent_student_relations', postgresql_concurrently=True)
+        op.drop_index('ix_parent_student_relations_parent_id_student_id', table_name='parent_student_relations', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_class_code_students_student_id'), table_name='class_code_students', postgresql_concurrently=True)
@@ -0,0 +1,52 @@
+"""jsonb columns
+
+Plan, tenant config and student profile documents move from json to jsonb
+so they are stored parsed and can be indexed. Changing the type rewrites
+each table under an ACCESS EXCLUSIVE lock; the GIN indexes are then built
+CONCURRENTLY.
+
+Revision ID: b7c1e4d2a9f3
+Revises: 566a78f0c8c1
+Create Date: 2026-10-18 19:32:10.481237
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e4d2a9f3'
+down_revision: Union[str, Sequence[str], None] = '566a78f0c8c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ('tenants', 'firebase_config'),
+    ('tenant_subscription_plan', 'special_subscription_plan'),
+    ('student_profiles', 'available_study_times'),
+    ('student_profiles', 'school_lecture_program'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=postgresql.JSONB(), existing_type=sa.JSON(), postgresql_using=f'{column}::jsonb')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tenant_subscription_plan_special_subscription_plan', 'tenant_subscription_plan', ['special_subscription_plan'], unique=False, postgresql_using='gin', postgresql_ops={'special_subscription_plan': 'jsonb_path_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_student_profiles_school_lecture_program', 'student_profiles', ['school_lecture_program'], unique=False, postgresql_using='gin', postgresql_ops={'school_lecture_program': 'jsonb_path_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_student_profiles_available_study_times', 'student_profiles', ['available_study_times'], unique=False, postgresql_using='gin', postgresql_ops={'available_study_times': 'jsonb_path_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_student_profiles_available_study_times', table_name='student_profiles', postgresql_concurrently=True)
+        op.drop_index('ix_student_profiles_school_lecture_program', table_name='student_profiles', postgresql_concurrently=True)
+        op.drop_index('ix_tenant_subscription_plan_special_subscription_plan', table_name='tenant_subscription_plan', postgresql_concurrently=True)
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.JSON(), existing_type=postgresql.JSONB(), postgresql_using=f'{column}::json')
@@ -0,0 +1,59 @@
+"""lowercase emails
+
+Emails are stored lowercased, and lookups lowercase their input, so every
+email lookup is served by the unique ix_users_email and two accounts can
+no longer differ only in case. A CHECK constraint keeps writes that
+bypass the API (COPY, SQL consoles) lowercase too; it is added NOT VALID
+and validated separately so users stays writable during the scan. The
+lower(email) index has no queries left and is dropped.
+
+Accounts whose emails differ only in case have to be merged by hand first;
+the upgrade stops and lists them rather than picking one.
+
+Revision ID: c4e8a1f5d2b6
+Revises: b7c1e4d2a9f3
+Create Date: 2026-10-18 21:14:37.902116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f5d2b6'
+down_revision: Union[str, Sequence[str], None] = 'b7c1e4d2a9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT lower(email) FROM users GROUP BY lower(email) "
+            "HAVING count(*) > 1 ORDER BY 1 LIMIT 20"
+        )
+    ).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            'Accounts differing only in email case must be merged first: '
+            + ', '.join(duplicates)
+        )
+    op.execute('UPDATE users SET email = lower(email) WHERE email <> lower(email)')
+    op.execute(
+        'ALTER TABLE users ADD CONSTRAINT ck_users_email_lowercase '
+        'CHECK (email = lower(email)) NOT VALID'
+    )
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE users VALIDATE CONSTRAINT ck_users_email_lowercase')
+        op.drop_index('ix_users_lower_email', table_name='users', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_lower_email', 'users', [sa.literal_column('lower(email)')], unique=False, postgresql_concurrently=True)
+    op.drop_constraint('ck_users_email_lowercase', 'users', type_='check')
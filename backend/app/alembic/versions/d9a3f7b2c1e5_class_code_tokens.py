@@ -0,0 +1,40 @@
+"""class code tokens
+
+Access tokens minted through class codes have no refresh token row, so
+their JTIs are recorded here for revoke_user_tokens/revoke_tenant_tokens.
+
+Revision ID: d9a3f7b2c1e5
+Revises: c4e8a1f5d2b6
+Create Date: 2026-10-18 23:02:11.417520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3f7b2c1e5'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1f5d2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('class_code_tokens',
+    sa.Column('jti', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_class_code_tokens_user_id'), 'class_code_tokens', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_class_code_tokens_user_id'), table_name='class_code_tokens')
+    op.drop_table('class_code_tokens')
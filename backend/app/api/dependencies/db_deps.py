@@ -1,16 +1,163 @@
-from collections.abc import Generator
-from typing import Annotated
+import asyncio
+import functools
+import logging
+from collections.abc import AsyncGenerator, Generator
+from contextvars import ContextVar
+from typing import Annotated, Any, Callable, TypeVar
 
-from fastapi import Depends
+from fastapi import Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.db import engine
+from app.core.db import async_engine, engine, replicas
+from app.core.db_pool import ConnectionUsage, connection_usage
+from app.core.db_routing import read_primary_pinned
+from app.core.metrics import Histogram, metrics
+
+logger = logging.getLogger(__name__)
+
+ROUND_TRIP_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_request_sessions: ContextVar[list[AsyncSession] | None] = ContextVar(
+    "request_sessions", default=None
+)
+
+
+def _track(session: AsyncSession) -> None:
+    sessions = _request_sessions.get()
+    if sessions is None:
+        sessions = []
+        _request_sessions.set(sessions)
+        connection_usage.set(ConnectionUsage())
+    sessions.append(session)
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # Routes own the transaction and commit once; keep loaded attributes
+    # after the commit so serializing the response needs no extra SELECT.
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_db(response: Response) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if replicas.replicas:
+            # a committed write sends this client's next reads to the primary
+            session.info["response"] = response
+            session.info["pin_seconds"] = replicas.read_your_writes_seconds
+        _track(session)
+        yield session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes, on a replica when one can serve it.
+
+    Clients that wrote recently carry a cookie that keeps them on the
+    primary until replicas are guaranteed to have caught up.
+    """
+    bind = None if read_primary_pinned(request) else replicas.choose()
+    async with AsyncSession(bind or async_engine, expire_on_commit=False) as session:
+        _track(session)
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
-    
\ No newline at end of file
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+def query_budget(statements: int) -> Callable[[F], F]:
+    """Declare how many SQL statements one request to the route may run.
+
+    Routes of a ``SessionReleasingRoute`` router that go over it are logged
+    and counted in ``db_route_<id>_over_query_budget_total``, so an N+1
+    shows up in tests and in production metrics alike.
+    """
+
+    def declare(endpoint: F) -> F:
+        endpoint.query_budget = statements  # type: ignore[attr-defined]
+        return endpoint
+
+    return declare
+
+
+class SessionReleasingRoute(APIRoute):
+    """Closes the request's AsyncSession as soon as the endpoint returns.
+
+    Yield dependencies are torn down only after the response model is
+    validated and encoded, so without this the connection stays checked out
+    through serialization. Closing keeps loaded attributes (sessions do not
+    expire on commit) and rolls back anything left uncommitted; the session
+    checks a connection out again if it is used afterwards.
+
+    Records per-route histograms of how long connections were held, how
+    much of that was spent executing SQL and how many round trips it took,
+    and checks the route's ``query_budget``.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        self.query_budget: int | None = getattr(endpoint, "query_budget", None)
+        super().__init__(path, self._release_session_after(endpoint), **kwargs)
+
+    # created on first use: include_router() copies every route of a router,
+    # and only the copies serve requests
+    @functools.cached_property
+    def hold_seconds(self) -> Histogram:
+        return metrics.histogram(f"db_route_{self.unique_id}_hold_seconds")
+
+    @functools.cached_property
+    def sql_seconds(self) -> Histogram:
+        return metrics.histogram(f"db_route_{self.unique_id}_sql_seconds")
+
+    @functools.cached_property
+    def round_trips(self) -> Histogram:
+        return metrics.histogram(
+            f"db_route_{self.unique_id}_round_trips", ROUND_TRIP_BUCKETS
+        )
+
+    def _release_session_after(
+        self, endpoint: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        # a route copied by include_router() gets the wrapper of the original
+        endpoint = getattr(endpoint, "_releases_session", endpoint)
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def call_endpoint(*args: Any, **kwargs: Any) -> Any:
+            try:
+                if is_coroutine:
+                    return await endpoint(*args, **kwargs)
+                return await run_in_threadpool(endpoint, *args, **kwargs)
+            finally:
+                await self._release_session()
+
+        call_endpoint._releases_session = endpoint  # type: ignore[attr-defined]
+        return call_endpoint
+
+    async def _release_session(self) -> None:
+        sessions = _request_sessions.get()
+        if sessions is None:
+            return
+        _request_sessions.set(None)
+        for session in sessions:
+            await session.close()
+        usage = connection_usage.get()
+        if usage is not None:
+            self.hold_seconds.observe(usage.hold_seconds)
+            self.sql_seconds.observe(usage.sql_seconds)
+            self.round_trips.observe(usage.round_trips)
+            if self.query_budget is not None and usage.statements > self.query_budget:
+                metrics.counter(
+                    f"db_route_{self.unique_id}_over_query_budget_total"
+                ).inc()
+                logger.warning(
+                    "%s ran %d SQL statements, over its budget of %d",
+                    self.unique_id,
+                    usage.statements,
+                    self.query_budget,
+                )
+            connection_usage.set(None)
@@ -1,14 +1,59 @@
-from collections.abc import Generator
 from typing import Annotated
 
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from pydantic import ValidationError
-from sqlmodel import Session
 
-from app.core import security
+from app.api.dependencies.db_deps import ReadSessionDep
+from app.authentication.principal import Principal, get_principal
 from app.core.config import settings
-from app.core import *
+from app.models import TokenScope, User
 
+reusable_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/login/access-token"
+)
+
+TokenDep = Annotated[str, Depends(reusable_oauth2)]
+
+
+async def get_token_principal(token: TokenDep) -> Principal:
+    try:
+        return get_principal(token)
+    except (InvalidTokenError, KeyError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+
+# Also accepts class-code tokens; only for routes a student needs during a
+# class session.
+ClassSessionPrincipal = Annotated[Principal, Depends(get_token_principal)]
+
+
+async def get_current_principal(principal: ClassSessionPrincipal) -> Principal:
+    if principal.scope != TokenScope.FULL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not available during a class session",
+        )
+    return principal
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+# Loads the ORM user; only for routes that really need the row. It may come
+# from a replica, so routes that modify it load it in their own session.
+async def get_current_user(
+    session: ReadSessionDep, principal: CurrentPrincipal
+) -> User:
+    user = await session.get(User, principal.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+
+CurrentUser = Annotated[User, Depends(get_current_user)]
@@ -1,46 +1,211 @@
+import uuid
 from typing import Any, Annotated
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.crud import user_ops
-from app.api.dependencies.db_deps import SessionDep
-from app.authentication.user_auth import authenticate, get_user_authorization
-from app.core.security import create_access_token
+from app.api.dependencies.db_deps import AsyncSessionDep, SessionReleasingRoute
+from app.api.dependencies.dependencies import ClassSessionPrincipal, CurrentPrincipal
+from app.authentication.class_code import class_code_digest, generate_class_code
+from app.authentication.principal import Principal
+from app.authentication.user_auth import (
+    authenticate_login,
+    enforce_login_rate_limit,
+    get_class_code_authorization,
+    get_user_authorization,
+    issue_class_code_token,
+    issue_tokens,
+)
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.crud import class_code_ops, token_ops, user_ops
 
-from app.models import Token
+from app.models import (
+    ClassCodeCreate,
+    ClassCodeLogin,
+    ClassCodePublic,
+    RefreshTokenRequest,
+    RoleType,
+    RosterToken,
+    RosterTokens,
+    Token,
+)
 
 
-router = APIRouter(tags=["login"], prefix="/login")
+router = APIRouter(tags=["login"], prefix="/login", route_class=SessionReleasingRoute)
 
 
 @router.post("/access-token")
-def get_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+async def get_access_token(
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
-    user = authenticate(session, email=form_data.username, password=form_data.password)
+    client_ip = request.client.host if request.client else None
+    await enforce_login_rate_limit(form_data.username, client_ip)
 
-    if not user:
+    # One query loads user, role and tenant status; bcrypt runs in the
+    # password pool and plans come from the authorization cache.
+    login_context = await authenticate_login(
+        session, email=form_data.username, password=form_data.password
+    )
+
+    if not login_context:
         raise HTTPException(status_code=401, detail="Invalid Credentials")
+    user = login_context.user
     if not user.is_active:
         raise HTTPException(status_code=401, detail="Account Disabled")
+    if login_context.tenant_is_active is False:
+        raise HTTPException(status_code=401, detail="Tenant Disabled")
 
-    user_role = user_ops.read_user_role(session=session, user_id=user.id)
-    user_autherization = get_user_authorization(session, user, user_role)
+    user_role = login_context.role
+    user_autherization = await get_user_authorization(session, user, user_role)
 
     if not user_autherization:
         raise HTTPException(status_code=401, detail="User has no valid role")
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    jwt_token = create_access_token(
-        user_id=user.id,
-        tenant_id=user.tenant_id,
-        role=user_role.role_type,
-        subscription_level=user_autherization,
-        expire_delta=access_token_expires,
+    tokens = issue_tokens(session, user, user_role, user_autherization)
+    await session.commit()
+    return tokens
+
+
+@router.post("/refresh")
+async def refresh_access_token(
+    session: AsyncSessionDep, body: RefreshTokenRequest
+) -> Token:
+    db_token = await token_ops.read_refresh_token(session, body.refresh_token)
+    if not db_token or db_token.expires_at <= datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Invalid Refresh Token")
+    if db_token.revoked_at or not await token_ops.consume_refresh_token(
+        session, db_token
+    ):
+        # A rotated token was replayed: assume it leaked and end every session.
+        await token_ops.revoke_user_tokens(session, user_id=db_token.user_id)
+        await session.commit()
+        raise HTTPException(status_code=401, detail="Invalid Refresh Token")
+
+    login_context = await user_ops.read_login_context_by_id(session, db_token.user_id)
+    if not login_context:
+        raise HTTPException(status_code=401, detail="Invalid Refresh Token")
+    user = login_context.user
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Account Disabled")
+    if login_context.tenant_is_active is False:
+        raise HTTPException(status_code=401, detail="Tenant Disabled")
+
+    user_autherization = await get_user_authorization(session, user, login_context.role)
+    if not user_autherization:
+        raise HTTPException(status_code=401, detail="User has no valid role")
+    tokens = issue_tokens(session, user, login_context.role, user_autherization)
+    await session.commit()
+    return tokens
+
+
+@router.post("/class-code")
+async def class_code_login(
+    request: Request, session: AsyncSessionDep, body: ClassCodeLogin
+) -> Token:
+    client_ip = request.client.host if request.client else None
+    await enforce_login_rate_limit(body.email, client_ip)
+
+    # HMAC of the code plus one indexed read; no bcrypt on this path.
+    result = await class_code_ops.read_class_code_login(
+        session, class_code_digest(body.code), body.email
     )
-    return Token(access_token=jwt_token)
+    if not result:
+        raise HTTPException(status_code=401, detail="Invalid Class Code")
+    login_context = result.login_context
+    user_autherization = await get_class_code_authorization(session, login_context)
+    if not user_autherization:
+        raise HTTPException(status_code=401, detail="Invalid Class Code")
+
+    metrics.counter("class_code_logins_total").inc()
+    access_token = issue_class_code_token(
+        session,
+        login_context.user,
+        login_context.role,
+        user_autherization,
+        result.class_code_expires_at,
+    )
+    await session.commit()
+    return Token(access_token=access_token)
+
+
+@router.post("/class-codes")
+async def create_class_code(
+    session: AsyncSessionDep, principal: CurrentPrincipal, body: ClassCodeCreate
+) -> ClassCodePublic:
+    if principal.role not in (RoleType.TEACHER, RoleType.COACH):
+        raise HTTPException(
+            status_code=403, detail="Only teachers can start a class session"
+        )
+    if principal.tenant_id is None:
+        raise HTTPException(status_code=400, detail="Class codes require a tenant")
+
+    student_ids = list(set(body.student_ids))
+    tenant_students = await class_code_ops.count_tenant_students(
+        session, tenant_id=principal.tenant_id, student_ids=student_ids
+    )
+    if tenant_students != len(student_ids):
+        raise HTTPException(
+            status_code=400, detail="Every student must belong to your tenant"
+        )
+
+    code = generate_class_code()
+    expire_minutes = body.expire_minutes or settings.CLASS_CODE_EXPIRE_MINUTES
+    class_code = class_code_ops.create_class_code(
+        session,
+        code_digest=class_code_digest(code),
+        teacher_id=principal.user_id,
+        tenant_id=principal.tenant_id,
+        student_ids=student_ids,
+        expires_at=datetime.utcnow() + timedelta(minutes=expire_minutes),
+    )
+    await session.commit()
+    return ClassCodePublic(
+        id=class_code.id,
+        code=code,
+        expires_at=class_code.expires_at,
+        student_count=len(student_ids),
+    )
+
+
+@router.post("/class-codes/{class_code_id}/tokens")
+async def create_class_roster_tokens(
+    session: AsyncSessionDep, principal: CurrentPrincipal, class_code_id: uuid.UUID
+) -> RosterTokens:
+    """Mint access tokens for every student on the roster in one call."""
+    class_code = await class_code_ops.read_class_code(session, class_code_id)
+    if (
+        not class_code
+        or class_code.teacher_id != principal.user_id
+        or class_code.expires_at <= datetime.utcnow()
+    ):
+        raise HTTPException(status_code=404, detail="Class code not found")
+
+    data = []
+    roster = await class_code_ops.read_class_code_roster(session, class_code.id)
+    for login_context in roster:
+        user_autherization = await get_class_code_authorization(session, login_context)
+        if not user_autherization:
+            continue
+        access_token = issue_class_code_token(
+            session,
+            login_context.user,
+            login_context.role,
+            user_autherization,
+            class_code.expires_at,
+        )
+        data.append(
+            RosterToken(user_id=login_context.user.id, access_token=access_token)
+        )
+    await session.commit()
+    return RosterTokens(data=data, count=len(data))
+
+
+@router.post("/test-token")
+async def test_token(principal: ClassSessionPrincipal) -> Principal:
+    return principal
 
 
 # TODO:
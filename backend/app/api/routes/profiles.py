@@ -4,13 +4,15 @@ from fastapi import APIRouter, HTTPException
 
 from app.crud import user_ops
 from app.core.security import get_password_hash
-from app.api.dependencies.db_deps import SessionDep
+from app.api.dependencies.db_deps import AsyncSessionDep, SessionReleasingRoute
 
 from app.models import UserRoleCreate
 
-router = APIRouter(tags=["profiles"], prefix="/profiles")
+router = APIRouter(
+    tags=["profiles"], prefix="/profiles", route_class=SessionReleasingRoute
+)
 
 
 @router.post("/")
-def create_student_profile(session: SessionDep, user_in: UserRoleCreate):
+async def create_student_profile(session: AsyncSessionDep, user_in: UserRoleCreate):
     pass
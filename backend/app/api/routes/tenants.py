@@ -1,14 +1,18 @@
+import uuid
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from app.crud import user_ops, tenant_ops
-from app.api.dependencies.db_deps import SessionDep
+from app.crud import user_import, user_ops, tenant_ops
+from app.api.dependencies.db_deps import AsyncSessionDep, SessionReleasingRoute
+from app.api.dependencies.dependencies import CurrentPrincipal
 
-from app.models import Tenant, TenantPublic, TenantCreate
+from app.models import RoleType, Tenant, TenantPublic, TenantCreate, UserImportReport
 
-router = APIRouter(tags=["tenants"], prefix="/tenants")
+router = APIRouter(
+    tags=["tenants"], prefix="/tenants", route_class=SessionReleasingRoute
+)
 
 
 # TODO:
@@ -16,12 +20,37 @@ router = APIRouter(tags=["tenants"], prefix="/tenants")
 
 
 @router.post("/", response_model=TenantPublic)
-def create_tenant(*, session: SessionDep, tenant_in: TenantCreate) -> Any:
-    existing_tenant = tenant_ops.read_tenant_by_VKN(
-        session, tenant_vkn=tenant_in.VKN_code
-    )
-    if existing_tenant:
+async def create_tenant(*, session: AsyncSessionDep, tenant_in: TenantCreate) -> Any:
+    tenant = await tenant_ops.tenant_create(session=session, tenant_create=tenant_in)
+    if not tenant:
         raise HTTPException(status_code=400, detail="Tenant Exists")
-
-    tenant = tenant_ops.tenant_create(session=session, tenant_create=tenant_in)
+    await session.commit()
     return tenant
+
+
+@router.post("/{tenant_id}/users:import", response_model=UserImportReport)
+async def import_tenant_users(
+    request: Request,
+    session: AsyncSessionDep,
+    principal: CurrentPrincipal,
+    tenant_id: uuid.UUID,
+) -> Any:
+    """Create users from a CSV or NDJSON body streamed in chunks."""
+    if principal.role != RoleType.SUPER_ADMIN and not (
+        principal.role == RoleType.TENANT_ADMIN and principal.tenant_id == tenant_id
+    ):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    import_format = user_import.IMPORT_FORMATS.get(content_type)
+    if not import_format:
+        raise HTTPException(
+            status_code=415, detail="Send text/csv or application/x-ndjson"
+        )
+
+    tenant = await tenant_ops.read_tenant_by_id(session, tenant_id)
+    if not tenant:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return await user_import.import_users(
+        session, tenant, request.stream(), import_format
+    )
@@ -1,41 +1,139 @@
 import json
+import uuid
 
-from typing import Any
+from typing import Annotated, Any, FrozenSet
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
 from app.crud import user_ops
 from app.core.security import get_password_hash
-from app.api.dependencies.db_deps import SessionDep
+from app.core.hash_pool import get_password_hash_async
+from app.api.dependencies.db_deps import (
+    AsyncSessionDep,
+    ReadSessionDep,
+    SessionReleasingRoute,
+    query_budget,
+)
+from app.api.dependencies.dependencies import (
+    ClassSessionPrincipal,
+    CurrentPrincipal,
+    CurrentUser,
+)
 
-from app.models import User, UserCreate, UserPublic, UserRoleCreate
+from app.models import (
+    RoleType,
+    User,
+    UserCreate,
+    UserDetailPublic,
+    UserDetailsPublic,
+    UserPublic,
+    UserRoleCreate,
+)
 
-router = APIRouter(tags=["users"], prefix="/users")
+router = APIRouter(tags=["users"], prefix="/users", route_class=SessionReleasingRoute)
 
 
-# TODO:
-@router.get("/")
-def get_user():
-    pass
+def parse_expand(
+    expand: str = Query(
+        "", description="Comma separated: " + ",".join(user_ops.USER_EXPANSIONS)
+    ),
+) -> FrozenSet[str]:
+    names = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = names - user_ops.USER_EXPANSIONS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Cannot expand {', '.join(sorted(unknown))}"
+        )
+    return frozenset(names)
 
 
-# TODO:
-@router.get("/{user_id}")
-def get_users():
-    pass
+ExpandDep = Annotated[FrozenSet[str], Depends(parse_expand)]
+
+
+def user_detail(user: User, expand: FrozenSet[str]) -> UserDetailPublic:
+    # only the expanded relations are touched; the others are not loaded
+    fields = UserPublic.model_validate(user).model_dump()
+    if "roles" in expand:
+        fields["roles"] = user.roles
+    if "profile" in expand:
+        fields["profile"] = user.student_profile
+    if "plans" in expand:
+        fields["plans"] = user.subscription_plans
+    if "children" in expand:
+        fields["children"] = [relation.student for relation in user.parent_relations]
+    return UserDetailPublic.model_validate(fields)
+
+
+# the users themselves plus one query per relation
+@router.get("/", response_model=UserDetailsPublic, response_model_exclude_unset=True)
+@query_budget(2 + len(user_ops.USER_EXPANSIONS))
+async def read_users(
+    session: ReadSessionDep,
+    principal: CurrentPrincipal,
+    expand: ExpandDep,
+    tenant_id: uuid.UUID | None = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+) -> Any:
+    """Users of a tenant; super admins may list every user."""
+    if principal.role == RoleType.TENANT_ADMIN:
+        if tenant_id not in (None, principal.tenant_id):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        tenant_id = principal.tenant_id
+    elif principal.role != RoleType.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    users, count = await user_ops.read_users_detail(
+        session, expand, tenant_id=tenant_id, skip=skip, limit=limit
+    )
+    return UserDetailsPublic(
+        data=[user_detail(user, expand) for user in users], count=count
+    )
+
+
+@router.get("/me", response_model=UserPublic)
+def read_user_me(current_user: CurrentUser) -> Any:
+    return current_user
+
+
+@router.get(
+    "/{user_id}", response_model=UserDetailPublic, response_model_exclude_unset=True
+)
+@query_budget(1 + len(user_ops.USER_EXPANSIONS))
+async def read_user(
+    session: ReadSessionDep,
+    principal: ClassSessionPrincipal,
+    user_id: uuid.UUID,
+    expand: ExpandDep,
+) -> Any:
+    user = await user_ops.read_user_detail(session, user_id, expand)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not (
+        principal.user_id == user.id
+        or principal.role == RoleType.SUPER_ADMIN
+        or (
+            principal.role == RoleType.TENANT_ADMIN
+            and user.tenant_id is not None
+            and principal.tenant_id == user.tenant_id
+        )
+    ):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return user_detail(user, expand)
 
 
 @router.post("/", response_model=UserPublic)
-def create_user(
-    *, session: SessionDep, user_in: UserCreate, role_in: UserRoleCreate
+async def create_user(
+    *, session: AsyncSessionDep, user_in: UserCreate, role_in: UserRoleCreate
 ) -> Any:
-    existing_user = user_ops.read_user_email(session, email=user_in.email)
-    if existing_user:
+    password_hash = await get_password_hash_async(user_in.password)
+    # No pre-read: a taken email, TC number or Firebase UID makes the
+    # INSERT ... ON CONFLICT DO NOTHING skip the user and its role.
+    user = await user_ops.create_user_with_role(
+        session, user_in, role_in, password_hash=password_hash
+    )
+    if not user:
         raise HTTPException(status_code=400, detail="User Exists")
-
-    user = user_ops.create_user(session, user_in)
-    role_in.user_id = user.id
-    role_in.tenant_id = user.tenant_id
-    user_ops.create_user_role(session, user=user, role_in=role_in)
+    await session.commit()
     return user
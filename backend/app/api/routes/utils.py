@@ -1,9 +1,18 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
+from app.core.metrics import metrics
+
 router = APIRouter(prefix="/utils", tags=["utils"])
 
 
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/metrics/")
+async def read_metrics() -> dict[str, Any]:
+    return metrics.snapshot()
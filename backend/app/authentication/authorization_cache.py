@@ -0,0 +1,30 @@
+import uuid
+from typing import Any, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# Sentinel for "not cached"; a cached ``None`` means "no active plan".
+MISSING = object()
+
+authorization_cache: LRUCache[Tuple[str, uuid.UUID], Any] = LRUCache(
+    "authorization_cache",
+    maxsize=settings.AUTHORIZATION_CACHE_SIZE,
+    ttl=settings.AUTHORIZATION_CACHE_TTL_SECONDS,
+)
+
+
+def tenant_key(tenant_id: uuid.UUID) -> Tuple[str, uuid.UUID]:
+    return ("tenant", tenant_id)
+
+
+def user_key(user_id: uuid.UUID) -> Tuple[str, uuid.UUID]:
+    return ("user", user_id)
+
+
+def invalidate_tenant(tenant_id: uuid.UUID) -> None:
+    authorization_cache.pop(tenant_key(tenant_id))
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    authorization_cache.pop(user_key(user_id))
@@ -0,0 +1,31 @@
+import hashlib
+import hmac
+import secrets
+
+from app.core.config import settings
+
+# no 0/O, 1/I/L: codes are read off a board and typed by children
+CLASS_CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+
+
+def generate_class_code() -> str:
+    return "".join(
+        secrets.choice(CLASS_CODE_ALPHABET) for _ in range(settings.CLASS_CODE_LENGTH)
+    )
+
+
+def normalize_class_code(code: str) -> str:
+    return code.replace("-", "").replace(" ", "").upper()
+
+
+def class_code_digest(code: str) -> str:
+    """Keyed digest stored in place of the code.
+
+    Lookups go through the unique index on this digest, so how long the
+    comparison takes says nothing about how close a guess was.
+    """
+    return hmac.new(
+        settings.SECRET_KEY.encode(),
+        normalize_class_code(code).encode(),
+        hashlib.sha256,
+    ).hexdigest()
@@ -0,0 +1,83 @@
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import jwt
+
+from app.authentication.revocation import revoked_tokens
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.plans import Plan, plan_catalog
+from app.core.security import ALGORITHM
+from app.models import RoleType, TokenScope
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated caller, built only from verified JWT claims."""
+
+    token_id: uuid.UUID
+    user_id: uuid.UUID
+    tenant_id: uuid.UUID | None
+    role: RoleType
+    scope: TokenScope
+    plan_id: str
+    feature_mask: int
+    expires_at: int
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "Principal":
+        if claims["pv"] != plan_catalog.version:
+            raise ValueError("Token was issued against another plan catalog")
+        tenant_id = claims.get("tenant_id")
+        return cls(
+            token_id=uuid.UUID(claims["jti"]),
+            user_id=uuid.UUID(claims["sub"]),
+            tenant_id=uuid.UUID(tenant_id) if tenant_id else None,
+            role=RoleType(claims["role"]),
+            scope=TokenScope(claims["scope"]),
+            plan_id=claims["plan"],
+            feature_mask=int(claims["feat"]),
+            expires_at=int(claims["exp"]),
+        )
+
+    @property
+    def plan(self) -> Plan | None:
+        """The catalog plan; tenant plans need ``get_principal_plan``."""
+        return plan_catalog.get(self.plan_id)
+
+    @property
+    def features(self) -> frozenset[str]:
+        return plan_catalog.features_for(self.feature_mask)
+
+    def has_feature(self, name: str) -> bool:
+        return plan_catalog.has_feature(self.feature_mask, name)
+
+
+# Keyed by token digest so raw bearer tokens are never kept in memory.
+verified_tokens: LRUCache[bytes, Principal] = LRUCache(
+    "token_cache", maxsize=settings.TOKEN_CACHE_SIZE
+)
+
+
+def get_principal(token: str) -> Principal:
+    """Return the principal for ``token``, verifying the signature on a miss.
+
+    Raises ``jwt.InvalidTokenError`` for bad or expired tokens and
+    ``KeyError``/``ValueError`` for tokens with malformed claims.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    principal = verified_tokens.get(digest)
+    if principal is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        principal = Principal.from_claims(claims)
+        verified_tokens.set(digest, principal)
+    elif principal.expires_at <= time.time():
+        verified_tokens.pop(digest)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    if principal.token_id in revoked_tokens:
+        verified_tokens.pop(digest)
+        raise jwt.InvalidTokenError("Token has been revoked")
+    return principal
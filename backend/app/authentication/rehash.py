@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import threading
+import uuid
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine, bindparam, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.hash_pool import get_password_hash_async
+from app.core.metrics import metrics
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordRehashQueue:
+    """Collects upgraded password hashes and writes them in batches.
+
+    New hashes are computed in the password pool after the login response
+    has been sent; the UPDATE only applies if the stored hash is still the
+    one that was verified, so a concurrent password change always wins.
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self._pending: dict[uuid.UUID, tuple[str, str]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._lock = threading.Lock()
+        self._full: asyncio.Event | None = None
+
+        self.rehashed = metrics.counter("password_rehash_written_total")
+        self.skipped = metrics.counter("password_rehash_skipped_total")
+
+    def submit(self, user_id: uuid.UUID, old_hash: str, password: str) -> None:
+        task = asyncio.create_task(self._rehash(user_id, old_hash, password))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _rehash(self, user_id: uuid.UUID, old_hash: str, password: str) -> None:
+        try:
+            new_hash = await get_password_hash_async(password)
+        except HTTPException:
+            # pool is saturated; the next login will try again
+            self.skipped.inc()
+            return
+        with self._lock:
+            self._pending[user_id] = (old_hash, new_hash)
+            batch_ready = len(self._pending) >= self.batch_size
+        if batch_ready and self._full is not None:
+            self._full.set()
+
+    def flush(self, session: Session) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        statement = (
+            update(User)
+            .where(User.id == bindparam("b_id"))
+            .where(User.password_hash == bindparam("b_old_hash"))
+            .values(password_hash=bindparam("b_new_hash"))
+        )
+        session.connection().execute(
+            statement,
+            [
+                {"b_id": user_id, "b_old_hash": old_hash, "b_new_hash": new_hash}
+                for user_id, (old_hash, new_hash) in pending.items()
+            ],
+        )
+        session.commit()
+        self.rehashed.inc(len(pending))
+        return len(pending)
+
+    async def run_forever(self, engine: Engine) -> None:
+        self._full = full = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    full.wait(), timeout=settings.PASSWORD_REHASH_FLUSH_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            full.clear()
+            try:
+                await run_in_threadpool(self.flush_with, engine)
+            except Exception:
+                logger.exception("Failed to write rehashed passwords")
+
+    def flush_with(self, engine: Engine) -> int:
+        with Session(engine) as session:
+            return self.flush(session)
+
+    async def drain(self, engine: Engine) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await run_in_threadpool(self.flush_with, engine)
+
+
+password_rehash_queue = PasswordRehashQueue(
+    batch_size=settings.PASSWORD_REHASH_BATCH_SIZE
+)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """Revoked access-token JTIs, checked without touching Postgres.
+
+    A Bloom filter answers the common "not revoked" case; only its positives
+    fall through to the exact set. Entries are dropped once the access token
+    they refer to has expired anyway.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._revoked: dict[uuid.UUID, datetime] = {}
+        self._bloom = BloomFilter(capacity)
+        self._last_created_at: datetime | None = None
+        self._lock = threading.Lock()
+
+        self.size = metrics.gauge("revocation_list_size")
+        self.bloom_false_positives = metrics.counter(
+            "revocation_bloom_false_positives_total"
+        )
+
+    def __contains__(self, jti: uuid.UUID) -> bool:
+        if jti.bytes not in self._bloom:
+            return False
+        if jti in self._revoked:
+            return True
+        self.bloom_false_positives.inc()
+        return False
+
+    def add(self, jti: uuid.UUID, expires_at: datetime) -> None:
+        with self._lock:
+            if jti in self._revoked:
+                return
+            self._revoked[jti] = expires_at
+            if len(self._revoked) > self._bloom.capacity:
+                self._rebuild()
+            else:
+                self._bloom.add(jti.bytes)
+            self.size.set(len(self._revoked))
+
+    def _rebuild(self) -> None:
+        bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2))
+        for jti in self._revoked:
+            bloom.add(jti.bytes)
+        self._bloom = bloom
+
+    def _prune(self, now: datetime) -> None:
+        expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+        for jti in expired:
+            del self._revoked[jti]
+        if expired:
+            self._rebuild()
+
+    def _merge(self, rows: Iterable[RevokedToken]) -> None:
+        for row in rows:
+            self.add(row.jti, row.expires_at)
+            if self._last_created_at is None or row.created_at > self._last_created_at:
+                self._last_created_at = row.created_at
+
+    def load(self, session: Session) -> None:
+        """Rebuild from every revocation that has not expired yet."""
+        now = datetime.utcnow()
+        rows = session.exec(
+            select(RevokedToken).where(RevokedToken.expires_at > now)
+        ).all()
+        with self._lock:
+            self._revoked.clear()
+            self._last_created_at = None
+            self._rebuild()
+        self._merge(rows)
+        logger.info("Loaded %d revoked access tokens", len(self._revoked))
+
+    def sync(self, session: Session) -> None:
+        """Pick up revocations written by other workers since the last sync."""
+        now = datetime.utcnow()
+        statement = select(RevokedToken).where(RevokedToken.expires_at > now)
+        if self._last_created_at is not None:
+            # overlap the window a little to tolerate clock skew between hosts
+            since = self._last_created_at - timedelta(seconds=30)
+            statement = statement.where(RevokedToken.created_at >= since)
+        self._merge(session.exec(statement).all())
+        with self._lock:
+            self._prune(now)
+            self.size.set(len(self._revoked))
+
+
+revoked_tokens = RevocationList(capacity=settings.REVOCATION_LIST_CAPACITY)
+
+
+async def sync_revocations_forever(engine: Engine) -> None:
+    def sync() -> None:
+        with Session(engine) as session:
+            revoked_tokens.sync(session)
+
+    while True:
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+        try:
+            await run_in_threadpool(sync)
+        except Exception:
+            logger.exception("Failed to sync revoked access tokens")
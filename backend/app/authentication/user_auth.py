@@ -1,58 +1,268 @@
 import uuid
-from typing import Any, Dict, Tuple
+from datetime import datetime, timedelta
+from typing import Dict
 
-from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException
 
-from app.crud.user_ops import read_user_email
-from app.crud import tenant_ops, user_ops
-from app.core.security import verify_password, get_password_hash
+from app.authentication.authorization_cache import (
+    MISSING,
+    authorization_cache,
+    tenant_key,
+    user_key,
+)
+from app.authentication.principal import Principal
+from app.crud.user_ops import LoginContext, read_login_context, read_user_email
+from app.crud import tenant_ops, token_ops, user_ops
+from app.authentication.rehash import password_rehash_queue
+from app.core.security import (
+    create_access_token,
+    password_needs_rehash,
+)
+from app.core.config import settings
+from app.core.hash_pool import verify_dummy_password, verify_password_async
+from app.core.ids import uuid7
+from app.core.metrics import metrics
+from app.core.plans import TENANT_PLAN_ID, Plan, plan_catalog
+from app.core.rate_limit import create_token_bucket, retry_after_header
 
-from app.models import User, UserRole, RoleType, SubscriptionLevel
+from app.models import (
+    Token,
+    User,
+    UserRole,
+    RoleType,
+    SubscriptionLevel,
+    TokenScope,
+    normalize_email,
+)
 
 
-def authenticate(session: Session, email: str, password: str) -> User | None:
-    db_user = read_user_email(session, email)
+async def authenticate(session: AsyncSession, email: str, password: str) -> User | None:
+    db_user = await read_user_email(session, email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.password_hash):
+    if not await verify_password_async(password, db_user.password_hash):
         return None
     return db_user
 
 
+email_login_limiter = create_token_bucket(
+    "login:email",
+    capacity=settings.LOGIN_EMAIL_BUCKET_CAPACITY,
+    refill_per_minute=settings.LOGIN_EMAIL_REFILL_PER_MINUTE,
+)
+ip_login_limiter = create_token_bucket(
+    "login:ip",
+    capacity=settings.LOGIN_IP_BUCKET_CAPACITY,
+    refill_per_minute=settings.LOGIN_IP_REFILL_PER_MINUTE,
+)
+
+
+async def enforce_login_rate_limit(email: str, client_ip: str | None) -> None:
+    """Reject the attempt with 429 before any bcrypt work is spent on it."""
+    if client_ip:
+        retry_after = await ip_login_limiter.acquire(client_ip)
+        if retry_after:
+            metrics.counter("login_throttled_ip_total").inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many login attempts",
+                headers=retry_after_header(retry_after),
+            )
+
+    retry_after = await email_login_limiter.acquire(normalize_email(email))
+    if retry_after:
+        metrics.counter("login_throttled_email_total").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts",
+            headers=retry_after_header(retry_after),
+        )
+
+
+async def authenticate_login(
+    session: AsyncSession, email: str, password: str
+) -> LoginContext | None:
+    login_context = await read_login_context(session, email)
+    if not login_context:
+        await verify_dummy_password(password)
+        return None
+    password_hash = login_context.user.password_hash
+    if not await verify_password_async(password, password_hash):
+        return None
+    if password_needs_rehash(password_hash):
+        password_rehash_queue.submit(login_context.user.id, password_hash, password)
+    return login_context
+
+
 # SubscriptionLevel | Dict | None
 
 
-def get_user_authorization(
-    session: Session, user: User, user_role: UserRole
+async def get_user_authorization(
+    session: AsyncSession, user: User, user_role: UserRole | None
+) -> SubscriptionLevel | Dict | None:
+    if not user_role:
+        return None
+
+    role = user_role.role_type
+    tenant_plan = None
+    user_sub_level = None
+    if user.tenant_id and role in (
+        RoleType.STUDENT,
+        RoleType.PARENT,
+        RoleType.TENANT_ADMIN,
+    ):
+        tenant_plan = await get_tenant_plan(session, tenant_id=user.tenant_id)
+    elif role in (RoleType.STUDENT, RoleType.PARENT):
+        user_sub_level = await get_user_sub_level(session, user_id=user.id)
+
+    return resolve_user_authorization(user, user_role, tenant_plan, user_sub_level)
+
+
+async def get_tenant_plan(session: AsyncSession, tenant_id: uuid.UUID) -> Dict | None:
+    key = tenant_key(tenant_id)
+    cached = authorization_cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+
+    tenant_sub_plan = await tenant_ops.read_tenant_sub_plan_by_id(
+        session=session, tenant_id=tenant_id
+    )
+    tenant_plan = tenant_sub_plan.special_subscription_plan if tenant_sub_plan else None
+    authorization_cache.set(key, tenant_plan)
+    return tenant_plan
+
+
+async def get_principal_plan(
+    session: AsyncSession, principal: Principal
+) -> Plan | None:
+    """The caller's plan with its limits.
+
+    Tokens only name tenant plans, so those are read by the principal's
+    tenant id, through the same cache the login path fills.
+    """
+    if principal.plan_id != TENANT_PLAN_ID:
+        return principal.plan
+    if principal.tenant_id is None:
+        return None
+    tenant_plan = await get_tenant_plan(session, tenant_id=principal.tenant_id)
+    return plan_catalog.tenant_plan(tenant_plan) if tenant_plan is not None else None
+
+
+async def get_user_sub_level(
+    session: AsyncSession, user_id: uuid.UUID
+) -> SubscriptionLevel | None:
+    key = user_key(user_id)
+    cached = authorization_cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+
+    user_sub_plan = await user_ops.read_user_sub_plan_by_id(session, user_id=user_id)
+    user_sub_level = user_sub_plan.sub_level if user_sub_plan else None
+    authorization_cache.set(key, user_sub_level)
+    return user_sub_level
+
+
+def resolve_user_authorization(
+    user: User,
+    user_role: UserRole,
+    tenant_plan: Dict | None,
+    user_sub_level: SubscriptionLevel | None,
 ) -> SubscriptionLevel | Dict | None:
     role = user_role.role_type
     if role in (RoleType.STUDENT, RoleType.PARENT):
         if user.tenant_id:
-            tenant_sub_plan = tenant_ops.read_tenant_sub_plan_by_id(
-                session=session, tenant_id=user.tenant_id
-            )
-            return tenant_sub_plan.special_subscription_plan
+            return tenant_plan
         else:
-            user_sub_plan = user_ops.read_user_sub_plan_by_id(session, user_id=user.id)
-            if user_sub_plan and user_sub_plan.sub_level:
-                return user_sub_plan.sub_level
+            if user_sub_level:
+                return user_sub_level
             return SubscriptionLevel.FREE
 
     elif role in (RoleType.TEACHER, RoleType.COACH):
         return SubscriptionLevel.FREE
 
     elif role == RoleType.TENANT_ADMIN:
-        tenant_sub_plan = tenant_ops.read_tenant_sub_plan_by_id(
-            session=session, tenant_id=user.tenant_id
-        )
-        return tenant_sub_plan.special_subscription_plan
+        return tenant_plan
     elif role == RoleType.SUPER_ADMIN:
         return SubscriptionLevel.SUPER_ADMIN
 
     return None
 
 
+def issue_tokens(
+    session: AsyncSession,
+    user: User,
+    user_role: UserRole,
+    user_authorization: SubscriptionLevel | Dict,
+) -> Token:
+    """Mint a short-lived access token and the refresh token paired with it."""
+    access_token_jti = uuid7()
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        user_id=user.id,
+        tenant_id=user.tenant_id,
+        role=user_role.role_type,
+        subscription_level=user_authorization,
+        expire_delta=access_token_expires,
+        token_id=access_token_jti,
+    )
+    refresh_token = token_ops.create_refresh_token(
+        session,
+        user_id=user.id,
+        access_token_jti=access_token_jti,
+        access_token_expires_at=datetime.utcnow() + access_token_expires,
+    )
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+async def get_class_code_authorization(
+    session: AsyncSession, login_context: LoginContext
+) -> SubscriptionLevel | Dict | None:
+    """Authorization for a student signing in through a class code, or None."""
+    user = login_context.user
+    user_role = login_context.role
+    if not user.is_active or login_context.tenant_is_active is False:
+        return None
+    if not user_role or user_role.role_type != RoleType.STUDENT:
+        return None
+    return await get_user_authorization(session, user, user_role)
+
+
+def issue_class_code_token(
+    session: AsyncSession,
+    user: User,
+    user_role: UserRole,
+    user_authorization: SubscriptionLevel | Dict,
+    class_code_expires_at: datetime,
+) -> str:
+    """Mint a class-session access token that ends with the class session.
+
+    No refresh token is issued; students sign in with the code again. The
+    token is recorded so revoking the user's or tenant's tokens reaches it.
+    """
+    access_token_jti = uuid7()
+    expire_delta = min(
+        timedelta(minutes=settings.CLASS_CODE_TOKEN_EXPIRE_MINUTES),
+        class_code_expires_at - datetime.utcnow(),
+    )
+    access_token = create_access_token(
+        user_id=user.id,
+        tenant_id=user.tenant_id,
+        role=user_role.role_type,
+        subscription_level=user_authorization,
+        expire_delta=expire_delta,
+        token_id=access_token_jti,
+        scope=TokenScope.CLASS_SESSION,
+    )
+    token_ops.create_class_code_token(
+        session,
+        jti=access_token_jti,
+        user_id=user.id,
+        expires_at=datetime.utcnow() + expire_delta,
+    )
+    return access_token
+
+
 # TODO:
 #     kayıttan sonra kullanıcının rol ataması yapılmalı +
 #     bunu için gerekli end-pointler yazılmalı +
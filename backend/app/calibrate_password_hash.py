@@ -0,0 +1,71 @@
+import argparse
+import logging
+import secrets
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from app.core.security import pwd_context
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# schemes whose cost can be calibrated, with the setting that holds it
+COST_SETTINGS = {"bcrypt": "BCRYPT_ROUNDS"}
+
+
+def measure_verify_ms(scheme: str, rounds: int, samples: int) -> float:
+    context = CryptContext(schemes=[scheme], **{f"{scheme}__rounds": rounds})
+    password = secrets.token_urlsafe()
+    hashed = context.hash(password)
+    timings = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        context.verify(password, hashed)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    scheme: str, target_ms: float, min_rounds: int, max_rounds: int, samples: int
+) -> int:
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        verify_ms = measure_verify_ms(scheme, rounds, samples)
+        logger.info("%s rounds=%d median verify %.1f ms", scheme, rounds, verify_ms)
+        if verify_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Pick the highest password hash cost that verifies within a latency budget on this host"
+    )
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=15)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    # new hashes use the default scheme; the others only verify old hashes
+    scheme = pwd_context.default_scheme()
+    logger.info("Configured schemes: %s (default %s)", pwd_context.schemes(), scheme)
+    if scheme not in COST_SETTINGS:
+        parser.error(
+            f"cannot calibrate the default scheme {scheme!r}; "
+            f"supported: {', '.join(COST_SETTINGS)}"
+        )
+    rounds = calibrate(
+        scheme, args.target_ms, args.min_rounds, args.max_rounds, args.samples
+    )
+    logger.info("Recommended setting: %s=%d", COST_SETTINGS[scheme], rounds)
+    logger.info(
+        "Existing hashes with another cost are upgraded on the next successful login"
+    )
+
+
+if __name__ == "__main__":
+    main()
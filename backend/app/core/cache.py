@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe bounded LRU with an optional per-entry TTL.
+
+    Hit, miss and eviction counters are registered under ``<name>_*`` in the
+    metrics registry.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float | None = None) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter(f"{name}_hits_total")
+        self.misses = metrics.counter(f"{name}_misses_total")
+        self.evictions = metrics.counter(f"{name}_evictions_total")
+        self.size = metrics.gauge(f"{name}_size")
+
+    def get(self, key: K, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses.inc()
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.size.set(len(self._data))
+                self.misses.inc()
+                return default
+            self._data.move_to_end(key)
+            self.hits.inc()
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions.inc()
+            self.size.set(len(self._data))
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            self.size.set(len(self._data))
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -32,8 +32,18 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # short-lived; clients renew through /login/refresh
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # how often each worker pulls new access-token revocations from the DB
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_LIST_CAPACITY: int = 100_000
+    # verified tokens kept per worker, keyed by token digest
+    TOKEN_CACHE_SIZE: int = 10_000
+    # resolved plans per tenant (and per tenantless user); writes in this
+    # worker invalidate immediately, other workers pick changes up after the TTL
+    AUTHORIZATION_CACHE_SIZE: int = 10_000
+    AUTHORIZATION_CACHE_TTL_SECONDS: int = 300
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -68,6 +78,30 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # optional read replicas for read-only routes, comma separated DSNs;
+    # replicas lagging more than DB_REPLICA_MAX_LAG_SECONDS leave the rotation
+    POSTGRES_REPLICA_URIS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 2
+
+    # connection pools, per worker and engine; keep
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under Postgres max_connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # server-side limits set on every connection; 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 60_000
+    # psycopg prepares a statement on the server once a connection has run it
+    # this many times; None disables that (older PgBouncer in transaction mode)
+    DB_PREPARE_THRESHOLD: int | None = 5
+    # compiled SQL strings kept per engine, keyed by statement structure
+    DB_COMPILED_CACHE_SIZE: int = 500
+    # debug: log where connections held longer than this were acquired; 0 disables
+    DB_CONNECTION_LEAK_SECONDS: float = 0
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -94,6 +128,45 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
 
+    # per-worker Bloom filter that lets bulk imports skip the duplicate pre-check
+    EXISTENCE_FILTER_CAPACITY: int = 1_000_000
+    EXISTENCE_FILTER_ERROR_RATE: float = 0.01
+
+    # rows validated, hashed and inserted per transaction by the bulk import
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # classroom short codes; students redeem them instead of a password
+    CLASS_CODE_LENGTH: int = 8
+    CLASS_CODE_EXPIRE_MINUTES: int = 120
+    CLASS_CODE_TOKEN_EXPIRE_MINUTES: int = 60
+
+    PASSWORD_HASH_SCHEMES: list[str] = ["bcrypt"]
+    # bcrypt cost, calibrate per host with app/calibrate_password_hash.py;
+    # hashes with a different cost are rehashed on the next successful login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_REHASH_BATCH_SIZE: int = 100
+    PASSWORD_REHASH_FLUSH_SECONDS: int = 5
+
+    # bcrypt runs in a dedicated process pool per worker
+    PASSWORD_HASH_POOL_WORKERS: int = 2
+    PASSWORD_HASH_POOL_MAX_QUEUE: int = 64
+    # bulk imports hash in a pool of their own, in jobs of up to
+    # USER_IMPORT_CHUNK_SIZE / IMPORT_HASH_POOL_WORKERS passwords
+    IMPORT_HASH_POOL_WORKERS: int = 1
+    IMPORT_HASH_POOL_MAX_QUEUE: int = 4
+
+    # login token buckets; whole schools often share one NAT address, so the
+    # per-IP bucket is deliberately much larger than the per-email one
+    LOGIN_EMAIL_BUCKET_CAPACITY: int = 5
+    LOGIN_EMAIL_REFILL_PER_MINUTE: float = 5
+    LOGIN_IP_BUCKET_CAPACITY: int = 200
+    LOGIN_IP_REFILL_PER_MINUTE: float = 200
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # share buckets across workers, e.g. redis://localhost:6379/0; needs the
+    # "redis" extra
+    RATE_LIMIT_REDIS_URL: str | None = None
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
@@ -2,6 +2,23 @@ from app.models import SubscriptionLevel
 
 # Değiştirilecek
 
+# Bump whenever SUBSCRIPTION_FEATURES or FEATURE_FLAGS change; tokens minted
+# against an older catalog are rejected and have to be re-issued.
+PLAN_CATALOG_VERSION = 1
+
+# Bit positions used in the token feature mask. Append only.
+FEATURE_FLAGS = (
+    "basic_dashboard",
+    "dashboard",
+    "basic_reports",
+    "advanced_dashboard",
+    "team_collaboration",
+    "analytics",
+    "all_features",
+    "custom_integrations",
+    "dedicated_manager",
+)
+
 SUBSCRIPTION_FEATURES = {
     SubscriptionLevel.FREE: {
         "max_users": 1,
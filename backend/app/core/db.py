@@ -1,16 +1,131 @@
-from sqlmodel import Session, create_engine, select
+from typing import Any, Dict, List, Tuple
+
+import orjson
+import psycopg
+from sqlalchemy import Executable, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.crud import user_ops
 from app.core.config import settings
+from app.core.db_pool import (
+    PIPELINED,
+    PoolMonitor,
+    count_round_trip,
+    timed_pool_class,
+)
+from app.core.db_routing import ReplicaSet, pin_on_write
+from app.core.db_statements import StatementCacheMonitor
 from app.models import User, UserCreate, UserRoleCreate, RoleType
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def json_serializer(value: Any) -> str:
+    # SQLAlchemy also renders JSON literals with this, so it has to be str
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def engine_options() -> Dict[str, Any]:
+    options = [
+        f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}",
+        "-c idle_in_transaction_session_timeout="
+        f"{settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}",
+    ]
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+        "json_serializer": json_serializer,
+        "json_deserializer": orjson.loads,
+        "connect_args": {
+            "options": " ".join(options),
+            "prepare_threshold": settings.DB_PREPARE_THRESHOLD,
+        },
+    }
+
+
+# Request handling goes through async_engine; the sync engine is kept for
+# background jobs that run in the threadpool.
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=timed_pool_class(QueuePool, "sync"),
+    **engine_options(),
+)
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=timed_pool_class(AsyncAdaptedQueuePool, "async"),
+    **engine_options(),
+)
+pool_monitors = [
+    PoolMonitor(engine, "sync", settings.DB_CONNECTION_LEAK_SECONDS),
+    PoolMonitor(async_engine.sync_engine, "async", settings.DB_CONNECTION_LEAK_SECONDS),
+]
+statement_caches = [
+    StatementCacheMonitor(engine, "sync"),
+    StatementCacheMonitor(async_engine.sync_engine, "async"),
+]
+# empty unless POSTGRES_REPLICA_URIS is set; reads then stay on the primary
+replicas = ReplicaSet(
+    settings.POSTGRES_REPLICA_URIS,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
+    **engine_options(),
+)
+
+
+async def execute_pipelined(
+    session: AsyncSession, *statements: Executable | Tuple[Executable, Any]
+) -> List[int]:
+    """Run ``statements`` in the session's transaction in one round trip.
+
+    psycopg pipeline mode sends them back to back and waits once for all
+    of their results. A statement may be paired with parameters, a list of
+    them running it as executemany. Pending ORM changes are flushed first.
+
+    Only row counts come back, one per statement: SQLAlchemy's async psycopg
+    cursor drops rows that arrive after ``execute`` returns, so RETURNING
+    is of no use here. Later statements can depend on earlier ones through
+    the data, e.g. ``INSERT ... SELECT ... WHERE EXISTS``.
+    """
+    await session.flush()
+    # the statements go through the Connection, past the Session's write
+    # events that send the client's next reads to the primary
+    if any(
+        (statement[0] if isinstance(statement, tuple) else statement).is_dml
+        for statement in statements
+    ):
+        pin_on_write(session)
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    results = []
+    connection.info[PIPELINED] = True
+    try:
+        async with raw_connection.driver_connection.pipeline():
+            for statement in statements:
+                if isinstance(statement, tuple):
+                    results.append(await connection.execute(*statement))
+                else:
+                    results.append(await connection.execute(statement))
+    except psycopg.Error as error:
+        # raised when the pipeline syncs, past SQLAlchemy's error translation
+        raise exc.DBAPIError.instance(None, None, error, psycopg.Error) from error
+    finally:
+        connection.info.pop(PIPELINED, None)
+        count_round_trip()
+    # the psycopg cursors are closed but hold their results after the sync
+    return [result.rowcount for result in results]
 
 
 # ensure first super user is created
-def init_db(session: Session) -> None:
-    user = session.exec(
-        select(User).where(User.email == settings.FIRST_SUPERUSER)
+async def init_db(session: AsyncSession) -> None:
+    # imported here: the CRUD modules use the helpers above
+    from app.crud import user_ops
+
+    user = (
+        await session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER))
     ).first()
     if not user:
         user_in = UserCreate(
@@ -18,12 +133,10 @@ def init_db(session: Session) -> None:
             password=settings.FIRST_SUPERUSER_PASSWORD,
             is_superuser=True,
         )
-        user = user_ops.create_user(session=session, user_create=user_in)
-
         role_in = UserRoleCreate(
-            role_type=RoleType.SUPER_ADMIN, user_id=user.id, tenant_id=user.id
+            role_type=RoleType.SUPER_ADMIN, user_id=None, tenant_id=None
         )
-
-        user_role = user_ops.create_user_role(
-            session=session, user=user, role_in=role_in
+        await user_ops.create_user_with_role(
+            session=session, user_create=user_in, role_in=role_in
         )
+        await session.commit()
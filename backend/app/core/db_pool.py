@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Any
+
+import greenlet
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedPool:
+    """Mixin timing how long callers wait for a pooled connection."""
+
+    waiting: Any
+    wait_seconds: Any
+    timeouts: Any
+
+    def _do_get(self) -> Any:
+        self.waiting.inc()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.timeouts.inc()
+            raise
+        finally:
+            self.waiting.dec()
+            self.wait_seconds.observe(time.perf_counter() - started)
+
+
+def timed_pool_class(base: type[QueuePool], name: str) -> type[QueuePool]:
+    """``base`` with wait metrics under ``db_pool_{name}_*``.
+
+    The metrics live on the class rather than the instance because
+    ``Engine.dispose()`` rebuilds the pool from its class and arguments.
+    """
+    return type(
+        f"Timed{base.__name__}",
+        (_TimedPool, base),
+        {
+            "waiting": metrics.gauge(f"db_pool_{name}_waiting"),
+            "wait_seconds": metrics.histogram(f"db_pool_{name}_wait_seconds"),
+            "timeouts": metrics.counter(f"db_pool_{name}_timeouts_total"),
+        },
+    )
+
+
+def acquiring_stack() -> traceback.StackSummary:
+    # Under AsyncSession the checkout runs in a greenlet whose own stack ends
+    # inside SQLAlchemy; the awaiting coroutine is in the parent greenlet.
+    parent = greenlet.getcurrent().parent
+    if parent is not None and parent.gr_frame is not None:
+        return traceback.extract_stack(parent.gr_frame)
+    return traceback.extract_stack()
+
+
+class ConnectionUsage:
+    """Connection hold time, SQL time, statements and round trips of one request."""
+
+    __slots__ = ("hold_seconds", "sql_seconds", "statements", "round_trips")
+
+    def __init__(self) -> None:
+        self.hold_seconds = 0.0
+        self.sql_seconds = 0.0
+        self.statements = 0
+        self.round_trips = 0
+
+
+# set per request; checkouts and statements made in that context add to it
+connection_usage: ContextVar[ConnectionUsage | None] = ContextVar(
+    "connection_usage", default=None
+)
+
+# set in Connection.info while statements are queued in a psycopg pipeline
+PIPELINED = "pipelined"
+_BEGIN_PENDING = "begin_pending"
+_IN_TRANSACTION = "in_transaction"
+
+
+def count_round_trip() -> None:
+    usage = connection_usage.get()
+    if usage is not None:
+        usage.round_trips += 1
+
+
+class PoolMonitor:
+    """Checkout metrics for one engine and an optional leak detector.
+
+    Also adds hold and SQL time to the ``connection_usage`` of the context
+    that checked the connection out, if any, and counts its round trips:
+    one per statement outside a pipeline, plus the BEGIN psycopg sends
+    before the first one and the COMMIT or ROLLBACK that ends it.
+
+    With ``leak_seconds`` set, every checkout records where it was acquired
+    and connections held longer than that are logged with the stack, once
+    when noticed by ``report_leaks`` and again with the total when returned.
+    Capturing stacks is not free, so keep it for debugging.
+    """
+
+    def __init__(self, engine: Engine, name: str, leak_seconds: float = 0) -> None:
+        self.engine = engine
+        self.name = name
+        self.leak_seconds = leak_seconds
+        self._held: dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+        self.checked_out = metrics.gauge(f"db_pool_{name}_checked_out")
+        self.leaks = metrics.counter(f"db_pool_{name}_leaks_total")
+
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "begin", self._on_begin)
+        event.listen(engine, "commit", self._on_end)
+        event.listen(engine, "rollback", self._on_end)
+
+    def _on_checkout(self, _dbapi_connection: Any, record: Any, _proxy: Any) -> None:
+        self.checked_out.inc()
+        usage = connection_usage.get()
+        if usage is not None:
+            record.info["usage"] = (usage, time.perf_counter())
+        if self.leak_seconds:
+            record.info["checked_out"] = (time.monotonic(), acquiring_stack(), False)
+            with self._lock:
+                self._held[id(record)] = record
+
+    def _on_checkin(self, _dbapi_connection: Any, record: Any) -> None:
+        self.checked_out.dec()
+        record.info.pop(_BEGIN_PENDING, None)
+        record.info.pop(_IN_TRANSACTION, None)
+        usage = record.info.pop("usage", None)
+        if usage is not None:
+            usage[0].hold_seconds += time.perf_counter() - usage[1]
+        checked_out = record.info.pop("checked_out", None)
+        if checked_out is None:
+            return
+        with self._lock:
+            self._held.pop(id(record), None)
+        started, stack, reported = checked_out
+        held = time.monotonic() - started
+        if held > self.leak_seconds:
+            if not reported:
+                self.leaks.inc()
+            logger.warning(
+                "%s pool connection returned after %.1fs, acquired at:\n%s",
+                self.name,
+                held,
+                "".join(stack.format()),
+            )
+
+    def _on_begin(self, conn: Any) -> None:
+        # psycopg sends BEGIN lazily, with the first statement
+        conn.info[_BEGIN_PENDING] = True
+
+    def _on_end(self, conn: Any) -> None:
+        # nothing is sent for a transaction that never ran a statement
+        if conn.info.pop(_IN_TRANSACTION, False):
+            count_round_trip()
+        conn.info.pop(_BEGIN_PENDING, None)
+
+    def _before_execute(self, conn: Any, *_: Any) -> None:
+        conn.info["query_started"] = time.perf_counter()
+        if conn.info.pop(_BEGIN_PENDING, False):
+            conn.info[_IN_TRANSACTION] = True
+            if not conn.info.get(PIPELINED):
+                count_round_trip()
+
+    def _after_execute(self, conn: Any, *_: Any) -> None:
+        started = conn.info.pop("query_started", None)
+        usage = connection_usage.get()
+        if usage is not None:
+            usage.statements += 1
+            if started is not None:
+                usage.sql_seconds += time.perf_counter() - started
+        if not conn.info.get(PIPELINED):
+            count_round_trip()
+
+    def report_leaks(self) -> None:
+        """Log connections currently held longer than ``leak_seconds``."""
+        now = time.monotonic()
+        with self._lock:
+            records = list(self._held.values())
+        for record in records:
+            checked_out = record.info.get("checked_out")
+            if checked_out is None:
+                continue
+            started, stack, reported = checked_out
+            if reported or now - started <= self.leak_seconds:
+                continue
+            record.info["checked_out"] = (started, stack, True)
+            self.leaks.inc()
+            logger.warning(
+                "%s pool connection held for %.1fs, acquired at:\n%s",
+                self.name,
+                now - started,
+                "".join(stack.format()),
+            )
+
+    async def watch_leaks_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.leak_seconds)
+            self.report_leaks()
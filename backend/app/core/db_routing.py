@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from fastapi import Request, Response
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db_pool import PoolMonitor, timed_pool_class
+from app.core.db_statements import StatementCacheMonitor
+from app.core.metrics import metrics
+from app.core.unit_of_work import after_commit
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# 0 on the primary or a replica that has replayed everything it received
+_REPLICA_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine, name: str) -> None:
+        self.engine = engine
+        self.name = name
+        self.healthy = True
+        self.lag_seconds = metrics.gauge(f"db_{name}_lag_seconds")
+        self.healthy_gauge = metrics.gauge(f"db_{name}_healthy")
+        self.healthy_gauge.set(1)
+        event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def mark(self, healthy: bool) -> None:
+        if healthy != self.healthy:
+            logger.warning(
+                "Replica %s is %s", self.name, "back" if healthy else "unavailable"
+            )
+        self.healthy = healthy
+        self.healthy_gauge.set(1 if healthy else 0)
+
+    def _on_error(self, context: Any) -> None:
+        # stop routing here until the next health check succeeds
+        if context.is_disconnect or context.connection is None:
+            self.mark(False)
+
+
+class ReplicaSet:
+    """Read replicas picked round-robin among the healthy ones.
+
+    A background check marks a replica unhealthy when it cannot be reached
+    or lags behind by more than ``max_lag_seconds``; connection errors take
+    it out of rotation immediately.
+    """
+
+    def __init__(
+        self,
+        uris: list[str],
+        max_lag_seconds: float,
+        check_seconds: float,
+        **engine_options: Any,
+    ) -> None:
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.replicas: list[Replica] = []
+        for index, uri in enumerate(uris):
+            name = f"replica{index}"
+            # psycopg in async mode, whatever driver the DSN names
+            url = make_url(uri).set(drivername="postgresql+psycopg")
+            engine = create_async_engine(
+                url,
+                poolclass=timed_pool_class(AsyncAdaptedQueuePool, name),
+                **engine_options,
+            )
+            PoolMonitor(engine.sync_engine, name, settings.DB_CONNECTION_LEAK_SECONDS)
+            StatementCacheMonitor(engine.sync_engine, name)
+            self.replicas.append(Replica(engine, name))
+        self._next = 0
+
+        self.routed_replica = metrics.counter("db_reads_routed_replica_total")
+        self.routed_primary = metrics.counter("db_reads_routed_primary_total")
+
+    @property
+    def read_your_writes_seconds(self) -> float:
+        # a replica in rotation was at most max_lag behind one check ago
+        return self.max_lag_seconds + self.check_seconds
+
+    def choose(self) -> AsyncEngine | None:
+        """Next healthy replica engine, or None to read from the primary."""
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                self.routed_replica.inc()
+                return replica.engine
+        self.routed_primary.inc()
+        return None
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as connection:
+                lag = (await connection.execute(_REPLICA_LAG)).scalar()
+        except Exception:
+            logger.exception("Health check of replica %s failed", replica.name)
+            replica.mark(False)
+            return
+        lag = float(lag or 0)
+        replica.lag_seconds.set(lag)
+        replica.mark(lag <= self.max_lag_seconds)
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def check_health_forever(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.check_seconds)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def read_primary_pinned(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_reads_to_primary(
+    session: Session | AsyncSession, response: Response, seconds: float
+) -> None:
+    """Once ``session`` commits, send this client's reads to the primary.
+
+    The cookie only decides where reads go, so it needs no signature: a
+    forged one just costs the client its replica reads.
+    """
+    if session.info.get("pins_primary"):
+        return
+    session.info["pins_primary"] = True
+
+    def set_cookie() -> None:
+        session.info.pop("pins_primary", None)
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            f"{time.time() + seconds:.3f}",
+            max_age=max(int(seconds) + 1, 1),
+            httponly=True,
+            samesite="lax",
+        )
+
+    after_commit(session, set_cookie)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pin(session: Session) -> None:
+    session.info.pop("pins_primary", None)
+
+
+def pin_on_write(session: Session | AsyncSession) -> None:
+    """Pin the client's reads to the primary if ``session`` serves a request.
+
+    Called for every ORM write through the events below; writes that bypass
+    the ORM session events, like ``execute_pipelined``, call it themselves.
+    """
+    response = session.info.get("response")
+    if response is not None:
+        pin_reads_to_primary(session, response, session.info["pin_seconds"])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        pin_on_write(state.session)
+
+
+@event.listens_for(Session, "after_flush")
+def _on_flush(session: Session, _flush_context: Any) -> None:
+    pin_on_write(session)
@@ -0,0 +1,41 @@
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from app.core.metrics import metrics
+
+
+class StatementCacheMonitor:
+    """Hit and miss counts of one engine's compiled-SQL cache.
+
+    SQLAlchemy keys the cache on the statement's structure, so a statement
+    that misses repeatedly is being built with literal values or in a
+    different shape each time. Statements that cannot be cached at all are
+    counted as ``uncached``.
+    """
+
+    def __init__(self, engine: Engine, name: str) -> None:
+        self.engine = engine
+        self.hits = metrics.counter(f"db_{name}_compiled_cache_hits_total")
+        self.misses = metrics.counter(f"db_{name}_compiled_cache_misses_total")
+        self.uncached = metrics.counter(f"db_{name}_statements_uncached_total")
+        self.hit_ratio = metrics.gauge(f"db_{name}_compiled_cache_hit_ratio")
+        self.size = metrics.gauge(f"db_{name}_compiled_cache_size")
+
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _after_execute(self, *args: Any) -> None:
+        context = args[4]
+        if context is None:
+            return
+        if context.cache_hit is CACHE_HIT:
+            self.hits.inc()
+        elif context.cache_hit is CACHE_MISS:
+            self.misses.inc()
+            cache = self.engine._compiled_cache
+            self.size.set(len(cache) if cache is not None else 0)
+        else:
+            self.uncached.inc()
+            return
+        self.hit_ratio.set(self.hits.value / (self.hits.value + self.misses.value))
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+import secrets
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple[Any, ...]) -> tuple[float, Any]:
+    # Runs inside the worker process; report when work actually started so the
+    # parent can measure how long the job sat in the queue.
+    return time.time(), fn(*args)
+
+
+class PasswordHashPool:
+    """Bounded process pool for bcrypt hashing and verification.
+
+    Keeps CPU-bound password work off the request threadpool. When more than
+    ``max_queue`` jobs are pending the call fails fast with a 503 instead of
+    queueing behind the rest of the peak. Logins and bulk imports get pools
+    of their own, so an import never sits in front of a login.
+
+    Workers come from a forkserver rather than a fork of the app process,
+    which by then holds threads, locks and open database sockets. ``start``
+    spawns them up front, from the app's lifespan.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        busy_detail: str = "Authentication service busy, try again",
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.busy_detail = busy_detail
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self.queue_depth = metrics.gauge(f"{name}_queue_depth")
+        self.wait_seconds = metrics.histogram(f"{name}_wait_seconds")
+        self.run_seconds = metrics.histogram(f"{name}_run_seconds")
+        self.rejected = metrics.counter(f"{name}_rejected_total")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._executor
+
+    def start(self) -> None:
+        """Spawn every worker now instead of on the first requests."""
+        executor = self._get_executor()
+        for future in [executor.submit(time.time) for _ in range(self.max_workers)]:
+            future.result()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.rejected.inc()
+                raise HTTPException(
+                    status_code=503,
+                    detail=self.busy_detail,
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+            self.queue_depth.set(self._pending)
+
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, args
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.queue_depth.set(self._pending)
+
+        self.wait_seconds.observe(max(started_at - submitted_at, 0.0))
+        self.run_seconds.observe(max(time.time() - started_at, 0.0))
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_pool = PasswordHashPool(
+    "password_pool",
+    max_workers=settings.PASSWORD_HASH_POOL_WORKERS,
+    max_queue=settings.PASSWORD_HASH_POOL_MAX_QUEUE,
+)
+import_hash_pool = PasswordHashPool(
+    "import_hash_pool",
+    max_workers=settings.IMPORT_HASH_POOL_WORKERS,
+    max_queue=settings.IMPORT_HASH_POOL_MAX_QUEUE,
+    busy_detail="Too many imports running, try again",
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(
+        security.verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run(security.get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: list[str]) -> list[str]:
+    """Hash an import batch, spread over the import pool as one job per worker."""
+    if not passwords:
+        return []
+    size = -(-len(passwords) // import_hash_pool.max_workers)
+    slices = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(
+        *(import_hash_pool.run(security.get_password_hashes, part) for part in slices)
+    )
+    return [password_hash for part in results for password_hash in part]
+
+
+_dummy_password_hash: str | None = None
+
+
+async def verify_dummy_password(password: str) -> bool:
+    """Spend the same bcrypt work as a real verify; always fails.
+
+    Used for unknown accounts so response time does not reveal whether an
+    email is registered.
+    """
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = await get_password_hash_async(secrets.token_urlsafe())
+    await verify_password_async(password, _dummy_password_hash)
+    return False
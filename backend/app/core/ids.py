@@ -0,0 +1,33 @@
+import os
+import time
+import uuid
+
+_MS_MASK = (1 << 48) - 1
+_RAND_B_MASK = (1 << 62) - 1
+
+
+def uuid7_from(unix_ms: int, random_bits: int) -> uuid.UUID:
+    """A version 7 UUID for ``unix_ms`` whose other 74 bits come from ``random_bits``."""
+    rand_a = (random_bits >> 62) & 0xFFF
+    return uuid.UUID(
+        int=(unix_ms & _MS_MASK) << 80
+        | 0x7 << 76
+        | rand_a << 64
+        | 0b10 << 62
+        | random_bits & _RAND_B_MASK
+    )
+
+
+def uuid7() -> uuid.UUID:
+    """A new time-ordered UUID (RFC 9562 version 7).
+
+    The first 48 bits are the Unix time in milliseconds and the next 12 the
+    fraction of that millisecond (RFC 9562 method 3), so keys created one
+    after another land next to each other in a B-tree instead of on a
+    random page. The remaining 62 bits are random.
+    """
+    now_ns = time.time_ns()
+    unix_ms, sub_ms_ns = divmod(now_ns, 1_000_000)
+    fraction = sub_ms_ns * 4096 // 1_000_000
+    random_bits = int.from_bytes(os.urandom(8), "big")
+    return uuid7_from(unix_ms, fraction << 62 | random_bits & _RAND_B_MASK)
@@ -0,0 +1,120 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Mapping
+
+from app.core.constants import (
+    FEATURE_FLAGS,
+    PLAN_CATALOG_VERSION,
+    SUBSCRIPTION_FEATURES,
+)
+from app.models import SubscriptionLevel
+
+logger = logging.getLogger(__name__)
+
+# Tenant plans are free-form JSON stored per tenant; tokens carry their
+# feature mask under this id, and the limits are looked up by tenant id.
+TENANT_PLAN_ID = "tenant"
+
+
+@dataclass(frozen=True, slots=True)
+class Plan:
+    id: str
+    max_users: int | None
+    storage_limit_gb: int | None
+    support: str | None
+    feature_mask: int
+
+
+class PlanCatalog:
+    """In-memory, versioned view of the subscription plans and feature bits."""
+
+    def __init__(
+        self,
+        version: int,
+        feature_flags: Iterable[str],
+        plans: Mapping[Any, Dict[str, Any]],
+    ) -> None:
+        self.version = version
+        self.feature_flags = tuple(feature_flags)
+        self._bits = {name: 1 << i for i, name in enumerate(self.feature_flags)}
+        self.all_features_mask = (1 << len(self.feature_flags)) - 1
+
+        self.plans: Dict[str, Plan] = {}
+        for level, spec in plans.items():
+            plan_id = SubscriptionLevel(level).value
+            unknown = set(spec.get("features", ())) - self._bits.keys()
+            if unknown:
+                raise ValueError(
+                    f"Plan {plan_id!r} uses features missing from FEATURE_FLAGS: "
+                    f"{sorted(unknown)}"
+                )
+            self.plans[plan_id] = Plan(
+                id=plan_id,
+                max_users=spec.get("max_users"),
+                storage_limit_gb=spec.get("storage_limit_gb"),
+                support=spec.get("support"),
+                feature_mask=self.mask_for(spec.get("features", ())),
+            )
+        self.plans.setdefault(
+            SubscriptionLevel.SUPER_ADMIN.value,
+            Plan(
+                id=SubscriptionLevel.SUPER_ADMIN.value,
+                max_users=None,
+                storage_limit_gb=None,
+                support=None,
+                feature_mask=self.all_features_mask,
+            ),
+        )
+
+    def mask_for(self, features: Iterable[str]) -> int:
+        mask = 0
+        for name in features:
+            mask |= self._bits.get(name, 0)
+        return mask
+
+    def features_for(self, mask: int) -> frozenset[str]:
+        return frozenset(name for name, bit in self._bits.items() if mask & bit)
+
+    def has_feature(self, mask: int, name: str) -> bool:
+        return bool(mask & self._bits.get(name, 0))
+
+    def get(self, plan_id: str) -> Plan | None:
+        return self.plans.get(plan_id)
+
+    def tenant_plan(self, spec: Dict[str, Any]) -> Plan:
+        """Build the plan for a tenant's ``special_subscription_plan``.
+
+        Tenant plans are edited as data, so features this catalog does not
+        know are logged and left out instead of failing the login.
+        """
+        features = spec.get("features", ())
+        unknown = set(features) - self._bits.keys()
+        if unknown:
+            logger.warning(
+                "Tenant plan uses features missing from FEATURE_FLAGS: %s",
+                sorted(unknown),
+            )
+        return Plan(
+            id=TENANT_PLAN_ID,
+            max_users=spec.get("max_users"),
+            storage_limit_gb=spec.get("storage_limit_gb"),
+            support=spec.get("support"),
+            feature_mask=self.mask_for(features),
+        )
+
+    def resolve(
+        self, subscription_level: SubscriptionLevel | Dict[str, Any]
+    ) -> tuple[str, int]:
+        """Map a login authorization result to ``(plan_id, feature_mask)``."""
+        if isinstance(subscription_level, dict):
+            plan = self.tenant_plan(subscription_level)
+        else:
+            plan = self.plans[SubscriptionLevel(subscription_level).value]
+        return plan.id, plan.feature_mask
+
+
+plan_catalog = PlanCatalog(
+    version=PLAN_CATALOG_VERSION,
+    feature_flags=FEATURE_FLAGS,
+    plans=SUBSCRIPTION_FEATURES,
+)
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    """In-process token buckets, one per key, bounded to ``max_keys`` entries.
+
+    Idle buckets are the least recently used and are dropped first; a dropped
+    bucket simply starts full again.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_keys: int):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, cost: float = 1) -> float:
+        """Take ``cost`` tokens; return 0 when allowed, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(
+                self.capacity, tokens + (now - updated_at) * self.refill_per_second
+            )
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / self.refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# KEYS[1] bucket key; ARGV: capacity, refill per second, now, cost
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisTokenBucket:
+    """Token buckets shared by every worker through a Redis-compatible server.
+
+    The refill-and-take step runs as a single Lua script, so concurrent
+    workers cannot overdraw a bucket.
+    """
+
+    def __init__(
+        self, client: Any, capacity: float, refill_per_second: float, prefix: str
+    ):
+        self.client = client
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, cost: float = 1) -> float:
+        retry_after = await self._script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[self.capacity, self.refill_per_second, time.time(), cost],
+        )
+        return float(retry_after)
+
+
+def create_token_bucket(
+    name: str, capacity: float, refill_per_minute: float
+) -> TokenBucket | RedisTokenBucket:
+    refill_per_second = refill_per_minute / 60
+    if not settings.RATE_LIMIT_REDIS_URL:
+        return TokenBucket(
+            capacity, refill_per_second, max_keys=settings.RATE_LIMIT_MAX_KEYS
+        )
+
+    try:
+        from redis import asyncio as redis_asyncio
+    except ImportError as e:
+        raise RuntimeError(
+            "RATE_LIMIT_REDIS_URL is set but the 'redis' package is not "
+            "installed; install the app with its 'redis' extra"
+        ) from e
+    client = redis_asyncio.from_url(settings.RATE_LIMIT_REDIS_URL)
+    return RedisTokenBucket(client, capacity, refill_per_second, prefix=name)
+
+
+def retry_after_header(retry_after: float) -> dict[str, str]:
+    return {"Retry-After": str(max(math.ceil(retry_after), 1))}
@@ -9,10 +9,23 @@ from fastapi import HTTPException, status
 
 
 from app.core.config import settings
-from app.core.constants import SUBSCRIPTION_FEATURES
-from app.models import UserRole, RoleType, SubscriptionLevel
+from app.core.ids import uuid7
+from app.core.plans import plan_catalog
+from app.models import UserRole, RoleType, SubscriptionLevel, TokenScope
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def build_pwd_context() -> CryptContext:
+    # min/max make needs_update() flag hashes made with any other cost
+    return CryptContext(
+        schemes=settings.PASSWORD_HASH_SCHEMES,
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+    )
+
+
+pwd_context = build_pwd_context()
 
 ALGORITHM = "HS256"
 
@@ -23,15 +36,24 @@ def create_jwt_payload(
     role: str,
     subscription_level: SubscriptionLevel | Dict,
     expire_timestamp: int,
+    token_id: uuid.UUID | None = None,
+    scope: TokenScope = TokenScope.FULL,
 ):
     now = datetime.utcnow()
+    # Only a plan reference goes into the token; limits and feature names are
+    # resolved server-side from the plan catalog.
+    plan_id, feature_mask = plan_catalog.resolve(subscription_level)
     return {
-        "sub": user_id,
-        "tenant_id": tenant_id,
+        "sub": str(user_id),
+        "tenant_id": str(tenant_id) if tenant_id else None,
         "role": role,
-        "sub_plan": SUBSCRIPTION_FEATURES[subscription_level],
+        "scope": scope.value,
+        "plan": plan_id,
+        "pv": plan_catalog.version,
+        "feat": feature_mask,
         "exp": expire_timestamp,
         "iat": int(now.timestamp()),
+        "jti": str(token_id or uuid7()),
     }
 
 
@@ -41,6 +63,8 @@ def create_access_token(
     role: RoleType,
     subscription_level: SubscriptionLevel,
     expire_delta: timedelta,
+    token_id: uuid.UUID | None = None,
+    scope: TokenScope = TokenScope.FULL,
 ) -> str:
     """Create JWT access token with proper error handling."""
     try:
@@ -53,6 +77,8 @@ def create_access_token(
             role=role,
             subscription_level=subscription_level,
             expire_timestamp=expire_timestamp,
+            token_id=token_id,
+            scope=scope,
         )
 
         encoded_jwt = jwt.encode(
@@ -79,3 +105,11 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
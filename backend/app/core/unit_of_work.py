@@ -0,0 +1,63 @@
+from typing import Any, Callable
+
+from sqlalchemy import Insert, event, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def after_commit(session: Session | AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the caller's transaction commits.
+
+    CRUD functions never commit themselves; side effects that must only
+    happen for committed data (cache invalidation, local revocations) are
+    queued here and dropped on rollback.
+    """
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+async def insert_unless_conflict(session: AsyncSession, db_object: SQLModel) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING for one row of a table model.
+
+    Returns False when any unique constraint already holds the values,
+    so create paths need no SELECT beforehand and cannot race each other.
+    The object is not added to the session; it already carries every
+    column value, generated ones included.
+    """
+    table = type(db_object).__table__
+    statement = (
+        pg_insert(table)
+        .values(db_object.model_dump())
+        .on_conflict_do_nothing()
+        .returning(*table.primary_key.columns)
+    )
+    result = await session.execute(statement)
+    return result.first() is not None
+
+
+def insert_where(db_object: SQLModel, condition: Any) -> Insert:
+    """INSERT of one row of a table model that is skipped unless ``condition``.
+
+    Lets a pipelined insert depend on an earlier statement of the same
+    pipeline without waiting for its result.
+    """
+    table = type(db_object).__table__
+    values = db_object.model_dump()
+    row = select(
+        *(literal(values[column.name], column.type) for column in table.columns)
+    ).where(condition)
+    return insert(table).from_select([column.name for column in table.columns], row)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT, None)
@@ -0,0 +1,94 @@
+import uuid
+from datetime import datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud.user_ops import LoginContext, login_context_statement
+from app.models import (
+    ClassCode,
+    ClassCodeStudent,
+    RoleType,
+    User,
+    UserRole,
+    normalize_email,
+)
+
+
+class ClassCodeLoginContext(NamedTuple):
+    login_context: LoginContext
+    class_code_expires_at: datetime
+
+
+async def count_tenant_students(
+    session: AsyncSession, tenant_id: uuid.UUID, student_ids: List[uuid.UUID]
+) -> int:
+    statement = select(func.count(func.distinct(UserRole.user_id))).where(
+        UserRole.user_id.in_(student_ids),
+        UserRole.tenant_id == tenant_id,
+        UserRole.role_type == RoleType.STUDENT,
+    )
+    return (await session.exec(statement)).one()
+
+
+def create_class_code(
+    session: AsyncSession,
+    code_digest: str,
+    teacher_id: uuid.UUID,
+    tenant_id: uuid.UUID,
+    student_ids: List[uuid.UUID],
+    expires_at: datetime,
+) -> ClassCode:
+    db_object = ClassCode(
+        code_digest=code_digest,
+        teacher_id=teacher_id,
+        tenant_id=tenant_id,
+        expires_at=expires_at,
+    )
+    session.add(db_object)
+    session.add_all(
+        ClassCodeStudent(class_code_id=db_object.id, student_id=student_id)
+        for student_id in set(student_ids)
+    )
+    return db_object
+
+
+async def read_class_code(
+    session: AsyncSession, class_code_id: uuid.UUID
+) -> ClassCode | None:
+    return await session.get(ClassCode, class_code_id)
+
+
+async def read_class_code_login(
+    session: AsyncSession, code_digest: str, email: str
+) -> ClassCodeLoginContext | None:
+    """Resolve a live class code and a student on its roster in one round trip."""
+    statement = (
+        login_context_statement()
+        .add_columns(ClassCode.expires_at)
+        .join(ClassCodeStudent, ClassCodeStudent.student_id == User.id)
+        .join(ClassCode, ClassCode.id == ClassCodeStudent.class_code_id)
+        .where(
+            ClassCode.code_digest == code_digest,
+            ClassCode.expires_at > datetime.utcnow(),
+            User.email == normalize_email(email),
+        )
+    )
+    row = (await session.exec(statement)).first()
+    if row is None:
+        return None
+    *login_context, expires_at = row
+    return ClassCodeLoginContext(LoginContext(*login_context), expires_at)
+
+
+async def read_class_code_roster(
+    session: AsyncSession, class_code_id: uuid.UUID
+) -> List[LoginContext]:
+    statement = (
+        login_context_statement()
+        .join(ClassCodeStudent, ClassCodeStudent.student_id == User.id)
+        .where(ClassCodeStudent.class_code_id == class_code_id)
+    )
+    return [LoginContext(*row) for row in (await session.exec(statement)).all()]
@@ -0,0 +1,102 @@
+import logging
+import threading
+from typing import Any, Callable
+
+from sqlmodel import Session, select
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models import User, normalize_email
+
+logger = logging.getLogger(__name__)
+
+
+class ExistenceFilter:
+    """Per-worker Bloom filter over the values of one unique column.
+
+    A negative answer means no row with that value existed when the filter
+    was loaded, and none was inserted by this worker since, so the
+    duplicate pre-check can be skipped; rows added by other workers are
+    still caught by the unique constraint. The bulk import uses it to avoid
+    looking up, and hashing passwords for, rows that are certainly new.
+    Until ``load`` has run every value "might exist".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        column: Any,
+        normalize: Callable[[str], str],
+        capacity: int,
+        error_rate: float,
+    ) -> None:
+        self.name = name
+        self.column = column
+        self.normalize = normalize
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom: BloomFilter | None = None
+        self._lock = threading.Lock()
+
+        self.negatives = metrics.counter(f"{name}_filter_negatives_total")
+        self.positives = metrics.counter(f"{name}_filter_positives_total")
+        self.false_positives = metrics.counter(f"{name}_filter_false_positives_total")
+        self.expected_false_positive_rate = metrics.gauge(
+            f"{name}_filter_expected_false_positive_rate"
+        )
+        self.observed_false_positive_rate = metrics.gauge(
+            f"{name}_filter_false_positive_rate"
+        )
+
+    def might_exist(self, value: str) -> bool:
+        bloom = self._bloom
+        if bloom is None:
+            return True
+        if self.normalize(value).encode() in bloom:
+            self.positives.inc()
+            return True
+        self.negatives.inc()
+        return False
+
+    def record_false_positive(self) -> None:
+        """Call when a positive answer was not confirmed by the database."""
+        self.false_positives.inc()
+        self.observed_false_positive_rate.set(
+            self.false_positives.value / max(self.positives.value, 1)
+        )
+
+    def add(self, value: str) -> None:
+        bloom = self._bloom
+        if bloom is None:
+            return
+        bloom.add(self.normalize(value).encode())
+        self.expected_false_positive_rate.set(bloom.false_positive_rate)
+
+    def load(self, session: Session) -> None:
+        """Rebuild from a streaming scan of the column."""
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        statement = (
+            select(self.column)
+            .where(self.column.is_not(None))
+            .execution_options(yield_per=10_000)
+        )
+        for value in session.exec(statement):
+            bloom.add(self.normalize(value).encode())
+        with self._lock:
+            self._bloom = bloom
+        self.expected_false_positive_rate.set(bloom.false_positive_rate)
+        logger.info("Loaded %d values into the %s filter", bloom.count, self.name)
+
+
+user_email_filter = ExistenceFilter(
+    "user_email",
+    User.email,
+    normalize=normalize_email,
+    capacity=settings.EXISTENCE_FILTER_CAPACITY,
+    error_rate=settings.EXISTENCE_FILTER_ERROR_RATE,
+)
+
+
+def load_existence_filters(session: Session) -> None:
+    user_email_filter.load(session)
@@ -1,56 +1,119 @@
 import uuid
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import bindparam, func, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.authentication import authorization_cache
+from app.core.db import execute_pipelined
+from app.core.unit_of_work import after_commit, insert_unless_conflict
+from app.crud import token_ops
 from app.models import (
     Tenant,
     TenantCreate,
     TenantSubscriptionPlan,
     TenantSubscriptionPlanCreate,
+    User,
 )
 
 
-def tenant_create(session: Session, tenant_create: TenantCreate) -> Tenant:
+async def tenant_create(
+    session: AsyncSession, tenant_create: TenantCreate
+) -> Tenant | None:
+    """Insert a tenant; None when its VKN code is already registered."""
     db_object = Tenant.model_validate(tenant_create)
 
-    session.add(db_object)
-    session.commit()
-    session.refresh(db_object)
+    if not await insert_unless_conflict(session, db_object):
+        return None
     return db_object
 
 
-def read_tenant_by_VKN(session: Session, tenant_vkn: str):
+async def read_tenant_by_VKN(session: AsyncSession, tenant_vkn: str):
     statement = select(Tenant).where(Tenant.VKN_code == tenant_vkn)
-    session_user = session.exec(statement).first()
+    session_user = (await session.exec(statement)).first()
     return session_user
 
 
-def read_tenant_by_id(session: Session, tenant_id: uuid.UUID):
+async def count_tenant_users(session: AsyncSession, tenant_id: uuid.UUID) -> int:
+    statement = (
+        select(func.count()).select_from(User).where(User.tenant_id == tenant_id)
+    )
+    return (await session.exec(statement)).one()
+
+
+async def read_tenant_by_id(session: AsyncSession, tenant_id: uuid.UUID):
     statement = select(Tenant).where(Tenant.id == tenant_id)
-    session_user = session.exec(statement).first()
+    session_user = (await session.exec(statement)).first()
     return session_user
 
 
+async def deactivate_tenant(session: AsyncSession, tenant_id: uuid.UUID) -> None:
+    statement = update(Tenant).where(Tenant.id == tenant_id).values(is_active=False)
+    await session.execute(statement)
+    await token_ops.revoke_tenant_tokens(session, tenant_id=tenant_id)
+
+
 def creat_tenant_sub_plan(
-    session: Session, tenant_id: uuid.UUID, tenant_in: TenantSubscriptionPlanCreate
+    session: AsyncSession, tenant_id: uuid.UUID, tenant_in: TenantSubscriptionPlanCreate
 ) -> TenantSubscriptionPlan:
+    # a tenant may have one active plan; replace_tenant_sub_plan swaps it
     db_object = TenantSubscriptionPlan.model_validate(
         tenant_in, update={"tenant_id": tenant_id}
     )
 
     session.add(db_object)
-    session.commit()
-    session.refresh(db_object)
+    after_commit(session, lambda: authorization_cache.invalidate_tenant(tenant_id))
     return db_object
 
 
-def read_tenant_sub_plan_by_id(
-    session: Session, tenant_id: uuid.UUID
-) -> TenantSubscriptionPlan | None:
-    statement = select(TenantSubscriptionPlan).where(
-        TenantSubscriptionPlan.tenant_id == tenant_id,
-        TenantSubscriptionPlan.is_active == True,
+def deactivate_tenant_sub_plans_statement(tenant_id: uuid.UUID) -> Any:
+    return (
+        update(TenantSubscriptionPlan)
+        .where(
+            TenantSubscriptionPlan.tenant_id == tenant_id,
+            TenantSubscriptionPlan.is_active,
+        )
+        .values(is_active=False)
+    )
+
+
+async def deactivate_tenant_sub_plans(
+    session: AsyncSession, tenant_id: uuid.UUID
+) -> None:
+    await session.execute(deactivate_tenant_sub_plans_statement(tenant_id))
+    after_commit(session, lambda: authorization_cache.invalidate_tenant(tenant_id))
+
+
+async def replace_tenant_sub_plan(
+    session: AsyncSession, tenant_id: uuid.UUID, tenant_in: TenantSubscriptionPlanCreate
+) -> TenantSubscriptionPlan:
+    """Deactivate the tenant's active plans and insert a new one, in one round trip.
+
+    The plan is written with Core, so it is not added to the session.
+    """
+    db_object = TenantSubscriptionPlan.model_validate(
+        tenant_in, update={"tenant_id": tenant_id}
+    )
+    await execute_pipelined(
+        session,
+        deactivate_tenant_sub_plans_statement(tenant_id),
+        insert(TenantSubscriptionPlan).values(db_object.model_dump()),
     )
-    session_user = session.exec(statement).first()
+    after_commit(session, lambda: authorization_cache.invalidate_tenant(tenant_id))
+    return db_object
+
+
+# built once so the plan lookup at login reuses its compiled SQL
+_active_plan_by_tenant = select(TenantSubscriptionPlan).where(
+    TenantSubscriptionPlan.tenant_id == bindparam("tenant_id"),
+    TenantSubscriptionPlan.is_active,
+)
+
+
+async def read_tenant_sub_plan_by_id(
+    session: AsyncSession, tenant_id: uuid.UUID
+) -> TenantSubscriptionPlan | None:
+    result = await session.exec(_active_plan_by_tenant, params={"tenant_id": tenant_id})
+    session_user = result.first()
     return session_user
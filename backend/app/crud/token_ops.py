@@ -0,0 +1,130 @@
+import hashlib
+import secrets
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.authentication.revocation import revoked_tokens
+from app.core.config import settings
+from app.core.unit_of_work import after_commit
+from app.models import ClassCodeToken, RefreshToken, RevokedToken, User
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+def create_refresh_token(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    access_token_jti: uuid.UUID,
+    access_token_expires_at: datetime,
+) -> str:
+    """Store a new refresh token and return its raw value.
+
+    Only the SHA-256 of the token is persisted.
+    """
+    refresh_token = secrets.token_urlsafe(32)
+    db_object = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(refresh_token),
+        access_token_jti=access_token_jti,
+        access_token_expires_at=access_token_expires_at,
+        expires_at=datetime.utcnow()
+        + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    session.add(db_object)
+    return refresh_token
+
+
+async def read_refresh_token(
+    session: AsyncSession, refresh_token: str
+) -> RefreshToken | None:
+    statement = select(RefreshToken).where(
+        RefreshToken.token_hash == hash_refresh_token(refresh_token)
+    )
+    return (await session.exec(statement)).first()
+
+
+async def consume_refresh_token(session: AsyncSession, db_token: RefreshToken) -> bool:
+    """Mark ``db_token`` as used for rotation.
+
+    Returns False when another request already consumed it, so concurrent
+    refreshes cannot both succeed with the same token.
+    """
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.id == db_token.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    result = await session.execute(statement)
+    return result.rowcount == 1
+
+
+def create_class_code_token(
+    session: AsyncSession, jti: uuid.UUID, user_id: uuid.UUID, expires_at: datetime
+) -> None:
+    """Record an access token minted through a class code so it can be revoked."""
+    session.add(ClassCodeToken(jti=jti, user_id=user_id, expires_at=expires_at))
+
+
+def revoke_access_tokens(
+    session: AsyncSession, tokens: Iterable[tuple[uuid.UUID, datetime]]
+) -> None:
+    """Revoke the ``(jti, expires_at)`` access tokens that have not expired."""
+    now = datetime.utcnow()
+    revoked = [
+        RevokedToken(jti=jti, expires_at=expires_at)
+        for jti, expires_at in tokens
+        if expires_at > now
+    ]
+    session.add_all(revoked)
+
+    def revoke_locally() -> None:
+        # this worker sees the revocation at once, the others on their next sync
+        for revoked_token in revoked:
+            revoked_tokens.add(revoked_token.jti, revoked_token.expires_at)
+
+    after_commit(session, revoke_locally)
+
+
+async def revoke_refresh_tokens(session: AsyncSession, *criteria: Any) -> None:
+    """Revoke matching live refresh tokens and the access tokens minted with them."""
+    now = datetime.utcnow()
+    statement = (
+        update(RefreshToken)
+        .where(
+            *criteria,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(RefreshToken.access_token_jti, RefreshToken.access_token_expires_at)
+    )
+    revoke_access_tokens(session, (await session.execute(statement)).all())
+
+
+async def revoke_class_code_tokens(session: AsyncSession, *criteria: Any) -> None:
+    """Revoke matching class-code access tokens, dropping their records."""
+    statement = (
+        delete(ClassCodeToken)
+        .where(*criteria)
+        .returning(ClassCodeToken.jti, ClassCodeToken.expires_at)
+    )
+    revoke_access_tokens(session, (await session.execute(statement)).all())
+
+
+async def revoke_user_tokens(session: AsyncSession, user_id: uuid.UUID) -> None:
+    await revoke_refresh_tokens(session, RefreshToken.user_id == user_id)
+    await revoke_class_code_tokens(session, ClassCodeToken.user_id == user_id)
+
+
+async def revoke_tenant_tokens(session: AsyncSession, tenant_id: uuid.UUID) -> None:
+    tenant_users = select(User.id).where(User.tenant_id == tenant_id)
+    await revoke_refresh_tokens(session, RefreshToken.user_id.in_(tenant_users))
+    await revoke_class_code_tokens(session, ClassCodeToken.user_id.in_(tenant_users))
@@ -0,0 +1,271 @@
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.hash_pool import get_password_hashes_async
+from app.core.ids import uuid7
+from app.core.metrics import metrics
+from app.crud import tenant_ops, user_ops
+from app.crud.existence_filter import user_email_filter
+from app.models import (
+    RoleType,
+    Tenant,
+    UserImportError,
+    UserImportReport,
+    UserImportRow,
+)
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+IMPORTABLE_ROLES = (RoleType.STUDENT, RoleType.PARENT, RoleType.TEACHER, RoleType.COACH)
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(
+    lines: AsyncIterator[str], import_format: str
+) -> AsyncIterator[Tuple[int, Dict[str, Any] | None, str | None]]:
+    """Yield ``(row, record, error)`` for every non-blank data line.
+
+    CSV records are one per line; quoted fields spanning lines are not
+    supported.
+    """
+    header: List[str] | None = None
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if import_format == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        row += 1
+        try:
+            if import_format == "csv":
+                values = next(csv.reader([line]))
+                record = {
+                    name: value
+                    for name, value in zip(header or [], values, strict=False)
+                    if value != ""
+                }
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Each line must be a JSON object")
+        except (csv.Error, ValueError) as e:
+            yield row, None, str(e)
+            continue
+        yield row, record, None
+
+
+class UserImport:
+    """Imports users into one tenant chunk by chunk.
+
+    Each chunk is validated, checked against existing emails with one query,
+    hashed in the import hash pool and written in a single transaction, so
+    memory stays bounded by the chunk size whatever the size of the file.
+    """
+
+    def __init__(
+        self, session: AsyncSession, tenant: Tenant, existing_users: int
+    ) -> None:
+        self.session = session
+        self.tenant = tenant
+        self.remaining = (
+            tenant.max_users - existing_users if tenant.max_users is not None else None
+        )
+        self.report = UserImportReport()
+
+    def fail(self, row: int, email: str | None, detail: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < settings.USER_IMPORT_MAX_REPORTED_ERRORS:
+            self.report.errors.append(
+                UserImportError(row=row, email=email, detail=detail)
+            )
+
+    def validate(self, row: int, record: Dict[str, Any]) -> UserImportRow | None:
+        try:
+            user_row = UserImportRow.model_validate(record)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            self.fail(row, record.get("email"), f"{field}: {error['msg']}")
+            return None
+        if user_row.role_type not in IMPORTABLE_ROLES:
+            self.fail(row, user_row.email, "role_type: Role can not be imported")
+            return None
+        if user_row.parent_email and user_row.role_type != RoleType.STUDENT:
+            self.fail(row, user_row.email, "parent_email: Only students have parents")
+            return None
+        return user_row
+
+    async def write_chunk(
+        self,
+        users: List[Dict[str, Any]],
+        roles: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+    ) -> set[uuid.UUID]:
+        inserted = await user_ops.bulk_create_users(
+            self.session, users, roles, relations
+        )
+        await self.session.commit()
+        return inserted
+
+    async def import_chunk(self, chunk: List[Tuple[int, UserImportRow]]) -> None:
+        rows: List[Tuple[int, UserImportRow]] = []
+        seen: set[str] = set()
+        for row, user_row in chunk:
+            if user_row.email in seen:
+                self.fail(row, user_row.email, "Duplicate email in import")
+                continue
+            seen.add(user_row.email)
+            rows.append((row, user_row))
+
+        maybe_existing = {
+            email for email in seen if user_email_filter.might_exist(email)
+        }
+        existing = set()
+        if maybe_existing:
+            existing = await user_ops.read_existing_emails(self.session, maybe_existing)
+            for _ in maybe_existing - existing:
+                user_email_filter.record_false_positive()
+        parent_emails = {
+            user_row.parent_email for _, user_row in rows if user_row.parent_email
+        }
+        parent_ids = {
+            user_row.email: uuid7()
+            for _, user_row in rows
+            if user_row.role_type == RoleType.PARENT and user_row.email not in existing
+        }
+        missing_parents = parent_emails - parent_ids.keys()
+        if missing_parents:
+            parent_ids.update(
+                await user_ops.read_tenant_parent_ids(
+                    self.session, self.tenant.id, missing_parents
+                )
+            )
+
+        # parents first, so their children can be linked in the same chunk
+        rows.sort(key=lambda item: item[1].role_type != RoleType.PARENT)
+        accepted: List[Tuple[int, UserImportRow]] = []
+        accepted_emails: set[str] = set()
+        for row, user_row in rows:
+            parent_email = user_row.parent_email
+            if user_row.email in existing:
+                self.fail(row, user_row.email, "User Exists")
+            elif parent_email and (
+                parent_email not in parent_ids
+                or (parent_email in seen and parent_email not in accepted_emails)
+            ):
+                self.fail(row, user_row.email, "parent_email: Parent not found")
+            elif self.remaining is not None and len(accepted) >= self.remaining:
+                self.fail(row, user_row.email, "Tenant user limit reached")
+            else:
+                accepted.append((row, user_row))
+                accepted_emails.add(user_row.email)
+        if not accepted:
+            return
+
+        password_hashes = await get_password_hashes_async(
+            [user_row.password for _, user_row in accepted]
+        )
+
+        now = datetime.utcnow()
+        users, roles, relations = [], [], []
+        user_ids = {}
+        for (_, user_row), password_hash in zip(accepted, password_hashes, strict=True):
+            user_id = parent_ids.get(user_row.email) or uuid7()
+            user_ids[user_row.email] = user_id
+            users.append(
+                {
+                    "id": user_id,
+                    "email": user_row.email,
+                    "password_hash": password_hash,
+                    "first_name": user_row.first_name,
+                    "last_name": user_row.last_name,
+                    "phone": user_row.phone,
+                    "tenant_id": self.tenant.id,
+                    "is_active": True,
+                    "email_verified": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            roles.append(
+                {
+                    "id": uuid7(),
+                    "user_id": user_id,
+                    "tenant_id": self.tenant.id,
+                    "role_type": user_row.role_type,
+                    "created_at": now,
+                }
+            )
+            if user_row.parent_email:
+                relations.append(
+                    {
+                        "id": uuid7(),
+                        "parent_id": parent_ids[user_row.parent_email],
+                        "student_id": user_id,
+                    }
+                )
+
+        inserted = await self.write_chunk(users, roles, relations)
+        for row, user_row in accepted:
+            if user_ids[user_row.email] in inserted:
+                user_email_filter.add(user_row.email)
+            else:
+                self.fail(row, user_row.email, "User Exists")
+        self.report.created += len(inserted)
+        if self.remaining is not None:
+            self.remaining -= len(inserted)
+        metrics.counter("user_import_rows_created_total").inc(len(inserted))
+
+
+async def import_users(
+    session: AsyncSession,
+    tenant: Tenant,
+    stream: AsyncIterator[bytes],
+    import_format: str,
+) -> UserImportReport:
+    existing_users = await tenant_ops.count_tenant_users(session, tenant.id)
+    user_import = UserImport(session, tenant, existing_users)
+
+    chunk: List[Tuple[int, UserImportRow]] = []
+    async for row, record, error in iter_records(iter_lines(stream), import_format):
+        if record is None:
+            user_import.fail(row, None, error or "Invalid row")
+            continue
+        user_row = user_import.validate(row, record)
+        if user_row is None:
+            continue
+        chunk.append((row, user_row))
+        if len(chunk) >= settings.USER_IMPORT_CHUNK_SIZE:
+            await user_import.import_chunk(chunk)
+            chunk = []
+    if chunk:
+        await user_import.import_chunk(chunk)
+
+    metrics.counter("user_import_rows_failed_total").inc(user_import.report.failed)
+    return user_import.report
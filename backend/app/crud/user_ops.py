@@ -1,72 +1,358 @@
 import uuid
-from typing import Any
+from typing import Any, Dict, Iterable, List, NamedTuple
 
-from sqlmodel import Session, select
+from sqlalchemy import bindparam, func, insert, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased, raiseload, selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.authentication import authorization_cache
+from app.core.db import execute_pipelined
+from app.core.unit_of_work import after_commit, insert_unless_conflict, insert_where
+from app.crud import token_ops
+from app.core.hash_pool import get_password_hash_async
 from app.models import (
+    ParentStudentRelation,
+    RoleType,
+    StudentProfile,
+    Tenant,
     User,
     UserCreate,
-    UserPublic,
     UserRoleCreate,
     UserRole,
     UserSubscriptionPlan,
     UserSubscriptionPlanCreate,
+    normalize_email,
 )
 
 
-def create_user(session: Session, user_create: UserCreate) -> User:
+class LoginContext(NamedTuple):
+    user: User
+    role: UserRole | None
+    tenant_is_active: bool | None
+
+
+async def create_user(
+    session: AsyncSession, user_create: UserCreate, password_hash: str | None = None
+) -> User | None:
+    """Insert a user; None when its email, TC number or Firebase UID is taken."""
+    if password_hash is None:
+        password_hash = await get_password_hash_async(user_create.password)
     db_object = User.model_validate(
-        user_create, update={"password_hash": get_password_hash(user_create.password)}
+        user_create, update={"password_hash": password_hash}
     )
 
-    session.add(db_object)
-    session.commit()
-    session.refresh(db_object)
+    if not await insert_unless_conflict(session, db_object):
+        return None
     return db_object
 
 
-def read_user_email(session: Session, email: str) -> User:
-    statement = select(User).where(User.email == email)
-    session_user = session.exec(statement).first()
-    return session_user
+async def create_user_with_role(
+    session: AsyncSession,
+    user_create: UserCreate,
+    role_in: UserRoleCreate,
+    password_hash: str | None = None,
+) -> User | None:
+    """Insert a user and its role in one round trip.
+
+    None when the email, TC number or Firebase UID is taken; the role is
+    only inserted if the user row was, so a conflict leaves nothing behind.
+    """
+    if password_hash is None:
+        password_hash = await get_password_hash_async(user_create.password)
+    db_object = User.model_validate(
+        user_create, update={"password_hash": password_hash}
+    )
+    db_role = UserRole.model_validate(
+        role_in, update={"user_id": db_object.id, "tenant_id": db_object.tenant_id}
+    )
+
+    user_inserted = select(User.id).where(User.id == db_object.id).exists()
+    users_inserted, _ = await execute_pipelined(
+        session,
+        pg_insert(User).values(db_object.model_dump()).on_conflict_do_nothing(),
+        insert_where(db_role, user_inserted),
+    )
+    if not users_inserted:
+        return None
+    return db_object
+
+
+# Statements on the login path are built once with bound parameters: each
+# execution then reuses the memoized cache key and compiled SQL, and the
+# identical SQL text lets psycopg prepare it on the server.
+_user_by_email = select(User).where(User.email == bindparam("email"))
+_role_by_user = select(UserRole).where(UserRole.user_id == bindparam("user_id"))
+_active_plan_by_user = select(UserSubscriptionPlan).where(
+    UserSubscriptionPlan.user_id == bindparam("user_id"),
+    UserSubscriptionPlan.is_active,
+)
+
+
+async def read_user_email(session: AsyncSession, email: str) -> User:
+    params = {"email": normalize_email(email)}
+    return (await session.exec(_user_by_email, params=params)).first()
+
+
+async def deactivate_user(session: AsyncSession, user_id: uuid.UUID) -> None:
+    statement = update(User).where(User.id == user_id).values(is_active=False)
+    await session.execute(statement)
+    # live access tokens stop working without waiting for them to expire
+    await token_ops.revoke_user_tokens(session, user_id=user_id)
 
 
-def create_user_role(session: Session, user: User, role_in: UserRoleCreate) -> UserRole:
+def create_user_role(
+    session: AsyncSession, user: User, role_in: UserRoleCreate
+) -> UserRole:
     db_object = UserRole.model_validate(
         role_in, update={"user_id": user.id, "tenant_id": user.tenant_id}
     )
 
     session.add(db_object)
-    session.commit()
-    session.refresh(db_object)
     return db_object
 
 
-def read_user_role(session: Session, user_id: uuid.UUID) -> UserRole:
-    statement = select(UserRole).where(UserRole.user_id == user_id)
-    session_userrole = session.exec(statement).first()
+async def read_user_role(session: AsyncSession, user_id: uuid.UUID) -> UserRole:
+    result = await session.exec(_role_by_user, params={"user_id": user_id})
+    session_userrole = result.first()
     return session_userrole
 
 
 def creat_user_sub_plan(
-    session: Session, user_id: uuid.UUID, user_in: UserSubscriptionPlanCreate
+    session: AsyncSession, user_id: uuid.UUID, user_in: UserSubscriptionPlanCreate
 ) -> UserSubscriptionPlan:
     db_object = UserSubscriptionPlan.model_validate(
         user_in, update={"user_id": user_id}
     )
 
     session.add(db_object)
-    session.commit()
-    session.refresh(db_object)
+    after_commit(session, lambda: authorization_cache.invalidate_user(user_id))
     return db_object
 
 
-def read_user_sub_plan_by_id(
-    session: Session, user_id: uuid.UUID
+def deactivate_user_sub_plans_statement(user_id: uuid.UUID) -> Any:
+    return (
+        update(UserSubscriptionPlan)
+        .where(
+            UserSubscriptionPlan.user_id == user_id,
+            UserSubscriptionPlan.is_active,
+        )
+        .values(is_active=False)
+    )
+
+
+async def deactivate_user_sub_plans(session: AsyncSession, user_id: uuid.UUID) -> None:
+    await session.execute(deactivate_user_sub_plans_statement(user_id))
+    after_commit(session, lambda: authorization_cache.invalidate_user(user_id))
+
+
+async def replace_user_sub_plan(
+    session: AsyncSession, user_id: uuid.UUID, user_in: UserSubscriptionPlanCreate
 ) -> UserSubscriptionPlan:
-    statement = select(UserSubscriptionPlan).where(
-        UserSubscriptionPlan.user_id == user_id, UserSubscriptionPlan.is_active == True
+    """Deactivate the user's active plans and insert a new one, in one round trip.
+
+    The plan is written with Core, so it is not added to the session.
+    """
+    db_object = UserSubscriptionPlan.model_validate(
+        user_in, update={"user_id": user_id}
     )
-    session_usersubplan = session.exec(statement).first()
+    await execute_pipelined(
+        session,
+        deactivate_user_sub_plans_statement(user_id),
+        insert(UserSubscriptionPlan).values(db_object.model_dump()),
+    )
+    after_commit(session, lambda: authorization_cache.invalidate_user(user_id))
+    return db_object
+
+
+async def read_user_sub_plan_by_id(
+    session: AsyncSession, user_id: uuid.UUID
+) -> UserSubscriptionPlan:
+    result = await session.exec(_active_plan_by_user, params={"user_id": user_id})
+    session_usersubplan = result.first()
     return session_usersubplan
+
+
+def login_context_statement() -> Any:
+    role_subq = (
+        select(UserRole)
+        .where(UserRole.user_id == User.id)
+        .order_by(UserRole.created_at)
+        .limit(1)
+        .lateral()
+    )
+    role = aliased(UserRole, role_subq)
+
+    return (
+        select(User, role, Tenant.is_active)
+        .select_from(User)
+        .outerjoin(role, true())
+        .outerjoin(Tenant, Tenant.id == User.tenant_id)
+    )
+
+
+_login_context_by_email = login_context_statement().where(
+    User.email == bindparam("email")
+)
+_login_context_by_id = login_context_statement().where(User.id == bindparam("user_id"))
+
+
+async def read_login_context(session: AsyncSession, email: str) -> LoginContext | None:
+    """Load the user, primary role and tenant status in a single round trip.
+
+    Subscription plans are resolved through the authorization cache, so the
+    common login path does not touch the plan tables at all.
+    """
+    params = {"email": normalize_email(email)}
+    result = await session.exec(_login_context_by_email, params=params)
+    row = result.first()
+    if row is None:
+        return None
+    return LoginContext(*row)
+
+
+async def read_login_context_by_id(
+    session: AsyncSession, user_id: uuid.UUID
+) -> LoginContext | None:
+    result = await session.exec(_login_context_by_id, params={"user_id": user_id})
+    row = result.first()
+    if row is None:
+        return None
+    return LoginContext(*row)
+
+
+# ?expand= names and the loaders behind them; each costs one more query
+# however many users are loaded
+USER_EXPANSIONS: Dict[str, Any] = {
+    "roles": selectinload(User.roles),
+    "profile": selectinload(User.student_profile),
+    "plans": selectinload(User.subscription_plans),
+    "children": selectinload(User.parent_relations).joinedload(
+        ParentStudentRelation.student
+    ),
+}
+
+
+def expand_users(statement: Any, expand: Iterable[str]) -> Any:
+    # relations that were not asked for raise instead of lazy loading per row
+    return statement.options(
+        *(USER_EXPANSIONS[name] for name in expand), raiseload("*")
+    )
+
+
+async def read_user_detail(
+    session: AsyncSession, user_id: uuid.UUID, expand: Iterable[str] = ()
+) -> User | None:
+    statement = expand_users(select(User).where(User.id == user_id), expand)
+    return (await session.exec(statement)).first()
+
+
+async def read_users_detail(
+    session: AsyncSession,
+    expand: Iterable[str] = (),
+    tenant_id: uuid.UUID | None = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> tuple[List[User], int]:
+    """A page of users with the requested relations, and the total count."""
+    criteria = [User.tenant_id == tenant_id] if tenant_id else []
+    count_statement = select(func.count()).select_from(User).where(*criteria)
+    count = (await session.exec(count_statement)).one()
+    statement = (
+        select(User)
+        .where(*criteria)
+        .order_by(User.created_at, User.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    users = (await session.exec(expand_users(statement, expand))).all()
+    return list(users), count
+
+
+async def read_students_by_profile(
+    session: AsyncSession,
+    school_lecture_program: Dict[str, Any] | None = None,
+    available_study_times: Dict[str, Any] | None = None,
+    tenant_id: uuid.UUID | None = None,
+    limit: int = 100,
+) -> List[User]:
+    """Students whose profile documents contain the given fragments.
+
+    ``{"monday": ["Mathematics"]}`` matches every program with Mathematics
+    on Monday, whatever else it holds. Matching is jsonb containment (@>),
+    which the GIN indexes on both columns serve.
+    """
+    criteria = [User.tenant_id == tenant_id] if tenant_id else []
+    if school_lecture_program:
+        criteria.append(
+            StudentProfile.school_lecture_program.contains(school_lecture_program)
+        )
+    if available_study_times:
+        criteria.append(
+            StudentProfile.available_study_times.contains(available_study_times)
+        )
+    statement = (
+        select(User)
+        .join(StudentProfile, StudentProfile.user_id == User.id)
+        .where(*criteria)
+        .limit(limit)
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def read_existing_emails(
+    session: AsyncSession, emails: Iterable[str]
+) -> set[str]:
+    statement = select(User.email).where(User.email.in_(list(emails)))
+    return set((await session.exec(statement)).all())
+
+
+async def read_tenant_parent_ids(
+    session: AsyncSession, tenant_id: uuid.UUID, emails: Iterable[str]
+) -> Dict[str, uuid.UUID]:
+    statement = (
+        select(User.email, User.id)
+        .join(UserRole, UserRole.user_id == User.id)
+        .where(
+            User.email.in_(list(emails)),
+            UserRole.tenant_id == tenant_id,
+            UserRole.role_type == RoleType.PARENT,
+        )
+    )
+    return {email: user_id for email, user_id in (await session.exec(statement)).all()}
+
+
+async def bulk_create_users(
+    session: AsyncSession,
+    users: List[Dict[str, Any]],
+    roles: List[Dict[str, Any]],
+    relations: List[Dict[str, Any]],
+) -> set[uuid.UUID]:
+    """Insert users with their roles and parent links.
+
+    Each table is written with multi-row INSERTs. Users that hit a unique
+    constraint are skipped, along with their roles and links;
+    the ids that were actually inserted are returned.
+    """
+    if not users:
+        return set()
+    statement = pg_insert(User).on_conflict_do_nothing().returning(User.id)
+    inserted = set((await session.scalars(statement, users)).all())
+    skipped = {user["id"] for user in users} - inserted
+
+    roles = [role for role in roles if role["user_id"] in inserted]
+    relations = [
+        relation
+        for relation in relations
+        if relation["student_id"] in inserted and relation["parent_id"] not in skipped
+    ]
+    # roles and links go out together; their results are not needed
+    statements = []
+    if roles:
+        statements.append((insert(UserRole), roles))
+    if relations:
+        statements.append((insert(ParentStudentRelation), relations))
+    if statements:
+        await execute_pipelined(session, *statements)
+    return inserted
@@ -0,0 +1,472 @@
+"""Generate a synthetic multi-tenant dataset for load and capacity tests.
+
+Tenants get a lognormal number of students, with teachers, a coach now and
+then, an admin, and families of one to three children with zero to two
+parents. Students have profiles with study times and a lecture program;
+tenants have a plan history and users outside any tenant have their own
+subscription plans. Recently active users hold a refresh token and some
+teachers have opened class codes. Keys are UUIDv7 stamped with each row's
+creation time, as if the rows had been created by the app over the years.
+
+Rows are generated per block (one tenant, or a group of families outside
+any tenant) from ``random.Random(f"{seed}:{block}")``, so the same seed
+gives the same rows whatever the number of workers. Workers load batches
+of blocks with COPY, one transaction per batch, and skip blocks that are
+already in the database, so an interrupted run can simply be restarted.
+
+Every user has one of a few precomputed password hashes; the password of
+a user is ``dataset_password(email)``.
+
+Run from ./backend/:
+
+    $ python -m app.generate_dataset --tenants 50000 --seed 1
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import psycopg
+
+from app.core.constants import FEATURE_FLAGS
+from app.core.db import engine
+from app.core.ids import uuid7_from
+from app.core.security import get_password_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# COPY column lists, in foreign-key order
+COLUMNS: dict[str, tuple[str, ...]] = {
+    "tenants": (
+        "id", "name", "max_users", "is_active", "is_payed", "city", "district",
+        "created_at", "updated_at",
+    ),
+    "tenant_subscription_plan": (
+        "id", "tenant_id", "special_subscription_plan", "subscription_fee",
+        "starts_at", "ends_at", "is_active",
+    ),
+    "users": (
+        "id", "email", "first_name", "last_name", "email_verified", "is_active",
+        "phone", "city", "tenant_id", "password_hash", "last_login", "created_at",
+        "updated_at",
+    ),
+    "user_roles": ("id", "user_id", "tenant_id", "role_type", "created_at"),
+    "user_subscription_plan": (
+        "id", "user_id", "sub_level", "setting_fee", "is_active", "starts_at",
+        "ends_at",
+    ),
+    "student_profiles": (
+        "id", "user_id", "grade_level", "school_name", "target_school",
+        "available_study_times", "school_lecture_program",
+    ),
+    "parent_student_relations": ("id", "parent_id", "student_id"),
+    "refresh_tokens": (
+        "id", "user_id", "token_hash", "access_token_jti", "access_token_expires_at",
+        "expires_at", "created_at",
+    ),
+    "class_codes": (
+        "id", "code_digest", "teacher_id", "tenant_id", "expires_at", "created_at",
+    ),
+    "class_code_students": ("class_code_id", "student_id"),
+}  # fmt: skip
+
+# generated timestamps are relative to this, not to the clock
+EPOCH = datetime(2025, 9, 1)
+PASSWORD_HASHES = 8
+FAMILIES_PER_BLOCK = 100
+
+CITIES = {
+    "Istanbul": ("Kadikoy", "Besiktas", "Uskudar", "Bakirkoy", "Pendik"),
+    "Ankara": ("Cankaya", "Kecioren", "Yenimahalle", "Etimesgut"),
+    "Izmir": ("Karsiyaka", "Bornova", "Buca", "Konak"),
+    "Bursa": ("Nilufer", "Osmangazi", "Yildirim"),
+    "Antalya": ("Muratpasa", "Konyaalti", "Kepez"),
+}
+# city weights, roughly by population
+CITY_WEIGHTS = (16, 6, 4, 3, 3)
+FIRST_NAMES = (
+    "Ahmet", "Ayse", "Mehmet", "Fatma", "Mustafa", "Zeynep", "Ali", "Elif",
+    "Emre", "Merve", "Can", "Ece", "Burak", "Selin", "Deniz", "Yusuf",
+)  # fmt: skip
+LAST_NAMES = (
+    "Yilmaz", "Kaya", "Demir", "Sahin", "Celik", "Yildiz", "Aydin", "Ozturk",
+    "Arslan", "Dogan", "Kilic", "Aslan", "Cetin", "Kara", "Koc", "Kurt",
+)  # fmt: skip
+SUBJECTS = (
+    "Mathematics", "Turkish", "Science", "Social Studies", "English",
+    "Physics", "Chemistry", "Biology", "History", "Geography",
+)  # fmt: skip
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday")
+TARGET_SCHOOLS = ("Anatolian High School", "Science High School", "University")
+# self-paying users: subscription level and its share
+USER_LEVELS = (("FREE", 50), ("GOLD", 30), ("PREMIUM", 15), ("PRO", 5))
+USER_LEVEL_FEES = {"FREE": None, "GOLD": "99.00", "PREMIUM": "199.00", "PRO": "399.00"}
+
+Rows = dict[str, list[tuple[Any, ...]]]
+
+
+@dataclass(frozen=True)
+class DatasetOptions:
+    seed: int
+    tenants: int
+    students_per_tenant: int
+    independent_families: int
+
+    @property
+    def blocks(self) -> int:
+        independent_blocks = math.ceil(self.independent_families / FAMILIES_PER_BLOCK)
+        return self.tenants + independent_blocks
+
+    def expected_users(self, block: int) -> float:
+        # students plus about one parent each
+        if block < self.tenants:
+            return self.students_per_tenant * 2.1
+        return FAMILIES_PER_BLOCK * 2.6
+
+
+def dataset_password(email: str) -> str:
+    """The password a generated user logs in with."""
+    number = int(email.split("@")[0].rsplit(".", 1)[1])
+    return f"load-test-{number % PASSWORD_HASHES}"
+
+
+def password_hashes() -> list[str]:
+    return [get_password_hash(f"load-test-{n}") for n in range(PASSWORD_HASHES)]
+
+
+class BlockGenerator:
+    """Rows of one block, drawn from a random stream seeded by the block."""
+
+    def __init__(self, options: DatasetOptions, block: int, hashes: list[str]) -> None:
+        self.options = options
+        self.block = block
+        self.hashes = hashes
+        self.rng = random.Random(f"{options.seed}:{block}")
+        self.rows: Rows = defaultdict(list)
+        self.users = 0
+        self.user_created: dict[uuid.UUID, datetime] = {}
+
+    def new_id(self, at: datetime) -> uuid.UUID:
+        # time-ordered like the keys the app creates, as of the row's creation
+        unix_ms = int(at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        return uuid7_from(unix_ms, self.rng.getrandbits(74))
+
+    def moment(self, after: datetime, days: float) -> datetime:
+        return min(after + timedelta(days=self.rng.uniform(0, days)), EPOCH)
+
+    def city(self) -> tuple[str, str]:
+        city = self.rng.choices(list(CITIES), CITY_WEIGHTS)[0]
+        return city, self.rng.choice(CITIES[city])
+
+    def user(
+        self, role: str, tenant_id: uuid.UUID | None, joined: datetime, city: str
+    ) -> uuid.UUID:
+        created_at = self.moment(joined, 120)
+        user_id = self.new_id(created_at)
+        self.user_created[user_id] = created_at
+        number = self.users
+        self.users += 1
+        active_recently = self.rng.random() < 0.7
+        last_login = (
+            EPOCH - timedelta(days=self.rng.uniform(0, 30)) if active_recently else None
+        )
+        self.rows["users"].append(
+            (
+                user_id,
+                f"{role.lower()}.{self.options.seed}.{self.block}.{number}@load.example",
+                self.rng.choice(FIRST_NAMES),
+                self.rng.choice(LAST_NAMES),
+                self.rng.random() < 0.9,
+                self.rng.random() < 0.97,
+                f"+905{self.rng.randrange(10**9):09d}",
+                city,
+                tenant_id,
+                self.hashes[number % PASSWORD_HASHES],
+                last_login,
+                created_at,
+                created_at,
+            )
+        )
+        self.rows["user_roles"].append(
+            (self.new_id(created_at), user_id, tenant_id, role, created_at)
+        )
+        if last_login:
+            self.rows["refresh_tokens"].append(
+                (
+                    self.new_id(last_login),
+                    user_id,
+                    f"{self.rng.getrandbits(256):064x}",
+                    self.new_id(last_login),
+                    last_login + timedelta(minutes=30),
+                    last_login + timedelta(days=7),
+                    last_login,
+                )
+            )
+        return user_id
+
+    def study_times(self) -> dict[str, Any]:
+        days = self.rng.sample(WEEKDAYS, self.rng.randint(2, 5))
+        times = {}
+        for day in sorted(days, key=WEEKDAYS.index):
+            start = self.rng.choice((15, 16, 17, 18, 19, 20))
+            times[day] = [{"start": f"{start}:00", "end": f"{start + 2}:00"}]
+        if self.rng.random() < 0.6:
+            times["saturday"] = [{"start": "10:00", "end": "13:00"}]
+        return times
+
+    def lecture_program(self, grade: int) -> dict[str, Any]:
+        # lessons per day; middle school adds sciences, high school the rest
+        subjects = SUBJECTS[: 4 if grade <= 4 else 5 if grade <= 8 else 10]
+        lessons = min(len(subjects), 4 + grade // 3)
+        return {day: self.rng.sample(subjects, lessons) for day in WEEKDAYS}
+
+    def student(
+        self, tenant_id: uuid.UUID | None, joined: datetime, city: str, district: str
+    ) -> uuid.UUID:
+        student_id = self.user("STUDENT", tenant_id, joined, city)
+        grade = self.rng.randint(1, 12)
+        self.rows["student_profiles"].append(
+            (
+                self.new_id(self.user_created[student_id]),
+                student_id,
+                str(grade),
+                f"{district} {'Primary' if grade <= 8 else 'High'} School",
+                self.rng.choice(TARGET_SCHOOLS) if grade >= 7 else None,
+                json.dumps(self.study_times()),
+                json.dumps(self.lecture_program(grade)),
+            )
+        )
+        return student_id
+
+    def family(
+        self, tenant_id: uuid.UUID | None, joined: datetime, city: str, district: str
+    ) -> list[uuid.UUID]:
+        children = self.rng.choices((1, 2, 3), (70, 25, 5))[0]
+        students = [
+            self.student(tenant_id, joined, city, district) for _ in range(children)
+        ]
+        parents = self.rng.choices((0, 1, 2), (10, 40, 50))[0]
+        for _ in range(parents):
+            parent_id = self.user("PARENT", tenant_id, joined, city)
+            self.rows["parent_student_relations"].extend(
+                (self.new_id(self.user_created[parent_id]), parent_id, student_id)
+                for student_id in students
+            )
+        return students
+
+    def tenant(self) -> None:
+        created_at = EPOCH - timedelta(days=self.rng.uniform(30, 1500))
+        tenant_id = self.new_id(created_at)
+        city, district = self.city()
+        # most institutions are small, a few are very large
+        mean = self.options.students_per_tenant
+        students = max(5, round(self.rng.lognormvariate(math.log(mean) - 0.32, 0.8)))
+        self.rows["tenants"].append(
+            (
+                tenant_id,
+                f"{district} Learning Center {self.block}",
+                students * 2,
+                self.rng.random() < 0.95,
+                self.rng.random() < 0.8,
+                city,
+                district,
+                created_at,
+                created_at,
+            )
+        )
+
+        # yearly plans up to the current one, which is the only active one
+        starts_at = created_at
+        renewals = (EPOCH - created_at).days // 365
+        for renewal in range(renewals + 1):
+            features = self.rng.sample(FEATURE_FLAGS, self.rng.randint(2, 6))
+            plan = {"features": features, "max_users": students * 2}
+            self.rows["tenant_subscription_plan"].append(
+                (
+                    self.new_id(starts_at),
+                    tenant_id,
+                    json.dumps(plan),
+                    Decimal(self.rng.randrange(20, 200) * students) / 10,
+                    starts_at,
+                    starts_at + timedelta(days=365),
+                    renewal == renewals,
+                )
+            )
+            starts_at += timedelta(days=365)
+
+        self.user("TENANT_ADMIN", tenant_id, created_at, city)
+        teachers = [
+            self.user("TEACHER", tenant_id, created_at, city)
+            for _ in range(max(1, students // 15))
+        ]
+        if self.rng.random() < 0.3:
+            self.user("COACH", tenant_id, created_at, city)
+        enrolled: list[uuid.UUID] = []
+        while len(enrolled) < students:
+            enrolled.extend(self.family(tenant_id, created_at, city, district))
+
+        # the class sessions teachers opened lately
+        for teacher_id in teachers:
+            for _ in range(self.rng.choices((0, 1, 2), (40, 40, 20))[0]):
+                opened_at = EPOCH - timedelta(days=self.rng.uniform(0, 14))
+                class_code_id = self.new_id(opened_at)
+                self.rows["class_codes"].append(
+                    (
+                        class_code_id,
+                        f"{self.rng.getrandbits(256):064x}",
+                        teacher_id,
+                        tenant_id,
+                        opened_at + timedelta(hours=2),
+                        opened_at,
+                    )
+                )
+                roster = self.rng.sample(enrolled, min(len(enrolled), 30))
+                self.rows["class_code_students"].extend(
+                    (class_code_id, student_id) for student_id in roster
+                )
+
+    def independent_families(self) -> None:
+        first = (self.block - self.options.tenants) * FAMILIES_PER_BLOCK
+        families = min(FAMILIES_PER_BLOCK, self.options.independent_families - first)
+        levels, weights = zip(*USER_LEVELS, strict=True)
+        for _ in range(families):
+            city, district = self.city()
+            joined = EPOCH - timedelta(days=self.rng.uniform(0, 730))
+            for student_id in self.family(None, joined, city, district):
+                level = self.rng.choices(levels, weights)[0]
+                starts_at = self.moment(joined, 120)
+                self.rows["user_subscription_plan"].append(
+                    (
+                        self.new_id(starts_at),
+                        student_id,
+                        level,
+                        USER_LEVEL_FEES[level],
+                        True,
+                        starts_at,
+                        None if level == "FREE" else starts_at + timedelta(days=365),
+                    )
+                )
+
+    def generate(self) -> Rows:
+        if self.block < self.options.tenants:
+            self.tenant()
+        else:
+            self.independent_families()
+        return self.rows
+
+
+def batches(options: DatasetOptions, batch_users: int) -> Iterator[range]:
+    """Block ranges of about ``batch_users`` users each."""
+    start = 0
+    while start < options.blocks:
+        end, users = start, 0.0
+        while end < options.blocks and (end == start or users < batch_users):
+            users += options.expected_users(end)
+            end += 1
+        yield range(start, end)
+        start = end
+
+
+_worker: dict[str, Any] = {}
+
+
+def init_worker(options: DatasetOptions, hashes: list[str], conninfo: str) -> None:
+    _worker.update(options=options, hashes=hashes, conninfo=conninfo)
+
+
+def load_batch(blocks: range) -> int:
+    """Generate and COPY one batch of blocks; returns the users inserted."""
+    if "connection" not in _worker:
+        _worker["connection"] = psycopg.connect(_worker["conninfo"])
+    connection: psycopg.Connection[Any] = _worker["connection"]
+
+    generated = [
+        BlockGenerator(_worker["options"], block, _worker["hashes"]).generate()
+        for block in blocks
+    ]
+    # the first user of a block marks it as loaded
+    markers = [rows["users"][0][0] for rows in generated]
+    with connection.transaction():
+        loaded = {
+            row[0]
+            for row in connection.execute(
+                "SELECT id FROM users WHERE id = ANY(%s)", (markers,)
+            )
+        }
+        pending = [rows for rows in generated if rows["users"][0][0] not in loaded]
+        with connection.cursor() as cursor:
+            for table, columns in COLUMNS.items():
+                statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+                with cursor.copy(statement) as copy:
+                    for rows in pending:
+                        for row in rows[table]:
+                            copy.write_row(row)
+    return sum(len(rows["users"]) for rows in pending)
+
+
+def generate(options: DatasetOptions, workers: int, batch_users: int) -> int:
+    hashes = password_hashes()
+    conninfo = engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+    started = time.perf_counter()
+    inserted = 0
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(options, hashes, conninfo)
+    ) as pool:
+        for users in pool.imap_unordered(load_batch, batches(options, batch_users)):
+            inserted += users
+            elapsed = time.perf_counter() - started
+            logger.info("%d users loaded, %.0f users/s", inserted, inserted / elapsed)
+
+    with psycopg.connect(conninfo, autocommit=True) as connection:
+        for table in COLUMNS:
+            connection.execute(f"ANALYZE {table}")
+    return inserted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--students-per-tenant", type=int, default=300)
+    parser.add_argument(
+        "--independent-families",
+        type=int,
+        default=None,
+        help="families outside any tenant; defaults to 20 per tenant",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-users", type=int, default=20_000)
+    args = parser.parse_args()
+
+    options = DatasetOptions(
+        seed=args.seed,
+        tenants=args.tenants,
+        students_per_tenant=args.students_per_tenant,
+        independent_families=(
+            args.tenants * 20
+            if args.independent_families is None
+            else args.independent_families
+        ),
+    )
+    logger.info("Generating %s with %d workers", options, args.workers)
+    inserted = generate(options, args.workers, args.batch_users)
+    logger.info("Inserted %d users", inserted)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import sentry_sdk
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.routing import APIRoute
+from sqlmodel import Session
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.authentication.rehash import password_rehash_queue
+from app.authentication.revocation import revoked_tokens, sync_revocations_forever
 from app.core.config import settings
+from app.core.db import async_engine, engine, pool_monitors, replicas
+from app.core.hash_pool import import_hash_pool, password_pool
+from app.crud.existence_filter import load_existence_filters
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,10 +25,46 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    def load_startup_state() -> None:
+        with Session(engine) as session:
+            revoked_tokens.load(session)
+            load_existence_filters(session)
+
+    await run_in_threadpool(load_startup_state)
+    await run_in_threadpool(password_pool.start)
+    await run_in_threadpool(import_hash_pool.start)
+    revocation_sync = asyncio.create_task(sync_revocations_forever(engine))
+    rehash_writer = asyncio.create_task(password_rehash_queue.run_forever(engine))
+    leak_watchers = [
+        asyncio.create_task(monitor.watch_leaks_forever())
+        for monitor in pool_monitors
+        if monitor.leak_seconds
+    ]
+    replica_checks = (
+        [asyncio.create_task(replicas.check_health_forever())]
+        if replicas.replicas
+        else []
+    )
+    yield
+    revocation_sync.cancel()
+    rehash_writer.cancel()
+    for task in leak_watchers + replica_checks:
+        task.cancel()
+    await password_rehash_queue.drain(engine)
+    password_pool.shutdown()
+    import_hash_pool.shutdown()
+    await async_engine.dispose()
+    await replicas.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
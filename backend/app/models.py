@@ -2,11 +2,22 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, List, Any, Dict
+from typing import Annotated, Optional, List, Any, Dict
 
-from pydantic import EmailStr
-from sqlmodel import Field, Relationship, SQLModel, JSON, Column
-from sqlalchemy import Text
+from pydantic import AfterValidator, EmailStr
+from sqlmodel import Field, Relationship, SQLModel, Column
+from sqlalchemy import CheckConstraint, Index, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.ids import uuid7
+
+
+def normalize_email(email: str) -> str:
+    """Emails are stored and looked up lowercased, so matching ignores case."""
+    return email.strip().lower()
+
+
+NormalizedEmail = Annotated[EmailStr, AfterValidator(normalize_email)]
 
 
 class SubscriptionLevel(str, Enum):
@@ -17,6 +28,13 @@ class SubscriptionLevel(str, Enum):
     SUPER_ADMIN = "super_admin"
 
 
+class TokenScope(str, Enum):
+    # everything the role allows
+    FULL = "full"
+    # a student signed in with a class code, for the length of the class
+    CLASS_SESSION = "class_session"
+
+
 class RoleType(str, Enum):
     STUDENT = "student"
     PARENT = "parent"
@@ -31,14 +49,14 @@ class TenantBase(SQLModel):
     max_users: Optional[int] = Field(default=None)
     mongodb_database_name: Optional[str] = Field(default=None, max_length=255)
     firebase_config: Optional[Dict[str, Any]] = Field(
-        default=None, sa_column=Column(JSON)
+        default=None, sa_column=Column(JSONB)
     )
     is_active: bool = Field(default=True)
     is_payed: bool = Field(default=False)
     city: Optional[str] = Field(default=None, max_length=255)
     district: Optional[str] = Field(default=None, max_length=255)
     address: Optional[str] = Field(default=None, sa_column=Column(Text))
-    VKN_code: Optional[str] = Field(default=None, max_length=10)
+    VKN_code: Optional[str] = Field(default=None, max_length=10, unique=True)
 
 
 class TenantCreate(TenantBase):
@@ -61,7 +79,7 @@ class TenantUpdate(SQLModel):
 class Tenant(TenantBase, table=True):
     __tablename__ = "tenants"
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -83,7 +101,7 @@ class TenantPublic(TenantBase):
 
 class TenantSubscriptionPlanBase(SQLModel):
     special_subscription_plan: Optional[Dict[str, Any]] = Field(
-        default=None, sa_column=Column(JSON)
+        default=None, sa_column=Column(JSONB)
     )
     subscription_fee: Optional[Decimal] = Field(
         default=None, max_digits=10, decimal_places=2
@@ -95,9 +113,25 @@ class TenantSubscriptionPlanBase(SQLModel):
 
 class TenantSubscriptionPlan(TenantSubscriptionPlanBase, table=True):
     __tablename__ = "tenant_subscription_plan"
+    __table_args__ = (
+        # a tenant has at most one active plan; also serves the login lookup
+        Index(
+            "uq_tenant_subscription_plan_active_tenant_id",
+            "tenant_id",
+            unique=True,
+            postgresql_where=text("is_active"),
+        ),
+        # jsonb_path_ops only serves @>, which is all plan lookups need
+        Index(
+            "ix_tenant_subscription_plan_special_subscription_plan",
+            "special_subscription_plan",
+            postgresql_using="gin",
+            postgresql_ops={"special_subscription_plan": "jsonb_path_ops"},
+        ),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    tenant_id: uuid.UUID = Field(foreign_key="tenants.id", nullable=False)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    tenant_id: uuid.UUID = Field(foreign_key="tenants.id", nullable=False, index=True)
 
     # Relationships
     tenant: Optional[Tenant] = Relationship(back_populates="subscription_plans")
@@ -108,7 +142,7 @@ class TenantSubscriptionPlanCreate(TenantBase):
 
 
 class UserBase(SQLModel):
-    email: EmailStr = Field(unique=True, index=True, max_length=255)
+    email: NormalizedEmail = Field(unique=True, index=True, max_length=255)
     first_name: Optional[str] = Field(default=None, max_length=255)
     last_name: Optional[str] = Field(default=None, max_length=255)
     turkish_identification_number: Optional[str] = Field(
@@ -130,7 +164,7 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(SQLModel):
-    email: Optional[EmailStr] = Field(default=None, max_length=255)
+    email: Optional[NormalizedEmail] = Field(default=None, max_length=255)
     password: Optional[str] = Field(default=None, min_length=8, max_length=40)
     tenant_id: Optional[uuid.UUID]
     first_name: Optional[str] = Field(default=None, max_length=255)
@@ -148,8 +182,14 @@ class UserUpdate(SQLModel):
 
 class User(UserBase, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        # tenant members in list order
+        Index("ix_users_tenant_id_created_at", "tenant_id", "created_at"),
+        # emails are unique ignoring case: ix_users_email over lowercase values
+        CheckConstraint("email = lower(email)", name="ck_users_email_lowercase"),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     tenant_id: Optional[uuid.UUID] = Field(foreign_key="tenants.id", nullable=True)
     password_hash: str = Field(max_length=255)
     last_login: Optional[datetime] = Field(default=None)
@@ -202,14 +242,22 @@ class UserSubscriptionPlanCreate(UserSubscriptionPlanBase):
 
 class UserSubscriptionPlan(UserSubscriptionPlanBase, table=True):
     __tablename__ = "user_subscription_plan"
+    __table_args__ = (
+        Index("ix_user_subscription_plan_user_id_is_active", "user_id", "is_active"),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
 
     # Relationships
     user: Optional[User] = Relationship(back_populates="subscription_plans")
 
 
+class UserSubscriptionPlanPublic(UserSubscriptionPlanBase):
+    id: uuid.UUID
+    user_id: uuid.UUID
+
+
 # User Roles Models
 class UserRoleBase(SQLModel):
     role_type: RoleType = Field(max_length=50)
@@ -222,8 +270,13 @@ class UserRoleCreate(UserRoleBase):
 
 class UserRole(UserRoleBase, table=True):
     __tablename__ = "user_roles"
+    __table_args__ = (
+        # the login lookup takes a user's first role
+        Index("ix_user_roles_user_id_created_at", "user_id", "created_at"),
+        Index("ix_user_roles_tenant_id_role_type", "tenant_id", "role_type"),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
     tenant_id: Optional[uuid.UUID] = Field(foreign_key="tenants.id", nullable=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -246,10 +299,10 @@ class StudentProfileBase(SQLModel):
     school_name: Optional[str] = Field(default=None, max_length=255)
     target_school: Optional[str] = Field(default=None, max_length=255)
     available_study_times: Optional[Dict[str, Any]] = Field(
-        default=None, sa_column=Column(JSON)
+        default=None, sa_column=Column(JSONB)
     )
     school_lecture_program: Optional[Dict[str, Any]] = Field(
-        default=None, sa_column=Column(JSON)
+        default=None, sa_column=Column(JSONB)
     )
 
 
@@ -259,9 +312,24 @@ class StudentProfileCreate(StudentProfileBase):
 
 class StudentProfile(StudentProfileBase, table=True):
     __tablename__ = "student_profiles"
+    __table_args__ = (
+        # containment (@>) searches, e.g. who has Mathematics on Monday
+        Index(
+            "ix_student_profiles_school_lecture_program",
+            "school_lecture_program",
+            postgresql_using="gin",
+            postgresql_ops={"school_lecture_program": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_student_profiles_available_study_times",
+            "available_study_times",
+            postgresql_using="gin",
+            postgresql_ops={"available_study_times": "jsonb_path_ops"},
+        ),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="users.id", nullable=False, index=True)
 
     # Relationships
     user: Optional[User] = Relationship(back_populates="student_profile")
@@ -284,10 +352,17 @@ class ParentStudentRelationCreate(ParentStudentRelationBase):
 
 class ParentStudentRelation(ParentStudentRelationBase, table=True):
     __tablename__ = "parent_student_relations"
+    __table_args__ = (
+        Index(
+            "ix_parent_student_relations_parent_id_student_id",
+            "parent_id",
+            "student_id",
+        ),
+    )
 
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     parent_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
-    student_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
+    student_id: uuid.UUID = Field(foreign_key="users.id", nullable=False, index=True)
 
     # Relationships
     parent: Optional[User] = Relationship(
@@ -317,6 +392,19 @@ class UsersPublic(SQLModel):
     count: int
 
 
+class UserDetailPublic(UserPublic):
+    # each one is present only when requested through ?expand=
+    roles: Optional[List[UserRolePublic]] = None
+    profile: Optional[StudentProfilePublic] = None
+    plans: Optional[List[UserSubscriptionPlanPublic]] = None
+    children: Optional[List[UserPublic]] = None
+
+
+class UserDetailsPublic(SQLModel):
+    data: List[UserDetailPublic]
+    count: int
+
+
 class UserRolesPublic(SQLModel):
     data: List[UserRolePublic]
     count: int
@@ -332,6 +420,132 @@ class ParentStudentRelationsPublic(SQLModel):
     count: int
 
 
+# Refresh Token Models
+class RefreshToken(SQLModel, table=True):
+    __tablename__ = "refresh_tokens"
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="users.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    token_hash: str = Field(max_length=64, unique=True, index=True)
+    # access token minted together with this refresh token, revoked with it
+    access_token_jti: uuid.UUID
+    access_token_expires_at: datetime
+    expires_at: datetime
+    revoked_at: Optional[datetime] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RevokedToken(SQLModel, table=True):
+    __tablename__ = "revoked_tokens"
+
+    jti: uuid.UUID = Field(primary_key=True)
+    expires_at: datetime = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class ClassCodeToken(SQLModel, table=True):
+    """An access token minted through a class code.
+
+    Class-code tokens have no refresh token to hang their JTI on, so they
+    are recorded here for revocation until they expire.
+    """
+
+    __tablename__ = "class_code_tokens"
+
+    jti: uuid.UUID = Field(primary_key=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="users.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    expires_at: datetime
+
+
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
+
+
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+# Class Code Models
+class ClassCode(SQLModel, table=True):
+    __tablename__ = "class_codes"
+
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
+    # HMAC of the short code; the code itself is only shown to the teacher
+    code_digest: str = Field(max_length=64, unique=True, index=True)
+    teacher_id: uuid.UUID = Field(
+        foreign_key="users.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    tenant_id: uuid.UUID = Field(
+        foreign_key="tenants.id", nullable=False, ondelete="CASCADE"
+    )
+    expires_at: datetime
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ClassCodeStudent(SQLModel, table=True):
+    __tablename__ = "class_code_students"
+
+    class_code_id: uuid.UUID = Field(
+        foreign_key="class_codes.id", primary_key=True, ondelete="CASCADE"
+    )
+    student_id: uuid.UUID = Field(
+        foreign_key="users.id", primary_key=True, ondelete="CASCADE", index=True
+    )
+
+
+class ClassCodeCreate(SQLModel):
+    student_ids: List[uuid.UUID] = Field(min_length=1, max_length=200)
+    expire_minutes: Optional[int] = Field(default=None, gt=0, le=24 * 60)
+
+
+class ClassCodePublic(SQLModel):
+    id: uuid.UUID
+    code: str
+    expires_at: datetime
+    student_count: int
+
+
+class ClassCodeLogin(SQLModel):
+    email: NormalizedEmail
+    code: str = Field(max_length=32)
+
+
+class RosterToken(SQLModel):
+    user_id: uuid.UUID
+    access_token: str
+    token_type: str = "bearer"
+
+
+class RosterTokens(SQLModel):
+    data: List[RosterToken]
+    count: int
+
+
+# Bulk Import Models
+class UserImportRow(SQLModel):
+    email: NormalizedEmail = Field(max_length=255)
+    password: str = Field(min_length=8, max_length=40)
+    role_type: RoleType = Field(default=RoleType.STUDENT)
+    first_name: Optional[str] = Field(default=None, max_length=255)
+    last_name: Optional[str] = Field(default=None, max_length=255)
+    phone: Optional[str] = Field(default=None, max_length=20)
+    # student rows only; the parent must exist or come earlier in the file
+    parent_email: Optional[NormalizedEmail] = Field(default=None, max_length=255)
+
+
+class UserImportError(SQLModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+
+class UserImportReport(SQLModel):
+    created: int = 0
+    failed: int = 0
+    errors: List[UserImportError] = []
@@ -0,0 +1,161 @@
+"""Requests/sec of a single worker on the sync vs. async database path.
+
+Each variant is served by uvicorn with one worker and driven by
+``--concurrency`` simultaneous clients. Every request runs the login lookup
+query; ``--latency-ms`` adds a server-side ``pg_sleep`` to stand in for a
+slower or more distant database.
+
+Run from ./backend/:
+
+    $ python -m benchmarks.async_db --concurrency 256 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.api.dependencies.db_deps import AsyncSessionDep, SessionDep
+from app.core.config import settings
+from app.crud.user_ops import login_context_statement, read_login_context
+from app.models import User
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+sync_app = FastAPI()
+async_app = FastAPI()
+
+
+@sync_app.get("/login-context")
+def sync_login_context(session: SessionDep, latency_ms: float = 0) -> bool:
+    if latency_ms:
+        session.exec(select(func.pg_sleep(latency_ms / 1000)))
+    statement = login_context_statement().where(User.email == settings.FIRST_SUPERUSER)
+    return session.exec(statement).first() is not None
+
+
+@async_app.get("/login-context")
+async def async_login_context(session: AsyncSessionDep, latency_ms: float = 0) -> bool:
+    if latency_ms:
+        await session.exec(select(func.pg_sleep(latency_ms / 1000)))
+    return await read_login_context(session, settings.FIRST_SUPERUSER) is not None
+
+
+async def wait_until_ready(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def drive(
+    url: str, concurrency: int, duration: float, timeout: float
+) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+        async def client_loop() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    r = await client.get(url)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if r.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run_variant(name: str, args: argparse.Namespace) -> None:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            f"benchmarks.async_db:{name}_app",
+            "--port",
+            str(args.port),
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ]
+    )
+    url = f"http://127.0.0.1:{args.port}/login-context?latency_ms={args.latency_ms}"
+    try:
+        asyncio.run(wait_until_ready(url))
+        asyncio.run(drive(url, args.concurrency, args.warmup, args.timeout))
+        latencies, errors = asyncio.run(
+            drive(url, args.concurrency, args.duration, args.timeout)
+        )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # a stalled worker does not finish its graceful shutdown
+            server.kill()
+            server.wait()
+
+    if len(latencies) < 2:
+        logger.info("%-6s no successful requests (%d errors)", name, errors)
+        return
+    p50, p99 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 98))
+    logger.info(
+        "%-6s %8.0f req/s  p50 %7.1f ms  p99 %7.1f ms  errors %d",
+        name,
+        len(latencies) / args.duration,
+        p50 * 1000,
+        p99 * 1000,
+        errors,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logger.info(
+        "1 worker, %d concurrent clients, %.0f ms added DB latency",
+        args.concurrency,
+        args.latency_ms,
+    )
+    for name in ("sync", "async"):
+        run_variant(name, args)
+
+
+if __name__ == "__main__":
+    main()
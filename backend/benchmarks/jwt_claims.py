@@ -0,0 +1,93 @@
+"""Compare token size and decode time of embedded vs. referenced plan claims.
+
+Run from ./backend/:
+
+    $ python -m benchmarks.jwt_claims
+"""
+
+import logging
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+import jwt
+
+from app.core.config import settings
+from app.core.constants import SUBSCRIPTION_FEATURES
+from app.core.security import ALGORITHM, create_jwt_payload
+from app.models import RoleType, SubscriptionLevel
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+ROUNDS = 20_000
+
+TENANT_PLAN = {
+    "max_users": 2500,
+    "storage_limit_gb": 500,
+    "support": "priority_email",
+    "features": ["advanced_dashboard", "team_collaboration", "analytics"],
+    "modules": {"exams": True, "homework": True, "live_lessons": False},
+}
+
+
+def embedded_payload(subscription_level: SubscriptionLevel | Dict[str, Any]) -> Any:
+    # Claims as they were minted before plan references were introduced.
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    plan = (
+        subscription_level
+        if isinstance(subscription_level, dict)
+        else SUBSCRIPTION_FEATURES[subscription_level]
+    )
+    return {
+        "sub": str(uuid.uuid4()),
+        "tenant_id": str(uuid.uuid4()),
+        "role": RoleType.STUDENT,
+        "sub_plan": plan,
+        "exp": int(expire.timestamp()),
+        "iat": int(datetime.now(timezone.utc).timestamp()),
+    }
+
+
+def referenced_payload(subscription_level: SubscriptionLevel | Dict[str, Any]) -> Any:
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    return create_jwt_payload(
+        user_id=uuid.uuid4(),
+        tenant_id=uuid.uuid4(),
+        role=RoleType.STUDENT,
+        subscription_level=subscription_level,
+        expire_timestamp=int(expire.timestamp()),
+    )
+
+
+def measure(label: str, payload: Any) -> None:
+    token = jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+    encode_s = timeit.timeit(
+        lambda: jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM),
+        number=ROUNDS,
+    )
+    decode_s = timeit.timeit(
+        lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM]),
+        number=ROUNDS,
+    )
+    logger.info(
+        "%-38s %5d bytes  encode %6.2f us  decode %6.2f us",
+        label,
+        len(token),
+        encode_s / ROUNDS * 1e6,
+        decode_s / ROUNDS * 1e6,
+    )
+
+
+def main() -> None:
+    for name, level in (
+        ("premium", SubscriptionLevel.PREMIUM),
+        ("tenant special plan", TENANT_PLAN),
+    ):
+        measure(f"{name} (embedded)", embedded_payload(level))
+        measure(f"{name} (plan reference)", referenced_payload(level))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Latency of the login lookups with and without statement caching.
+
+Runs the queries a login issues (login context, role and both active-plan
+lookups) back to back on one connection, under three engine setups:
+
+- ``uncached``: no compiled cache, no server-side prepared statements
+- ``compiled``: SQLAlchemy's compiled cache only
+- ``prepared``: compiled cache plus psycopg prepared statements
+
+Run from ./backend/:
+
+    $ python -m benchmarks.prepared_statements --rounds 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.db_statements import StatementCacheMonitor
+from app.crud import tenant_ops, user_ops
+from app.models import User
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+VARIANTS: dict[str, dict[str, Any]] = {
+    "uncached": {"query_cache_size": 0, "prepare_threshold": None},
+    "compiled": {
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+        "prepare_threshold": None,
+    },
+    "prepared": {
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+        "prepare_threshold": settings.DB_PREPARE_THRESHOLD or 5,
+    },
+}
+
+
+async def pick_email() -> str:
+    # a tenant member runs every lookup, including the tenant plan
+    statement = select(User.email).order_by(User.tenant_id.is_(None)).limit(1)
+    async with AsyncSession(async_engine) as session:
+        email = (await session.exec(statement)).first()
+    await async_engine.dispose()
+    if email is None:
+        raise SystemExit("no users to log in as; run app.initial_data first")
+    return email
+
+
+async def login_lookups(session: AsyncSession, email: str) -> None:
+    context = await user_ops.read_login_context(session, email)
+    assert context is not None
+    user = context.user
+    await user_ops.read_user_role(session, user.id)
+    await user_ops.read_user_sub_plan_by_id(session, user.id)
+    if user.tenant_id:
+        await tenant_ops.read_tenant_sub_plan_by_id(session, user.tenant_id)
+
+
+async def run_variant(name: str, email: str, rounds: int, warmup: int) -> None:
+    options = VARIANTS[name]
+    engine = create_async_engine(
+        async_engine.url,
+        pool_size=1,
+        query_cache_size=options["query_cache_size"],
+        connect_args={"prepare_threshold": options["prepare_threshold"]},
+    )
+    monitor = StatementCacheMonitor(engine.sync_engine, f"bench_{name}")
+    latencies: list[float] = []
+    async with AsyncSession(engine) as session:
+        for i in range(warmup + rounds):
+            started = time.perf_counter()
+            await login_lookups(session, email)
+            if i >= warmup:
+                latencies.append(time.perf_counter() - started)
+            # like a request: fresh identity map, connection back to the pool
+            await session.close()
+    await engine.dispose()
+
+    p50, p99 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 98))
+    logger.info(
+        "%-9s mean %6.0f us  p50 %6.0f us  p99 %6.0f us  cache hit ratio %.2f",
+        name,
+        statistics.fmean(latencies) * 1e6,
+        p50 * 1e6,
+        p99 * 1e6,
+        monitor.hit_ratio.value,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--email", help="user to look up; defaults to a tenant member")
+    args = parser.parse_args()
+
+    email = args.email or asyncio.run(pick_email())
+    logger.info("%d logins per variant as %s, one connection", args.rounds, email)
+    for name in VARIANTS:
+        asyncio.run(run_variant(name, email, args.rounds, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Insert throughput and index size with random (v4) vs. time-ordered (v7) keys.
+
+Copies the ``users`` and ``user_roles`` rows of a synthetic dataset (see
+app/generate_dataset.py) into scratch tables shaped like the real ones,
+indexes included, giving every row a fresh key at insert time the way the
+app does. Rows go in with COPY, ``--batch-users`` users per transaction,
+so index maintenance is most of the work being measured. The scratch
+tables are dropped afterwards.
+
+Random keys touch a random leaf page of the primary key (and of every
+index on a key column) per row and leave pages half full after splits;
+v7 keys append to the rightmost leaf. The gap grows once the indexes no
+longer fit in shared_buffers, so try a few ``--tenants`` sizes.
+
+Run from ./backend/:
+
+    $ python -m benchmarks.uuid_keys --tenants 500
+"""
+
+import argparse
+import logging
+import random
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import psycopg
+
+from app.core.db import engine
+from app.core.ids import uuid7
+from app.generate_dataset import (
+    COLUMNS,
+    PASSWORD_HASHES,
+    BlockGenerator,
+    DatasetOptions,
+    Rows,
+)
+
+# app.generate_dataset configures logging on import
+logging.basicConfig(level=logging.INFO, format="%(message)s", force=True)
+logger = logging.getLogger(__name__)
+
+KEYS: dict[str, Callable[[], uuid.UUID]] = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+TABLES = ("users", "user_roles")
+
+
+def generate_blocks(options: DatasetOptions) -> list[Rows]:
+    hashes = [""] * PASSWORD_HASHES
+    return [
+        BlockGenerator(options, block, hashes).generate()
+        for block in range(options.blocks)
+    ]
+
+
+def rekey(rows: Rows, new_key: Callable[[], uuid.UUID]) -> Rows:
+    """The block's users and roles with fresh keys, references kept intact."""
+    user_ids = {row[0]: new_key() for row in rows["users"]}
+    return {
+        "users": [(user_ids[row[0]], *row[1:]) for row in rows["users"]],
+        "user_roles": [
+            (new_key(), user_ids[row[1]], *row[2:]) for row in rows["user_roles"]
+        ],
+    }
+
+
+def index_sizes(connection: psycopg.Connection[Any], table: str) -> dict[str, int]:
+    rows = connection.execute(
+        "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) "
+        "FROM pg_index WHERE indrelid = %s::regclass",
+        (table,),
+    )
+    return dict(rows.fetchall())
+
+
+def copy_batch(
+    connection: psycopg.Connection[Any], scratch: dict[str, str], batch: list[Rows]
+) -> None:
+    with connection.cursor() as cursor:
+        for table, copy_table in scratch.items():
+            columns = ", ".join(COLUMNS[table])
+            with cursor.copy(f"COPY {copy_table} ({columns}) FROM STDIN") as copy:
+                for rows in batch:
+                    for row in rows[table]:
+                        copy.write_row(row)
+    connection.commit()
+
+
+def run_variant(
+    connection: psycopg.Connection[Any],
+    name: str,
+    blocks: list[Rows],
+    batch_users: int,
+) -> None:
+    # keys are drawn in insert order, as the app would draw them
+    batches: list[list[Rows]] = [[]]
+    for block in blocks:
+        if sum(len(rows["users"]) for rows in batches[-1]) >= batch_users:
+            batches.append([])
+        batches[-1].append(rekey(block, KEYS[name]))
+    users = sum(len(rows["users"]) for rows in blocks)
+
+    scratch = {table: f"bench_{table}_{name}" for table in TABLES}
+    for table, copy_table in scratch.items():
+        connection.execute(f"DROP TABLE IF EXISTS {copy_table}")
+        connection.execute(
+            f"CREATE TABLE {copy_table} (LIKE {table} INCLUDING INDEXES)"
+        )
+    connection.commit()
+    try:
+        started = time.perf_counter()
+        for batch in batches:
+            copy_batch(connection, scratch, batch)
+        elapsed = time.perf_counter() - started
+
+        logger.info("%s: %.1f s, %.0f users/s", name, elapsed, users / elapsed)
+        for copy_table in scratch.values():
+            for index, size in sorted(index_sizes(connection, copy_table).items()):
+                logger.info("  %-55s %6.1f MB", index, size / 2**20)
+    finally:
+        connection.rollback()
+        for copy_table in scratch.values():
+            connection.execute(f"DROP TABLE IF EXISTS {copy_table}")
+        connection.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--students-per-tenant", type=int, default=200)
+    parser.add_argument("--batch-users", type=int, default=1000)
+    args = parser.parse_args()
+
+    options = DatasetOptions(
+        seed=random.randrange(10**9),
+        tenants=args.tenants,
+        students_per_tenant=args.students_per_tenant,
+        independent_families=args.tenants * 20,
+    )
+    blocks = generate_blocks(options)
+    logger.info(
+        "%d users per variant, %d per transaction",
+        sum(len(rows["users"]) for rows in blocks),
+        args.batch_users,
+    )
+    conninfo = engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+    with psycopg.connect(conninfo) as connection:
+        for name in KEYS:
+            run_variant(connection, name, blocks, args.batch_users)
+
+
+if __name__ == "__main__":
+    main()
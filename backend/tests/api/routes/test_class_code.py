@@ -0,0 +1,199 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.hash_pool import password_pool
+from app.crud import tenant_ops, user_ops
+from app.models import RoleType, TenantSubscriptionPlan, TokenScope, User
+from tests.utils.user import add_tenant, create_user, login_headers
+from tests.utils.utils import run_in_session
+
+
+def create_tenant_with_plan() -> uuid.UUID:
+    async def create(session: AsyncSession) -> uuid.UUID:
+        tenant = await add_tenant(session)
+        session.add(
+            TenantSubscriptionPlan(
+                tenant_id=tenant.id,
+                special_subscription_plan={"features": ["basic_dashboard"]},
+            )
+        )
+        return tenant.id
+
+    return run_in_session(create)
+
+
+@pytest.fixture(scope="module")
+def tenant_id() -> uuid.UUID:
+    return create_tenant_with_plan()
+
+
+def start_class(
+    client: TestClient, tenant_id: uuid.UUID, students: list[User]
+) -> dict[str, str]:
+    teacher, password = create_user(RoleType.TEACHER, tenant_id)
+    headers = login_headers(client, teacher, password)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/class-codes",
+        headers=headers,
+        json={"student_ids": [str(student.id) for student in students]},
+    )
+    assert r.status_code == 200
+    assert r.json()["student_count"] == len(students)
+    return {**r.json(), **headers}
+
+
+def test_student_redeems_class_code_without_bcrypt(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    student, _ = create_user(RoleType.STUDENT, tenant_id)
+    class_code = start_class(backend_client, tenant_id, [student])
+
+    password_work_before = password_pool.run_seconds.snapshot()["count"]
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-code",
+        json={"email": student.email, "code": class_code["code"].lower()},
+    )
+    assert r.status_code == 200
+    assert r.json()["refresh_token"] is None
+    assert password_pool.run_seconds.snapshot()["count"] == password_work_before
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {r.json()['access_token']}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["user_id"] == str(student.id)
+    assert r.json()["role"] == RoleType.STUDENT
+    assert r.json()["scope"] == TokenScope.CLASS_SESSION
+
+
+def test_class_code_rejects_students_off_the_roster(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    student, _ = create_user(RoleType.STUDENT, tenant_id)
+    outsider, _ = create_user(RoleType.STUDENT, tenant_id)
+    class_code = start_class(backend_client, tenant_id, [student])
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-code",
+        json={"email": outsider.email, "code": class_code["code"]},
+    )
+    assert r.status_code == 401
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-code",
+        json={"email": student.email, "code": "WRONG234"},
+    )
+    assert r.status_code == 401
+
+
+def test_class_code_requires_students_of_the_tenant(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    teacher, password = create_user(RoleType.TEACHER, tenant_id)
+    other_student, _ = create_user(RoleType.STUDENT)
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-codes",
+        headers=login_headers(backend_client, teacher, password),
+        json={"student_ids": [str(other_student.id)]},
+    )
+    assert r.status_code == 400
+
+    student, password = create_user(RoleType.STUDENT, tenant_id)
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-codes",
+        headers=login_headers(backend_client, student, password),
+        json={"student_ids": [str(student.id)]},
+    )
+    assert r.status_code == 403
+
+
+def test_teacher_mints_roster_tokens_in_one_call(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    students = [create_user(RoleType.STUDENT, tenant_id)[0] for _ in range(3)]
+    class_code = start_class(backend_client, tenant_id, students)
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/class-codes/{class_code['id']}/tokens",
+        headers={"Authorization": class_code["Authorization"]},
+    )
+    assert r.status_code == 200
+    assert r.json()["count"] == 3
+    assert {token["user_id"] for token in r.json()["data"]} == {
+        str(student.id) for student in students
+    }
+
+
+def roster_headers(
+    client: TestClient, tenant_id: uuid.UUID, students: list[User]
+) -> dict[uuid.UUID, dict[str, str]]:
+    class_code = start_class(client, tenant_id, students)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/class-codes/{class_code['id']}/tokens",
+        headers={"Authorization": class_code["Authorization"]},
+    )
+    assert r.status_code == 200
+    return {
+        uuid.UUID(token["user_id"]): {
+            "Authorization": f"Bearer {token['access_token']}"
+        }
+        for token in r.json()["data"]
+    }
+
+
+def test_class_session_token_only_reaches_class_routes(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    student, _ = create_user(RoleType.STUDENT, tenant_id)
+    headers = roster_headers(backend_client, tenant_id, [student])[student.id]
+
+    r = backend_client.get(f"{settings.API_V1_STR}/users/{student.id}", headers=headers)
+    assert r.status_code == 200
+    for method, path in [
+        ("GET", "/users/"),
+        ("GET", "/users/me"),
+        ("POST", "/login/class-codes"),
+    ]:
+        r = backend_client.request(
+            method,
+            f"{settings.API_V1_STR}{path}",
+            headers=headers,
+            json={"student_ids": [str(student.id)]},
+        )
+        assert r.status_code == 403
+        assert r.json()["detail"] == "Not available during a class session"
+
+
+def is_accepted(client: TestClient, headers: dict[str, str]) -> bool:
+    r = client.post(f"{settings.API_V1_STR}/login/test-token", headers=headers)
+    return r.status_code == 200
+
+
+def test_revoking_user_tokens_reaches_class_code_tokens(
+    backend_client: TestClient, tenant_id: uuid.UUID
+) -> None:
+    students = [create_user(RoleType.STUDENT, tenant_id)[0] for _ in range(2)]
+    headers = roster_headers(backend_client, tenant_id, students)
+    assert all(is_accepted(backend_client, h) for h in headers.values())
+
+    run_in_session(lambda session: user_ops.deactivate_user(session, students[0].id))
+
+    assert not is_accepted(backend_client, headers[students[0].id])
+    assert is_accepted(backend_client, headers[students[1].id])
+
+
+def test_revoking_tenant_tokens_reaches_class_code_tokens(
+    backend_client: TestClient,
+) -> None:
+    tenant_id = create_tenant_with_plan()
+    student, _ = create_user(RoleType.STUDENT, tenant_id)
+    headers = roster_headers(backend_client, tenant_id, [student])[student.id]
+    assert is_accepted(backend_client, headers)
+
+    run_in_session(lambda session: tenant_ops.deactivate_tenant(session, tenant_id))
+
+    assert not is_accepted(backend_client, headers)
@@ -0,0 +1,99 @@
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.metrics import metrics
+from tests.utils.utils import count_queries, random_email, random_lower_string
+
+
+@contextmanager
+def count_commits() -> Iterator[list[Any]]:
+    commits: list[Any] = []
+
+    def on_commit(conn: Any) -> None:
+        commits.append(conn)
+
+    event.listen(async_engine.sync_engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(async_engine.sync_engine, "commit", on_commit)
+
+
+round_trips = metrics.histogram("db_route_users-create_user_round_trips")
+
+
+def create_user_body(email: str) -> dict[str, Any]:
+    return {
+        "user_in": {
+            "email": email,
+            "password": random_lower_string(),
+            "tenant_id": None,
+        },
+        "role_in": {"role_type": "teacher", "user_id": None, "tenant_id": None},
+    }
+
+
+def test_create_user_flushes_and_commits_once(backend_client: TestClient) -> None:
+    email = random_email()
+    trips_before = round_trips.snapshot()
+    with (
+        count_commits() as commits,
+        count_queries(async_engine.sync_engine) as statements,
+    ):
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/users/", json=create_user_body(email)
+        )
+    assert r.status_code == 200
+    assert r.json()["email"] == email
+
+    # no pre-read and no refresh SELECTs
+    assert [s.split("(")[0].strip() for s in statements] == [
+        "INSERT INTO users",
+        "INSERT INTO user_roles",
+    ]
+    assert len(commits) == 1
+    # both INSERTs in one pipeline, then COMMIT
+    assert round_trips.snapshot()["count"] == trips_before["count"] + 1
+    assert round_trips.snapshot()["sum"] == trips_before["sum"] + 2
+
+
+def test_create_user_rejects_duplicate_without_pre_read(
+    backend_client: TestClient,
+) -> None:
+    body = create_user_body(random_email())
+    r = backend_client.post(f"{settings.API_V1_STR}/users/", json=body)
+    assert r.status_code == 200
+    with (
+        count_commits() as commits,
+        count_queries(async_engine.sync_engine) as statements,
+    ):
+        r = backend_client.post(f"{settings.API_V1_STR}/users/", json=body)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "User Exists"
+    # the role INSERT only runs if the user row was inserted
+    assert len(statements) == 2
+    assert "ON CONFLICT DO NOTHING" in statements[0]
+    assert "WHERE EXISTS" in statements[1]
+    assert not commits
+
+
+def test_create_user_rejects_taken_identification_number(
+    backend_client: TestClient,
+) -> None:
+    number = str(random.randrange(10**10, 10**11))
+    body = create_user_body(random_email())
+    body["user_in"]["turkish_identification_number"] = number
+    r = backend_client.post(f"{settings.API_V1_STR}/users/", json=body)
+    assert r.status_code == 200
+
+    body = create_user_body(random_email())
+    body["user_in"]["turkish_identification_number"] = number
+    r = backend_client.post(f"{settings.API_V1_STR}/users/", json=body)
+    assert r.status_code == 400
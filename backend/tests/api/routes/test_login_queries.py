@@ -0,0 +1,97 @@
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.crud import user_ops
+from app.models import (
+    RoleType,
+    SubscriptionLevel,
+    User,
+    UserSubscriptionPlanCreate,
+)
+from tests.utils.user import create_user
+from tests.utils.utils import (
+    count_queries,
+    random_email,
+    random_lower_string,
+    run_in_session,
+)
+
+
+def login_reads(client: TestClient, user: User, password: str) -> list[str]:
+    login_data = {"username": user.email, "password": password}
+    with count_queries(async_engine.sync_engine) as statements:
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 200
+    assert r.json()["access_token"]
+    assert r.json()["refresh_token"]
+    # the only write is the refresh token row
+    writes = [s for s in statements if not s.lstrip().startswith("SELECT")]
+    assert len(writes) == 1
+    assert writes[0].lstrip().startswith("INSERT INTO refresh_tokens")
+    return [s for s in statements if s.lstrip().startswith("SELECT")]
+
+
+def test_login_without_plan_uses_single_read(backend_client: TestClient) -> None:
+    user, password = create_user(RoleType.TEACHER)
+    assert len(login_reads(backend_client, user, password)) == 1
+
+
+def test_login_reads_plan_once_then_uses_cache(backend_client: TestClient) -> None:
+    user, password = create_user(RoleType.STUDENT)
+    assert len(login_reads(backend_client, user, password)) == 2
+    assert len(login_reads(backend_client, user, password)) == 1
+
+
+def test_new_user_plan_invalidates_cached_authorization(
+    backend_client: TestClient,
+) -> None:
+    user, password = create_user(RoleType.STUDENT)
+    login_reads(backend_client, user, password)
+
+    async def add_plan(session: AsyncSession) -> None:
+        user_ops.creat_user_sub_plan(
+            session,
+            user_id=user.id,
+            user_in=UserSubscriptionPlanCreate(
+                user_id=user.id, sub_level=SubscriptionLevel.GOLD
+            ),
+        )
+
+    run_in_session(add_plan)
+
+    assert len(login_reads(backend_client, user, password)) == 2
+
+
+def test_login_unknown_user_uses_single_query(backend_client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": random_lower_string()}
+
+    with count_queries(async_engine.sync_engine) as statements:
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+
+    assert r.status_code == 401
+    assert len(statements) == 1
+
+
+def test_throttled_login_skips_database_and_bcrypt(
+    backend_client: TestClient,
+) -> None:
+    user, _ = create_user(RoleType.TEACHER)
+    login_data = {"username": user.email, "password": random_lower_string()}
+    for _ in range(settings.LOGIN_EMAIL_BUCKET_CAPACITY):
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+        assert r.status_code == 401
+
+    with count_queries(async_engine.sync_engine) as statements:
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+
+    assert r.status_code == 429
+    assert "Retry-After" in r.headers
+    assert statements == []
@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.crud import user_ops
+from app.models import RoleType, User
+from tests.utils.user import create_user
+from tests.utils.utils import count_queries, run_in_session
+
+
+def login_new_teacher(client: TestClient) -> tuple[User, dict[str, str]]:
+    user, password = create_user(RoleType.TEACHER)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": user.email, "password": password},
+    )
+    assert r.status_code == 200
+    return user, r.json()
+
+
+def test_refresh_rotates_tokens(backend_client: TestClient) -> None:
+    _, tokens = login_new_teacher(backend_client)
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+    new_tokens = r.json()
+    assert new_tokens["access_token"] != tokens["access_token"]
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+
+
+def test_replayed_refresh_token_revokes_session(backend_client: TestClient) -> None:
+    _, tokens = login_new_teacher(backend_client)
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    new_tokens = r.json()
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 401
+
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": new_tokens["refresh_token"]},
+    )
+    assert r.status_code == 401
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {new_tokens['access_token']}"},
+    )
+    assert r.status_code == 403
+
+
+def test_deactivated_user_token_rejected_without_db(
+    backend_client: TestClient,
+) -> None:
+    user, tokens = login_new_teacher(backend_client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    r = backend_client.post(f"{settings.API_V1_STR}/login/test-token", headers=headers)
+    assert r.status_code == 200
+
+    async def deactivate(session: AsyncSession) -> None:
+        await user_ops.deactivate_user(session, user.id)
+
+    run_in_session(deactivate)
+
+    with count_queries(async_engine.sync_engine) as statements:
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/login/test-token", headers=headers
+        )
+    assert r.status_code == 403
+    assert statements == []
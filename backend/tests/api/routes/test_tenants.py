@@ -0,0 +1,25 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from tests.utils.utils import random_lower_string
+
+
+def test_create_tenant_rejects_taken_vkn(backend_client: TestClient) -> None:
+    body = {
+        "name": random_lower_string(),
+        "VKN_code": str(random.randrange(10**9, 10**10)),
+    }
+    r = backend_client.post(f"{settings.API_V1_STR}/tenants/", json=body)
+    assert r.status_code == 200
+    r = backend_client.post(f"{settings.API_V1_STR}/tenants/", json=body)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Tenant Exists"
+
+    # tenants without a VKN do not conflict with each other
+    for _ in range(2):
+        r = backend_client.post(
+            f"{settings.API_V1_STR}/tenants/", json={"name": random_lower_string()}
+        )
+        assert r.status_code == 200
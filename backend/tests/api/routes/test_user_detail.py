@@ -0,0 +1,202 @@
+import uuid
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.dependencies.db_deps import (
+    AsyncSessionDep,
+    SessionReleasingRoute,
+    query_budget,
+)
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.security import create_access_token
+from app.crud import user_ops
+from app.models import (
+    ParentStudentRelation,
+    RoleType,
+    StudentProfile,
+    SubscriptionLevel,
+    User,
+    UserSubscriptionPlanCreate,
+)
+from tests.utils.user import add_tenant, add_user
+from tests.utils.utils import (
+    assert_within_query_budgets,
+    count_queries,
+    run_in_session,
+)
+
+USERS_URL = f"{settings.API_V1_STR}/users"
+
+
+def token_headers(
+    role: RoleType, user_id: uuid.UUID | None = None, tenant_id: uuid.UUID | None = None
+) -> dict[str, str]:
+    token = create_access_token(
+        user_id=user_id or uuid.uuid4(),
+        tenant_id=tenant_id,
+        role=role,
+        subscription_level=SubscriptionLevel.FREE,
+        expire_delta=timedelta(minutes=5),
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="module")
+def family() -> dict[str, Any]:
+    """A tenant with a parent of three students, each with a profile and plan."""
+
+    async def create(session: AsyncSession) -> dict[str, Any]:
+        tenant = await add_tenant(session)
+        parent = await add_user(session, RoleType.PARENT, tenant.id, password_hash="x")
+        students = [
+            await add_user(session, RoleType.STUDENT, tenant.id, password_hash="x")
+            for _ in range(3)
+        ]
+        for student in students:
+            session.add(StudentProfile(user_id=student.id, grade_level="8"))
+            session.add(
+                ParentStudentRelation(parent_id=parent.id, student_id=student.id)
+            )
+            user_ops.creat_user_sub_plan(
+                session,
+                student.id,
+                UserSubscriptionPlanCreate(
+                    user_id=student.id, sub_level=SubscriptionLevel.GOLD
+                ),
+            )
+        return {"tenant": tenant, "parent": parent, "students": students}
+
+    return run_in_session(create)
+
+
+def test_user_detail_expands_only_what_is_asked(
+    backend_client: TestClient, family: dict[str, Any]
+) -> None:
+    parent = family["parent"]
+    headers = token_headers(RoleType.PARENT, parent.id, family["tenant"].id)
+
+    r = backend_client.get(f"{USERS_URL}/{parent.id}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["email"] == parent.email
+    assert not {"roles", "profile", "plans", "children"} & r.json().keys()
+
+    r = backend_client.get(
+        f"{USERS_URL}/{parent.id}", params={"expand": "roles,children"}, headers=headers
+    )
+    assert r.status_code == 200
+    assert [role["role_type"] for role in r.json()["roles"]] == ["parent"]
+    assert {child["id"] for child in r.json()["children"]} == {
+        str(student.id) for student in family["students"]
+    }
+    assert "plans" not in r.json()
+
+
+def test_user_detail_runs_one_query_per_expansion(
+    backend_client: TestClient, family: dict[str, Any]
+) -> None:
+    student = family["students"][0]
+    headers = token_headers(RoleType.SUPER_ADMIN)
+    with (
+        assert_within_query_budgets(),
+        count_queries(async_engine.sync_engine) as statements,
+    ):
+        r = backend_client.get(
+            f"{USERS_URL}/{student.id}",
+            params={"expand": "roles,profile,plans,children"},
+            headers=headers,
+        )
+    assert r.status_code == 200
+    assert r.json()["profile"]["grade_level"] == "8"
+    assert [plan["sub_level"] for plan in r.json()["plans"]] == ["gold"]
+    assert r.json()["children"] == []
+    assert len(statements) == 5
+
+
+def test_user_list_expands_in_batch(
+    backend_client: TestClient, family: dict[str, Any]
+) -> None:
+    tenant = family["tenant"]
+    headers = token_headers(RoleType.TENANT_ADMIN, tenant_id=tenant.id)
+    with (
+        assert_within_query_budgets(),
+        count_queries(async_engine.sync_engine) as statements,
+    ):
+        r = backend_client.get(
+            f"{USERS_URL}/",
+            params={"expand": "roles,profile,plans"},
+            headers=headers,
+        )
+    assert r.status_code == 200
+    users = r.json()["data"]
+    assert r.json()["count"] == len(users) == 4
+    assert sorted(user["roles"][0]["role_type"] for user in users) == [
+        "parent",
+        "student",
+        "student",
+        "student",
+    ]
+    assert sum(user["profile"] is not None for user in users) == 3
+    # count, users, then one query per relation whatever the page size
+    assert len(statements) == 5
+
+
+def test_user_detail_is_limited_to_own_tenant(
+    backend_client: TestClient, family: dict[str, Any]
+) -> None:
+    student = family["students"][0]
+    other_admin = token_headers(RoleType.TENANT_ADMIN, tenant_id=uuid.uuid4())
+    r = backend_client.get(f"{USERS_URL}/{student.id}", headers=other_admin)
+    assert r.status_code == 403
+
+    r = backend_client.get(
+        f"{USERS_URL}/",
+        params={"tenant_id": str(family["tenant"].id)},
+        headers=other_admin,
+    )
+    assert r.status_code == 403
+
+    r = backend_client.get(f"{USERS_URL}/", headers=token_headers(RoleType.STUDENT))
+    assert r.status_code == 403
+
+
+def test_unknown_expansion_is_rejected(
+    backend_client: TestClient, family: dict[str, Any]
+) -> None:
+    student = family["students"][0]
+    r = backend_client.get(
+        f"{USERS_URL}/{student.id}",
+        params={"expand": "roles,friends"},
+        headers=token_headers(RoleType.SUPER_ADMIN),
+    )
+    assert r.status_code == 422
+    assert "friends" in r.json()["detail"]
+
+
+router = APIRouter(route_class=SessionReleasingRoute)
+
+
+@router.get("/n-plus-one")
+@query_budget(2)
+async def n_plus_one(session: AsyncSessionDep) -> int:
+    users = (await session.exec(select(User).limit(3))).all()
+    for user in users:
+        await session.exec(select(func.count()).where(User.id == user.id))
+    return len(users)
+
+
+budget_app = FastAPI()
+budget_app.include_router(router)
+
+
+def test_harness_fails_routes_over_their_query_budget() -> None:
+    with TestClient(budget_app) as client:
+        with pytest.raises(AssertionError, match="n_plus_one"):
+            with assert_within_query_budgets():
+                assert client.get("/n-plus-one").json() == 3
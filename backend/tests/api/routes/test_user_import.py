@@ -0,0 +1,133 @@
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import ParentStudentRelation, RoleType, User, UserRole
+from tests.utils.user import create_tenant, create_user, login_headers
+from tests.utils.utils import random_email, random_lower_string
+
+
+@pytest.fixture(scope="module")
+def admin_headers(backend_client: TestClient) -> dict[str, str]:
+    return login_headers(backend_client, *create_user(RoleType.SUPER_ADMIN))
+
+
+def import_users(
+    client: TestClient,
+    headers: dict[str, str],
+    tenant_id: uuid.UUID,
+    body: str,
+    content_type: str,
+) -> dict:
+    r = client.post(
+        f"{settings.API_V1_STR}/tenants/{tenant_id}/users:import",
+        headers={**headers, "Content-Type": content_type},
+        content=body.encode(),
+    )
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_import_csv_creates_users_roles_and_parent_links(
+    backend_client: TestClient, admin_headers: dict[str, str]
+) -> None:
+    tenant_id = create_tenant()
+    parent, student = random_email(), random_email()
+    password = random_lower_string()
+    body = "\n".join(
+        [
+            "email,password,role_type,first_name,parent_email",
+            f"{student},{password},student,Ada,{parent}",
+            f"{parent},{password},parent,Grace,",
+            f"not-an-email,{password},student,,",
+            f"{student},{password},student,,",
+        ]
+    )
+    report = import_users(backend_client, admin_headers, tenant_id, body, "text/csv")
+
+    assert report["created"] == 2
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+    with Session(engine) as session:
+        users = {
+            user.email: user
+            for user in session.exec(
+                select(User).where(User.tenant_id == tenant_id)
+            ).all()
+        }
+        assert users[student].first_name == "Ada"
+        roles = session.exec(
+            select(UserRole.role_type).where(UserRole.tenant_id == tenant_id)
+        ).all()
+        assert sorted(roles) == [RoleType.PARENT, RoleType.STUDENT]
+        relation = session.exec(
+            select(ParentStudentRelation).where(
+                ParentStudentRelation.student_id == users[student].id
+            )
+        ).one()
+        assert relation.parent_id == users[parent].id
+
+
+def test_import_ndjson_enforces_max_users(
+    backend_client: TestClient, admin_headers: dict[str, str]
+) -> None:
+    tenant_id = create_tenant(max_users=2)
+    emails = [random_email() for _ in range(3)]
+    body = "\n".join(
+        json.dumps({"email": email, "password": random_lower_string()})
+        for email in emails
+    )
+    report = import_users(
+        backend_client, admin_headers, tenant_id, body, "application/x-ndjson"
+    )
+
+    assert report["created"] == 2
+    assert report["errors"] == [
+        {"row": 3, "email": emails[2], "detail": "Tenant user limit reached"}
+    ]
+
+
+def test_import_rejects_existing_emails(
+    backend_client: TestClient, admin_headers: dict[str, str]
+) -> None:
+    tenant_id = create_tenant()
+    email = random_email()
+    body = f"email,password\n{email},{random_lower_string()}\n"
+    import_users(backend_client, admin_headers, tenant_id, body, "text/csv")
+    report = import_users(backend_client, admin_headers, tenant_id, body, "text/csv")
+
+    assert report["created"] == 0
+    assert report["errors"] == [{"row": 1, "email": email, "detail": "User Exists"}]
+
+
+def test_import_matches_emails_ignoring_case(
+    backend_client: TestClient, admin_headers: dict[str, str]
+) -> None:
+    tenant_id = create_tenant()
+    email = random_email()
+    body = f"email,password\n{email},{random_lower_string()}\n"
+    import_users(backend_client, admin_headers, tenant_id, body, "text/csv")
+    password = random_lower_string()
+    body = f"email,password\n{email.upper()},{password}\n{email.title()},{password}\n"
+    report = import_users(backend_client, admin_headers, tenant_id, body, "text/csv")
+
+    assert report["created"] == 0
+    assert report["errors"] == [
+        {"row": 2, "email": email, "detail": "Duplicate email in import"},
+        {"row": 1, "email": email, "detail": "User Exists"},
+    ]
+
+
+def test_import_requires_tenant_admin(backend_client: TestClient) -> None:
+    tenant_id = create_tenant()
+    r = backend_client.post(
+        f"{settings.API_V1_STR}/tenants/{tenant_id}/users:import",
+        headers={"Content-Type": "text/csv"},
+        content=b"email,password\n",
+    )
+    assert r.status_code == 401
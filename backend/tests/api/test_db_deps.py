@@ -0,0 +1,71 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_serializer
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.api.dependencies.db_deps import AsyncSessionDep, SessionReleasingRoute
+from app.core.db import pool_monitors
+from app.core.metrics import metrics
+from app.models import User
+
+async_pool = next(monitor for monitor in pool_monitors if monitor.name == "async")
+
+
+class UserCount(BaseModel):
+    count: int
+
+    @field_serializer("count")
+    def serialize_count(self, count: int) -> int:
+        # record what the pool looks like while the response is serialized
+        checked_out_during_serialization.append(async_pool.checked_out.value)
+        return count
+
+
+checked_out_during_serialization: list[float] = []
+
+router = APIRouter(route_class=SessionReleasingRoute)
+
+
+@router.get("/user-count", response_model=UserCount)
+async def read_user_count(session: AsyncSessionDep) -> UserCount:
+    count = (await session.exec(select(func.count()).select_from(User))).one()
+    return UserCount(count=count)
+
+
+@router.get("/user-count-twice", response_model=UserCount)
+async def read_user_count_twice(session: AsyncSessionDep) -> UserCount:
+    statement = select(func.count()).select_from(User)
+    await session.exec(statement)
+    await session.commit()
+    # the commit returned the connection; the session checks one out again
+    count = (await session.exec(statement)).one()
+    return UserCount(count=count)
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+def test_connection_is_returned_before_serialization() -> None:
+    hold = metrics.histogram("db_route_read_user_count_user_count_get_hold_seconds")
+    sql = metrics.histogram("db_route_read_user_count_user_count_get_sql_seconds")
+    holds_before = hold.snapshot()["count"]
+    checked_out_during_serialization.clear()
+
+    with TestClient(app) as client:
+        r = client.get("/user-count")
+    assert r.status_code == 200
+    assert checked_out_during_serialization == [0]
+
+    assert hold.snapshot()["count"] == holds_before + 1
+    assert 0 < sql.snapshot()["sum"] <= hold.snapshot()["sum"]
+
+
+def test_session_reacquires_a_connection_after_commit() -> None:
+    checked_out_during_serialization.clear()
+    with TestClient(app) as client:
+        r = client.get("/user-count-twice")
+    assert r.status_code == 200
+    assert r.json()["count"] > 0
+    assert checked_out_during_serialization == [0]
@@ -0,0 +1,55 @@
+import uuid
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.authentication.principal import get_principal, verified_tokens
+from app.core.security import create_access_token
+from app.models import RoleType, SubscriptionLevel
+
+
+def test_get_principal_from_claims() -> None:
+    user_id = uuid.uuid4()
+    tenant_id = uuid.uuid4()
+    token = create_access_token(
+        user_id=user_id,
+        tenant_id=tenant_id,
+        role=RoleType.TEACHER,
+        subscription_level=SubscriptionLevel.FREE,
+        expire_delta=timedelta(minutes=5),
+    )
+    principal = get_principal(token)
+    assert principal.user_id == user_id
+    assert principal.tenant_id == tenant_id
+    assert principal.role == RoleType.TEACHER
+    assert "basic_dashboard" in principal.features
+    with pytest.raises(AttributeError):
+        principal.role = RoleType.SUPER_ADMIN  # type: ignore[misc]
+
+
+def test_get_principal_skips_verification_for_cached_token() -> None:
+    token = create_access_token(
+        user_id=uuid.uuid4(),
+        tenant_id=None,
+        role=RoleType.STUDENT,
+        subscription_level=SubscriptionLevel.GOLD,
+        expire_delta=timedelta(minutes=5),
+    )
+    hits_before = verified_tokens.hits.value
+    first = get_principal(token)
+    second = get_principal(token)
+    assert first is second
+    assert verified_tokens.hits.value == hits_before + 1
+
+
+def test_get_principal_rejects_expired_token() -> None:
+    token = create_access_token(
+        user_id=uuid.uuid4(),
+        tenant_id=None,
+        role=RoleType.STUDENT,
+        subscription_level=SubscriptionLevel.FREE,
+        expire_delta=timedelta(minutes=-1),
+    )
+    with pytest.raises(jwt.ExpiredSignatureError):
+        get_principal(token)
@@ -0,0 +1,66 @@
+import asyncio
+
+from passlib.context import CryptContext
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.authentication.rehash import PasswordRehashQueue
+from app.core.db import engine
+from app.core.security import password_needs_rehash, verify_password
+from app.crud import user_ops
+from app.models import User, UserCreate
+from tests.utils.utils import random_email, random_lower_string, run_in_session
+
+# deliberately cheaper than any cost the app is configured with
+weak_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+def create_user_with_weak_hash() -> tuple[User, str]:
+    password = random_lower_string()
+
+    async def create(session: AsyncSession) -> User:
+        return await user_ops.create_user(
+            session,
+            UserCreate(email=random_email(), password=password, tenant_id=None),
+            password_hash=weak_context.hash(password),
+        )
+
+    return run_in_session(create), password
+
+
+def rehash(queue: PasswordRehashQueue, user: User, password: str) -> None:
+    async def run() -> None:
+        queue.submit(user.id, user.password_hash, password)
+        await queue.drain(engine)
+
+    asyncio.run(run())
+
+
+def test_rehash_upgrades_stored_hash() -> None:
+    user, password = create_user_with_weak_hash()
+    assert password_needs_rehash(user.password_hash)
+
+    queue = PasswordRehashQueue(batch_size=10)
+    rehash(queue, user, password)
+
+    with Session(engine) as session:
+        stored = session.get(User, user.id)
+        assert stored.password_hash != user.password_hash
+        assert not password_needs_rehash(stored.password_hash)
+        assert verify_password(password, stored.password_hash)
+
+
+def test_rehash_does_not_overwrite_changed_password() -> None:
+    user, password = create_user_with_weak_hash()
+    new_hash = weak_context.hash(random_lower_string())
+    with Session(engine) as session:
+        stored = session.get(User, user.id)
+        stored.password_hash = new_hash
+        session.add(stored)
+        session.commit()
+
+    queue = PasswordRehashQueue(batch_size=10)
+    rehash(queue, user, password)
+
+    with Session(engine) as session:
+        assert session.get(User, user.id).password_hash == new_hash
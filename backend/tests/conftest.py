@@ -4,16 +4,20 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, delete
 
-from _app.core.config import settings
-from _app.core.db import engine, init_db
-from _app.main import app
-from _app.models import Item, User
+from app.main import app as backend_app
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import get_superuser_token_headers
 
+# The fixtures below other than backend_client serve the template tests
+# written against _app, which import it lazily: _app no longer has a models
+# module, and importing it here would keep every test from loading.
 
-@pytest.fixture(scope="session", autouse=True)
+
+@pytest.fixture(scope="session")
 def db() -> Generator[Session, None, None]:
+    from _app.core.db import engine, init_db
+    from _app.models import Item, User
+
     with Session(engine) as session:
         init_db(session)
         yield session
@@ -25,11 +29,19 @@ def db() -> Generator[Session, None, None]:
 
 
 @pytest.fixture(scope="module")
-def client() -> Generator[TestClient, None, None]:
+def client(db: Session) -> Generator[TestClient, None, None]:  # noqa: ARG001
+    from _app.main import app
+
     with TestClient(app) as c:
         yield c
 
 
+@pytest.fixture(scope="module")
+def backend_client() -> Generator[TestClient, None, None]:
+    with TestClient(backend_app) as c:
+        yield c
+
+
 @pytest.fixture(scope="module")
 def superuser_token_headers(client: TestClient) -> dict[str, str]:
     return get_superuser_token_headers(client)
@@ -37,6 +49,8 @@ def superuser_token_headers(client: TestClient) -> dict[str, str]:
 
 @pytest.fixture(scope="module")
 def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]:
+    from _app.core.config import settings
+
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.db import async_engine, engine
+from app.core.db_pool import PoolMonitor, timed_pool_class
+
+
+def test_pool_metrics_track_checkouts_and_timeouts() -> None:
+    test_engine = create_engine(
+        engine.url,
+        poolclass=timed_pool_class(QueuePool, "test"),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    monitor = PoolMonitor(test_engine, "test")
+    pool_class = type(test_engine.pool)
+    waits_before = pool_class.wait_seconds.snapshot()["count"]
+    timeouts_before = pool_class.timeouts.value
+    try:
+        with test_engine.connect():
+            assert monitor.checked_out.value == 1
+            with pytest.raises(exc.TimeoutError):
+                test_engine.connect()
+        assert monitor.checked_out.value == 0
+        assert pool_class.waiting.value == 0
+        assert pool_class.wait_seconds.snapshot()["count"] == waits_before + 2
+        assert pool_class.timeouts.value == timeouts_before + 1
+    finally:
+        test_engine.dispose()
+
+    # dispose() rebuilds the pool from its class; metrics keep working
+    with test_engine.connect():
+        assert pool_class.wait_seconds.snapshot()["count"] == waits_before + 3
+    test_engine.dispose()
+
+
+def test_leak_detector_logs_where_a_held_connection_was_acquired(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    test_engine = create_async_engine(
+        async_engine.url, poolclass=timed_pool_class(AsyncAdaptedQueuePool, "test")
+    )
+    monitor = PoolMonitor(test_engine.sync_engine, "test", leak_seconds=0.05)
+    leaks_before = monitor.leaks.value
+
+    async def hold_connection() -> None:
+        async with test_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await asyncio.sleep(0.1)
+            monitor.report_leaks()
+        await test_engine.dispose()
+
+    with caplog.at_level(logging.WARNING, logger="app.core.db_pool"):
+        asyncio.run(hold_connection())
+
+    # reported once while held and once more, with the total, on return
+    assert monitor.leaks.value == leaks_before + 1
+    assert len(caplog.records) == 2
+    assert "held for" in caplog.records[0].getMessage()
+    assert "returned after" in caplog.records[1].getMessage()
+    for record in caplog.records:
+        assert "in hold_connection" in record.getMessage()
+
+
+def test_leak_detector_ignores_short_checkouts() -> None:
+    test_engine = create_engine(engine.url)
+    monitor = PoolMonitor(test_engine, "test", leak_seconds=60)
+    leaks_before = monitor.leaks.value
+    with test_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        monitor.report_leaks()
+    test_engine.dispose()
+    assert monitor.leaks.value == leaks_before
@@ -0,0 +1,128 @@
+import asyncio
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import false, update
+
+from app.api.dependencies import db_deps
+from app.api.dependencies.db_deps import (
+    AsyncSessionDep,
+    ReadSessionDep,
+    SessionReleasingRoute,
+)
+from app.core.db import async_engine, execute_pipelined
+from app.core.db_routing import READ_PRIMARY_COOKIE, ReplicaSet
+from app.models import User
+
+# the primary stands in for a replica that is always caught up
+primary_uri = async_engine.url.render_as_string(hide_password=False)
+unreachable_uri = async_engine.url.set(port=1).render_as_string(hide_password=False)
+
+
+def test_reads_go_round_robin_to_healthy_replicas() -> None:
+    replicas = ReplicaSet([primary_uri, primary_uri], 5, 2)
+    first, second = (replica.engine for replica in replicas.replicas)
+    assert [replicas.choose() for _ in range(3)] == [first, second, first]
+
+    replicas.replicas[0].mark(False)
+    assert [replicas.choose() for _ in range(2)] == [second, second]
+
+    replicas.replicas[1].mark(False)
+    routed_primary = replicas.routed_primary.value
+    assert replicas.choose() is None
+    assert replicas.routed_primary.value == routed_primary + 1
+
+
+def test_health_check_takes_unreachable_replicas_out_of_rotation() -> None:
+    replicas = ReplicaSet([primary_uri, unreachable_uri], 5, 2)
+    reachable, unreachable = replicas.replicas
+
+    async def check() -> None:
+        await replicas.check_health()
+        await replicas.dispose()
+
+    asyncio.run(check())
+    assert reachable.healthy
+    assert reachable.lag_seconds.value == 0
+    assert not unreachable.healthy
+    assert [replicas.choose() for _ in range(2)] == [reachable.engine] * 2
+
+
+router = APIRouter(route_class=SessionReleasingRoute)
+
+
+@router.post("/write")
+async def write(session: AsyncSessionDep) -> None:
+    await session.exec(update(User).where(false()).values(last_login=None))
+    await session.commit()
+
+
+@router.post("/write-pipelined")
+async def write_pipelined(session: AsyncSessionDep) -> None:
+    await execute_pipelined(
+        session, update(User).where(false()).values(last_login=None)
+    )
+    await session.commit()
+
+
+@router.post("/write-rolled-back")
+async def write_rolled_back(session: AsyncSessionDep) -> None:
+    await session.exec(update(User).where(false()).values(last_login=None))
+    await session.rollback()
+
+
+@router.get("/read")
+async def read(session: ReadSessionDep) -> dict[str, Any]:
+    return {"replica": session.bind is not async_engine}
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+@pytest.fixture
+def replicas(monkeypatch: pytest.MonkeyPatch) -> Iterator[ReplicaSet]:
+    replicas = ReplicaSet([primary_uri], 5, 2)
+    monkeypatch.setattr(db_deps, "replicas", replicas)
+    yield replicas
+    asyncio.run(replicas.dispose())
+
+
+@pytest.mark.usefixtures("replicas")
+def test_clients_read_their_writes_from_the_primary() -> None:
+    with TestClient(app) as client:
+        assert client.get("/read").json() == {"replica": True}
+
+        r = client.post("/write-rolled-back")
+        assert READ_PRIMARY_COOKIE not in r.cookies
+        assert client.get("/read").json() == {"replica": True}
+
+        r = client.post("/write")
+        assert READ_PRIMARY_COOKIE in r.cookies
+        assert client.get("/read").json() == {"replica": False}
+
+        # once replicas must have caught up the client reads from them again
+        client.cookies.set(READ_PRIMARY_COOKIE, "0")
+        assert client.get("/read").json() == {"replica": True}
+
+
+@pytest.mark.usefixtures("replicas")
+def test_pipelined_writes_pin_reads_to_the_primary() -> None:
+    # execute_pipelined writes through the Connection, past the Session events
+    with TestClient(app) as client:
+        r = client.post("/write-pipelined")
+        assert READ_PRIMARY_COOKIE in r.cookies
+        assert client.get("/read").json() == {"replica": False}
+
+
+def test_writes_do_not_pin_reads_without_replicas(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(db_deps, "replicas", ReplicaSet([], 5, 2))
+    with TestClient(app) as client:
+        r = client.post("/write")
+        assert READ_PRIMARY_COOKIE not in r.cookies
+        assert client.get("/read").json() == {"replica": False}
@@ -0,0 +1,53 @@
+from sqlalchemy import Engine, create_engine, text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine, engine_options
+from app.core.db_statements import StatementCacheMonitor
+from app.crud.user_ops import _login_context_by_email
+
+count_prepared = text("SELECT count(*) FROM pg_prepared_statements")
+
+
+def run_login_lookup(test_engine: Engine, times: int) -> int:
+    with Session(test_engine) as session:
+        for _ in range(times):
+            session.exec(_login_context_by_email, params={"email": "x@example.com"})
+        return session.exec(count_prepared).one()[0]
+
+
+def test_compiled_cache_hits_are_counted() -> None:
+    test_engine = create_engine(engine.url, query_cache_size=50)
+    monitor = StatementCacheMonitor(test_engine, "test")
+    hits, misses = monitor.hits.value, monitor.misses.value
+
+    run_login_lookup(test_engine, 3)
+    test_engine.dispose()
+
+    # the lookup and the count compile once each
+    assert monitor.misses.value == misses + 2
+    assert monitor.hits.value == hits + 2
+    assert monitor.size.value == 2
+    assert 0 < monitor.hit_ratio.value < 1
+
+
+def test_uncacheable_statements_are_counted_separately() -> None:
+    test_engine = create_engine(engine.url, query_cache_size=0)
+    monitor = StatementCacheMonitor(test_engine, "test_uncached")
+    run_login_lookup(test_engine, 2)
+    test_engine.dispose()
+    assert monitor.uncached.value == 3
+    assert monitor.hits.value == monitor.misses.value == 0
+
+
+def test_prepare_threshold_is_passed_to_psycopg() -> None:
+    connect_args = engine_options()["connect_args"]
+    assert connect_args["prepare_threshold"] == settings.DB_PREPARE_THRESHOLD
+
+    prepared = create_engine(engine.url, connect_args={"prepare_threshold": 2})
+    assert run_login_lookup(prepared, 3) == 1
+    prepared.dispose()
+
+    unprepared = create_engine(engine.url, connect_args={"prepare_threshold": None})
+    assert run_login_lookup(unprepared, 3) == 0
+    unprepared.dispose()
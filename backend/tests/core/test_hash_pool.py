@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hash_pool import (
+    PasswordHashPool,
+    get_password_hashes_async,
+    import_hash_pool,
+    password_pool,
+)
+from app.core.security import get_password_hash, verify_password
+
+
+def test_password_pool_hash_and_verify() -> None:
+    pool = PasswordHashPool("test_pool", max_workers=1, max_queue=4)
+    try:
+        hashed = asyncio.run(pool.run(get_password_hash, "password123"))
+        assert asyncio.run(pool.run(verify_password, "password123", hashed))
+        assert not asyncio.run(pool.run(verify_password, "wrong", hashed))
+    finally:
+        pool.shutdown()
+    assert pool.wait_seconds.snapshot()["count"] >= 3
+
+
+def test_password_pool_rejects_when_queue_full() -> None:
+    pool = PasswordHashPool("test_pool", max_workers=1, max_queue=0)
+    rejected_before = pool.rejected.value
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(pool.run(get_password_hash, "password123"))
+    assert exc_info.value.status_code == 503
+    assert pool.rejected.value == rejected_before + 1
+
+
+def test_password_pool_workers_are_not_forks_of_the_app() -> None:
+    pool = PasswordHashPool("test_pool", max_workers=2, max_queue=4)
+    try:
+        pool.start()
+        # forkserver children descend from the server process, not from us
+        assert asyncio.run(pool.run(os.getppid)) != os.getpid()
+    finally:
+        pool.shutdown()
+
+
+def test_import_hashing_stays_off_the_login_pool() -> None:
+    login_jobs = password_pool.run_seconds.snapshot()["count"]
+    import_jobs = import_hash_pool.run_seconds.snapshot()["count"]
+    try:
+        hashes = asyncio.run(get_password_hashes_async(["first123", "second123"]))
+    finally:
+        import_hash_pool.shutdown()
+    assert verify_password("second123", hashes[1])
+    assert password_pool.run_seconds.snapshot()["count"] == login_jobs
+    assert import_hash_pool.run_seconds.snapshot()["count"] > import_jobs
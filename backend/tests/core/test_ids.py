@@ -0,0 +1,37 @@
+import time
+import uuid
+
+from app.core.ids import uuid7, uuid7_from
+
+
+def test_uuid7_has_version_and_variant() -> None:
+    key = uuid7()
+    assert key.version == 7
+    assert key.variant == uuid.RFC_4122
+
+
+def test_uuid7_starts_with_the_current_time() -> None:
+    before = time.time_ns() // 1_000_000
+    key = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert before <= key.int >> 80 <= after
+
+
+def test_uuid7_sorts_in_creation_order() -> None:
+    keys = []
+    for _ in range(200):
+        keys.append(uuid7())
+        time.sleep(0.0005)
+    assert sorted(keys) == keys
+    assert len(set(keys)) == len(keys)
+
+
+def test_uuid7_from_keeps_timestamp_and_random_bits() -> None:
+    random_bits = (1 << 74) - 1
+    key = uuid7_from(1_700_000_000_000, random_bits)
+    assert key.int >> 80 == 1_700_000_000_000
+    assert key.version == 7
+    assert key.variant == uuid.RFC_4122
+    # the 74 random bits plus version 0b0111 and variant 0b10
+    assert bin(key.int & ((1 << 80) - 1)).count("1") == 74 + 3 + 1
+    assert uuid7_from(1_700_000_000_000, 0) < uuid7_from(1_700_000_000_001, 0)
@@ -0,0 +1,83 @@
+import time
+import uuid
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.authentication.principal import Principal
+from app.authentication.user_auth import get_principal_plan
+from app.core.constants import SUBSCRIPTION_FEATURES
+from app.core.plans import TENANT_PLAN_ID, PlanCatalog, plan_catalog
+from app.models import (
+    RoleType,
+    SubscriptionLevel,
+    TenantSubscriptionPlan,
+    TokenScope,
+)
+from tests.utils.user import add_tenant
+from tests.utils.utils import run_in_session
+
+
+def test_plan_feature_mask_round_trip() -> None:
+    for level, spec in SUBSCRIPTION_FEATURES.items():
+        plan_id, mask = plan_catalog.resolve(level)
+        assert plan_id == level.value
+        assert plan_catalog.features_for(mask) == frozenset(spec["features"])
+
+
+def test_tenant_plan_resolves_to_reference(caplog: pytest.LogCaptureFixture) -> None:
+    plan_id, mask = plan_catalog.resolve(
+        {"features": ["analytics", "not_a_flag"], "max_users": 3000}
+    )
+    assert plan_id == TENANT_PLAN_ID
+    assert plan_catalog.features_for(mask) == frozenset({"analytics"})
+    assert "not_a_flag" in caplog.text
+
+
+def test_tenant_plan_limits_resolve_by_tenant_id() -> None:
+    async def create(session: AsyncSession) -> uuid.UUID:
+        tenant = await add_tenant(session)
+        session.add(
+            TenantSubscriptionPlan(
+                tenant_id=tenant.id,
+                special_subscription_plan={
+                    "features": ["analytics"],
+                    "max_users": 3000,
+                    "storage_limit_gb": 50,
+                },
+            )
+        )
+        return tenant.id
+
+    tenant_id = run_in_session(create)
+    plan_id, mask = plan_catalog.resolve({"features": ["analytics"]})
+    principal = Principal(
+        token_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        tenant_id=tenant_id,
+        role=RoleType.TENANT_ADMIN,
+        scope=TokenScope.FULL,
+        plan_id=plan_id,
+        feature_mask=mask,
+        expires_at=int(time.time()) + 60,
+    )
+    assert principal.plan is None
+
+    plan = run_in_session(lambda session: get_principal_plan(session, principal))
+    assert plan is not None
+    assert (plan.max_users, plan.storage_limit_gb) == (3000, 50)
+    assert plan.feature_mask == mask
+
+
+def test_super_admin_gets_every_feature() -> None:
+    plan_id, mask = plan_catalog.resolve(SubscriptionLevel.SUPER_ADMIN)
+    assert mask == plan_catalog.all_features_mask
+
+
+def test_catalog_rejects_unknown_plan_features() -> None:
+    with pytest.raises(ValueError):
+        PlanCatalog(
+            version=1,
+            feature_flags=("dashboard",),
+            plans={SubscriptionLevel.FREE: {"features": ["analytics"]}},
+        )
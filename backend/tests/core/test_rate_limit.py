@@ -0,0 +1,52 @@
+import asyncio
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.core.rate_limit import RedisTokenBucket, TokenBucket
+
+
+def test_token_bucket_throttles_after_capacity() -> None:
+    bucket = TokenBucket(capacity=3, refill_per_second=1, max_keys=10)
+    results = [asyncio.run(bucket.acquire("a@example.com")) for _ in range(4)]
+    assert results[:3] == [0, 0, 0]
+    assert results[3] > 0
+    assert asyncio.run(bucket.acquire("b@example.com")) == 0
+
+
+def test_token_bucket_is_bounded() -> None:
+    bucket = TokenBucket(capacity=1, refill_per_second=0.001, max_keys=2)
+    for key in ("a", "b", "c"):
+        asyncio.run(bucket.acquire(key))
+    # "a" was evicted and starts with a full bucket again
+    assert asyncio.run(bucket.acquire("a")) == 0
+    assert asyncio.run(bucket.acquire("c")) > 0
+
+
+def test_redis_token_bucket_throttles_after_capacity() -> None:
+    async def run() -> list[float]:
+        client = FakeAsyncRedis()
+        bucket = RedisTokenBucket(client, 3, 1, prefix="test_login")
+        results = [await bucket.acquire("a@example.com") for _ in range(4)]
+        results.append(await bucket.acquire("b@example.com"))
+        # buckets expire once they would have refilled completely
+        assert 0 < await client.ttl("test_login:a@example.com") <= 4
+        return results
+
+    results = asyncio.run(run())
+    assert results[:3] == [0, 0, 0]
+    assert 0 < results[3] <= 1
+    assert results[4] == 0
+
+
+def test_redis_token_bucket_is_shared_between_workers() -> None:
+    async def run() -> float:
+        server = FakeServer()
+        workers = [
+            RedisTokenBucket(FakeAsyncRedis(server=server), 2, 0.001, prefix="login")
+            for _ in range(2)
+        ]
+        await workers[0].acquire("a")
+        await workers[1].acquire("a")
+        return await workers[0].acquire("a")
+
+    assert asyncio.run(run()) > 0
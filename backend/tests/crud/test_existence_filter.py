@@ -0,0 +1,55 @@
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import engine
+from app.crud import user_ops
+from app.crud.existence_filter import ExistenceFilter
+from app.models import User, UserCreate
+from tests.utils.utils import random_email, random_lower_string, run_in_session
+
+
+def new_email_filter() -> ExistenceFilter:
+    return ExistenceFilter(
+        "test_email",
+        User.email,
+        normalize=lambda email: email.strip().lower(),
+        capacity=1_000_000,
+        error_rate=0.01,
+    )
+
+
+def test_existence_filter_assumes_anything_exists_until_loaded() -> None:
+    email_filter = new_email_filter()
+    assert email_filter.might_exist(random_email())
+
+
+def test_existence_filter_loads_existing_values() -> None:
+    email = random_email()
+
+    async def create(session: AsyncSession) -> None:
+        await user_ops.create_user(
+            session,
+            UserCreate(email=email, password=random_lower_string(), tenant_id=None),
+        )
+
+    run_in_session(create)
+    with Session(engine) as session:
+        email_filter = new_email_filter()
+        email_filter.load(session)
+
+    assert email_filter.might_exist(email)
+    assert email_filter.might_exist(f"  {email.upper()} ")
+    negatives_before = email_filter.negatives.value
+    assert not email_filter.might_exist(random_email())
+    assert email_filter.negatives.value == negatives_before + 1
+
+
+def test_existence_filter_tracks_inserts() -> None:
+    with Session(engine) as session:
+        email_filter = new_email_filter()
+        email_filter.load(session)
+
+    email = random_email()
+    assert not email_filter.might_exist(email)
+    email_filter.add(email)
+    assert email_filter.might_exist(email)
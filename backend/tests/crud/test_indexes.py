@@ -0,0 +1,71 @@
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud import user_ops
+from app.models import RoleType, UserCreate, UserRoleCreate
+from tests.utils.utils import random_email, random_lower_string, run_in_session
+
+
+def plan_of(statement: str, **params: object) -> str:
+    async def explain(session: AsyncSession) -> str:
+        # a small table would be scanned whatever indexes exist
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = await session.execute(text(f"EXPLAIN {statement}"), params)
+        return "\n".join(row[0] for row in rows)
+
+    return run_in_session(explain)
+
+
+def test_email_lookups_ignore_case() -> None:
+    email = random_email()
+    user_in = UserCreate(
+        email=email.capitalize(), password=random_lower_string(), tenant_id=None
+    )
+    # stored lowercased, so the unique index covers case variants too
+    assert user_in.email == email
+
+    async def create(session: AsyncSession) -> None:
+        await user_ops.create_user_with_role(
+            session,
+            user_in,
+            UserRoleCreate(role_type=RoleType.TEACHER, user_id=None, tenant_id=None),
+            password_hash="x",
+        )
+
+    run_in_session(create)
+    user = run_in_session(
+        lambda session: user_ops.read_user_email(session, email.upper())
+    )
+    assert user is not None
+    assert user.email == email
+    context = run_in_session(
+        lambda session: user_ops.read_login_context(session, f" {email.upper()}")
+    )
+    assert context is not None
+    assert context.user.id == user.id
+    assert "ix_users_email" in plan_of(
+        "SELECT * FROM users WHERE email = :email", email=email
+    )
+
+
+def test_hot_lookups_use_indexes() -> None:
+    uuid = "00000000-0000-0000-0000-000000000000"
+    lookups = {
+        "SELECT * FROM user_roles WHERE user_id = :id ORDER BY created_at LIMIT 1": (
+            "ix_user_roles_user_id_created_at"
+        ),
+        "SELECT * FROM user_subscription_plan WHERE user_id = :id AND is_active": (
+            "ix_user_subscription_plan_user_id_is_active"
+        ),
+        "SELECT * FROM tenant_subscription_plan WHERE tenant_id = :id AND is_active": (
+            "uq_tenant_subscription_plan_active_tenant_id"
+        ),
+        "SELECT * FROM users WHERE tenant_id = :id ORDER BY created_at": (
+            "ix_users_tenant_id_created_at"
+        ),
+        "SELECT * FROM parent_student_relations WHERE student_id = :id": (
+            "ix_parent_student_relations_student_id"
+        ),
+    }
+    for statement, index in lookups.items():
+        assert index in plan_of(statement, id=uuid), statement
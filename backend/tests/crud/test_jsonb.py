@@ -0,0 +1,79 @@
+from typing import Any
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine, json_serializer
+from app.crud import user_ops
+from app.models import RoleType, StudentProfile, UserCreate, UserRoleCreate
+from tests.utils.utils import random_email, random_lower_string, run_in_session
+
+program = {
+    "monday": ["Mathematics", "Astronomy"],
+    "tuesday": ["Turkish", "Müzik"],
+}
+study_times = {"saturday": [{"start": "10:00", "end": "13:00"}]}
+
+
+def test_engine_uses_orjson() -> None:
+    dialect = async_engine.dialect
+    assert dialect._json_serializer is json_serializer
+    assert json_serializer({1: "é"}) == '{"1":"é"}'
+
+
+def test_profiles_are_found_by_containment() -> None:
+    subject = f"Astronomy {random_lower_string()}"
+    lessons = {**program, "monday": [*program["monday"], subject]}
+
+    async def create(session: AsyncSession) -> Any:
+        user = await user_ops.create_user_with_role(
+            session,
+            UserCreate(
+                email=random_email(), password=random_lower_string(), tenant_id=None
+            ),
+            UserRoleCreate(role_type=RoleType.STUDENT, user_id=None, tenant_id=None),
+            password_hash="x",
+        )
+        assert user is not None
+        session.add(
+            StudentProfile(
+                user_id=user.id,
+                school_lecture_program=lessons,
+                available_study_times=study_times,
+            )
+        )
+        return user
+
+    user = run_in_session(create)
+
+    async def search(session: AsyncSession, **documents: Any) -> set[Any]:
+        users = await user_ops.read_students_by_profile(session, **documents)
+        return {found.id for found in users}
+
+    assert run_in_session(
+        lambda s: search(s, school_lecture_program={"monday": [subject]})
+    ) == {user.id}
+    assert run_in_session(
+        lambda s: search(
+            s,
+            school_lecture_program={"monday": [subject], "tuesday": ["Müzik"]},
+            available_study_times={"saturday": [{"start": "10:00"}]},
+        )
+    ) == {user.id}
+    assert not run_in_session(
+        lambda s: search(s, school_lecture_program={"tuesday": [subject]})
+    )
+
+    async def stored_type(session: AsyncSession) -> Any:
+        row = await session.execute(
+            text(
+                "SELECT jsonb_typeof(school_lecture_program), school_lecture_program "
+                "FROM student_profiles WHERE user_id = :id"
+            ),
+            {"id": user.id},
+        )
+        return row.one()
+
+    kind, stored = run_in_session(stored_type)
+    assert kind == "object"
+    assert stored == lessons
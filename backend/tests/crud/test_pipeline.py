@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import NullPool, exc, func, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine, execute_pipelined
+from app.core.db_pool import ConnectionUsage, PoolMonitor, connection_usage
+from app.crud import user_ops
+from app.models import (
+    RoleType,
+    SubscriptionLevel,
+    User,
+    UserCreate,
+    UserRole,
+    UserRoleCreate,
+    UserSubscriptionPlan,
+    UserSubscriptionPlanCreate,
+)
+from tests.utils.utils import random_email, random_lower_string, run_in_session
+
+
+def new_user() -> UserCreate:
+    return UserCreate(
+        email=random_email(), password=random_lower_string(), tenant_id=None
+    )
+
+
+def teacher_role() -> UserRoleCreate:
+    return UserRoleCreate(role_type=RoleType.TEACHER, user_id=None, tenant_id=None)
+
+
+def test_replace_user_sub_plan_takes_one_round_trip() -> None:
+    user = run_in_session(
+        lambda session: user_ops.create_user_with_role(
+            session, new_user(), teacher_role(), password_hash="x"
+        )
+    )
+
+    async def replace_twice() -> ConnectionUsage:
+        # an engine of its own, monitored so that round trips are counted
+        engine = create_async_engine(async_engine.url, poolclass=NullPool)
+        PoolMonitor(engine.sync_engine, "test_pipeline")
+        usage = ConnectionUsage()
+        connection_usage.set(usage)
+        try:
+            async with AsyncSession(engine) as session:
+                for sub_level in (SubscriptionLevel.FREE, SubscriptionLevel.PREMIUM):
+                    plan_in = UserSubscriptionPlanCreate(
+                        user_id=user.id, sub_level=sub_level
+                    )
+                    await user_ops.replace_user_sub_plan(session, user.id, plan_in)
+                await session.commit()
+        finally:
+            await engine.dispose()
+        return usage
+
+    usage = asyncio.run(replace_twice())
+    # one pipeline each, the first also carrying the BEGIN, then the COMMIT
+    assert usage.round_trips == 3
+
+    async def read_plans(session: AsyncSession) -> list[UserSubscriptionPlan]:
+        statement = select(UserSubscriptionPlan).where(
+            UserSubscriptionPlan.user_id == user.id
+        )
+        return list((await session.exec(statement)).all())
+
+    plans = run_in_session(read_plans)
+    assert sorted((plan.sub_level, plan.is_active) for plan in plans) == [
+        (SubscriptionLevel.FREE, False),
+        (SubscriptionLevel.PREMIUM, True),
+    ]
+
+
+def test_pipelined_role_is_skipped_when_the_user_conflicts() -> None:
+    user_in = new_user()
+    user = run_in_session(
+        lambda session: user_ops.create_user_with_role(
+            session, user_in, teacher_role(), password_hash="x"
+        )
+    )
+    duplicate = run_in_session(
+        lambda session: user_ops.create_user_with_role(
+            session, user_in, teacher_role(), password_hash="x"
+        )
+    )
+    assert duplicate is None
+
+    async def count_roles(session: AsyncSession) -> int:
+        statement = (
+            select(func.count())
+            .select_from(UserRole)
+            .join(User, User.id == UserRole.user_id)
+            .where(User.email == user_in.email)
+        )
+        return (await session.exec(statement)).one()
+
+    assert user is not None
+    assert run_in_session(count_roles) == 1
+
+
+def test_pipeline_errors_are_raised_as_sqlalchemy_errors() -> None:
+    async def insert_orphan_role(session: AsyncSession) -> None:
+        role = {
+            "id": uuid.uuid4(),
+            "user_id": uuid.uuid4(),
+            "role_type": RoleType.TEACHER,
+        }
+        await execute_pipelined(session, (insert(UserRole), [role]))
+
+    with pytest.raises(exc.IntegrityError):
+        run_in_session(insert_orphan_role)
@@ -0,0 +1,202 @@
+"""Plan regression tests for the queries behind app/crud and user_auth.
+
+Each case runs a CRUD call against the synthetic dataset and checks the
+plans of every statement it sends; see tests/utils/query_plans.py.
+"""
+
+import json
+import secrets
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.authentication import authorization_cache, user_auth
+from app.core.db import engine
+from app.crud import class_code_ops, tenant_ops, token_ops, user_ops
+from app.crud.user_ops import USER_EXPANSIONS
+from app.generate_dataset import dataset_password
+from tests.utils.query_plans import (
+    DATASET,
+    PlanExpectation,
+    assert_plans,
+    big_table_indexes,
+    dataset_block,
+    explain_call,
+    load_scaled_dataset,
+)
+
+# inputs come from the first tenant and the first families outside tenants
+tenant_rows = dataset_block(0)
+family_rows = dataset_block(DATASET.tenants)
+emails = {row[0]: row[1] for row in tenant_rows["users"] + family_rows["users"]}
+
+tenant_id = tenant_rows["tenants"][0][0]
+student_id = next(row[1] for row in tenant_rows["user_roles"] if row[3] == "STUDENT")
+parent_id = tenant_rows["parent_student_relations"][0][1]
+tenant_user_ids = [row[0] for row in tenant_rows["users"]]
+class_code_id, class_code_digest = tenant_rows["class_codes"][0][:2]
+roster_student_id = next(
+    row[1] for row in tenant_rows["class_code_students"] if row[0] == class_code_id
+)
+paying_student_id = family_rows["user_subscription_plan"][0][1]
+high_school_program = next(
+    json.loads(row[6]) for row in tenant_rows["student_profiles"] if int(row[2]) >= 9
+)
+
+
+async def get_tenant_plan(session: AsyncSession) -> Any:
+    authorization_cache.invalidate_tenant(tenant_id)
+    return await user_auth.get_tenant_plan(session, tenant_id)
+
+
+async def get_user_sub_level(session: AsyncSession) -> Any:
+    authorization_cache.invalidate_user(paying_student_id)
+    return await user_auth.get_user_sub_level(session, paying_student_id)
+
+
+Case = tuple[Callable[[AsyncSession], Awaitable[Any]], PlanExpectation]
+
+CASES: dict[str, Case] = {
+    "read_user_email": (
+        lambda s: user_ops.read_user_email(s, emails[student_id].upper()),
+        PlanExpectation(indexes=("ix_users_email",)),
+    ),
+    "read_login_context": (
+        lambda s: user_ops.read_login_context(s, emails[student_id]),
+        PlanExpectation(indexes=("ix_users_email", "ix_user_roles_user_id_created_at")),
+    ),
+    "read_login_context_by_id": (
+        lambda s: user_ops.read_login_context_by_id(s, student_id),
+        PlanExpectation(indexes=("users_pkey", "ix_user_roles_user_id_created_at")),
+    ),
+    "read_user_role": (
+        lambda s: user_ops.read_user_role(s, student_id),
+        PlanExpectation(indexes=("ix_user_roles_user_id_created_at",)),
+    ),
+    "read_user_sub_plan_by_id": (
+        lambda s: user_ops.read_user_sub_plan_by_id(s, paying_student_id),
+        PlanExpectation(indexes=("ix_user_subscription_plan_user_id_is_active",)),
+    ),
+    "read_user_detail": (
+        lambda s: user_ops.read_user_detail(s, parent_id, USER_EXPANSIONS),
+        PlanExpectation(
+            indexes=(
+                "users_pkey",
+                "ix_user_roles_user_id_created_at",
+                "ix_student_profiles_user_id",
+                "ix_user_subscription_plan_user_id_is_active",
+                "ix_parent_student_relations_parent_id_student_id",
+            )
+        ),
+    ),
+    "read_users_detail": (
+        lambda s: user_ops.read_users_detail(s, USER_EXPANSIONS, tenant_id, limit=50),
+        PlanExpectation(indexes=("ix_users_tenant_id_created_at",)),
+    ),
+    "read_students_by_profile": (
+        # classmates: students with the same Monday lessons as a high schooler
+        lambda s: user_ops.read_students_by_profile(
+            s, school_lecture_program={"monday": high_school_program["monday"]}
+        ),
+        PlanExpectation(indexes=("ix_student_profiles_school_lecture_program",)),
+    ),
+    "read_existing_emails": (
+        lambda s: user_ops.read_existing_emails(s, list(emails.values())[:100]),
+        PlanExpectation(indexes=("ix_users_email",)),
+    ),
+    "read_tenant_parent_ids": (
+        lambda s: user_ops.read_tenant_parent_ids(
+            s, tenant_id, list(emails.values())[:100]
+        ),
+        PlanExpectation(indexes=("ix_user_roles_tenant_id_role_type",)),
+    ),
+    "deactivate_user": (
+        lambda s: user_ops.deactivate_user(s, student_id),
+        PlanExpectation(indexes=("users_pkey", "ix_refresh_tokens_user_id")),
+    ),
+    "deactivate_user_sub_plans": (
+        lambda s: user_ops.deactivate_user_sub_plans(s, paying_student_id),
+        PlanExpectation(indexes=("ix_user_subscription_plan_user_id_is_active",)),
+    ),
+    "read_tenant_by_id": (
+        lambda s: tenant_ops.read_tenant_by_id(s, tenant_id),
+        PlanExpectation(indexes=("tenants_pkey",)),
+    ),
+    "read_tenant_by_VKN": (
+        lambda s: tenant_ops.read_tenant_by_VKN(s, "0000000000"),
+        PlanExpectation(indexes=("tenants_VKN_code_key",)),
+    ),
+    "count_tenant_users": (
+        lambda s: tenant_ops.count_tenant_users(s, tenant_id),
+        PlanExpectation(indexes=("ix_users_tenant_id_created_at",)),
+    ),
+    "read_tenant_sub_plan_by_id": (
+        lambda s: tenant_ops.read_tenant_sub_plan_by_id(s, tenant_id),
+        PlanExpectation(indexes=("uq_tenant_subscription_plan_active_tenant_id",)),
+    ),
+    "deactivate_tenant": (
+        lambda s: tenant_ops.deactivate_tenant(s, tenant_id),
+        # the dataset's tokens have all expired: reading refresh_tokens whole
+        # and checking the few live ones' users beats probing
+        # ix_refresh_tokens_user_id once per tenant user at this size
+        PlanExpectation(indexes=("users_pkey",), seq_scans=("refresh_tokens",)),
+    ),
+    "read_refresh_token": (
+        lambda s: token_ops.read_refresh_token(s, secrets.token_urlsafe(32)),
+        PlanExpectation(indexes=("ix_refresh_tokens_token_hash",)),
+    ),
+    "count_tenant_students": (
+        lambda s: class_code_ops.count_tenant_students(
+            s, tenant_id, tenant_user_ids[:60]
+        ),
+        PlanExpectation(indexes=("ix_user_roles_user_id_created_at",)),
+    ),
+    "read_class_code_login": (
+        lambda s: class_code_ops.read_class_code_login(
+            s, class_code_digest, emails[roster_student_id]
+        ),
+        PlanExpectation(
+            indexes=("ix_users_email", "ix_class_code_students_student_id")
+        ),
+    ),
+    "read_class_code_roster": (
+        lambda s: class_code_ops.read_class_code_roster(s, class_code_id),
+        PlanExpectation(indexes=("class_code_students_pkey",)),
+    ),
+    "authenticate_login": (
+        lambda s: user_auth.authenticate_login(
+            s, emails[student_id], dataset_password(emails[student_id])
+        ),
+        PlanExpectation(indexes=("ix_users_email",)),
+    ),
+    "get_tenant_plan": (
+        get_tenant_plan,
+        PlanExpectation(indexes=("uq_tenant_subscription_plan_active_tenant_id",)),
+    ),
+    "get_user_sub_level": (
+        get_user_sub_level,
+        PlanExpectation(indexes=("ix_user_subscription_plan_user_id_is_active",)),
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def big_tables() -> set[str]:
+    with engine.connect() as connection:
+        return load_scaled_dataset(connection)
+
+
+@pytest.fixture(scope="module")
+def big_indexes(big_tables: set[str]) -> set[str]:
+    with engine.connect() as connection:
+        return big_table_indexes(connection, big_tables)
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_query_plan(name: str, big_tables: set[str], big_indexes: set[str]) -> None:
+    fn, expectation = CASES[name]
+    explained = explain_call(fn)
+    assert explained, f"{name} sent no statements"
+    assert_plans(name, explained, expectation, big_tables, big_indexes)
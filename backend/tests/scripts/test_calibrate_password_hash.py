@@ -0,0 +1,25 @@
+import sys
+
+import pytest
+from passlib.context import CryptContext
+
+from app import calibrate_password_hash
+from app.calibrate_password_hash import calibrate
+
+
+def test_calibrate_picks_highest_cost_within_budget() -> None:
+    assert calibrate("bcrypt", 60_000, 4, 5, samples=1) == 5
+    assert calibrate("bcrypt", 0, 4, 5, samples=1) == 4
+
+
+def test_calibrate_rejects_scheme_without_cost_setting(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        calibrate_password_hash,
+        "pwd_context",
+        CryptContext(schemes=["sha256_crypt", "bcrypt"]),
+    )
+    monkeypatch.setattr(sys, "argv", ["calibrate_password_hash"])
+    with pytest.raises(SystemExit):
+        calibrate_password_hash.main()
@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+from datetime import timezone
+
+from sqlmodel import Session, func, select
+
+from app.core.db import engine
+from app.generate_dataset import (
+    PASSWORD_HASHES,
+    BlockGenerator,
+    DatasetOptions,
+    batches,
+    dataset_password,
+    generate,
+)
+from app.models import User
+
+options = DatasetOptions(
+    seed=1, tenants=3, students_per_tenant=40, independent_families=150
+)
+hashes = [f"hash-{n}" for n in range(PASSWORD_HASHES)]
+
+
+def test_blocks_are_deterministic_per_seed() -> None:
+    first = BlockGenerator(options, 1, hashes).generate()
+    assert BlockGenerator(options, 1, hashes).generate() == first
+
+    other_seed = DatasetOptions(2, 3, 40, 150)
+    assert BlockGenerator(other_seed, 1, hashes).generate()["users"] != first["users"]
+
+
+def test_tenant_block_is_consistent() -> None:
+    rows = BlockGenerator(options, 0, hashes).generate()
+    ((tenant_id, *_),) = rows["tenants"]
+    roles = Counter(row[3] for row in rows["user_roles"])
+    assert roles["TENANT_ADMIN"] == 1
+    assert roles["TEACHER"] >= 1
+    assert roles["STUDENT"] >= 5
+    assert {row[8] for row in rows["users"]} == {tenant_id}
+    assert [row[6] for row in rows["tenant_subscription_plan"]].count(True) == 1
+
+    students = {row[1] for row in rows["user_roles"] if row[3] == "STUDENT"}
+    parents = {row[1] for row in rows["user_roles"] if row[3] == "PARENT"}
+    assert {row[1] for row in rows["student_profiles"]} == students
+    assert {row[1] for row in rows["parent_student_relations"]} == parents
+    assert {row[2] for row in rows["parent_student_relations"]} <= students
+    assert {row[1] for row in rows["class_code_students"]} <= students
+
+
+def test_families_outside_tenants_pay_for_themselves() -> None:
+    blocks = [BlockGenerator(options, b, hashes).generate() for b in (3, 4)]
+    users = [row for rows in blocks for row in rows["users"]]
+    assert all(row[8] is None for row in users)
+    assert sum(
+        1 for rows in blocks for role in rows["user_roles"] if role[3] == "STUDENT"
+    ) == sum(len(rows["user_subscription_plan"]) for rows in blocks)
+    # 150 families: a full block of 100 and a partial one of 50
+    assert [len(list(batch)) for batch in batches(options, 10**9)] == [5]
+
+
+def test_passwords_match_the_hash_each_user_gets() -> None:
+    rows = BlockGenerator(options, 0, hashes).generate()
+    for user in rows["users"][:10]:
+        number = int(dataset_password(user[1]).rsplit("-", 1)[1])
+        assert user[9] == hashes[number]
+
+
+def test_generate_loads_each_block_once() -> None:
+    # a fresh seed, so rows left by earlier runs do not count
+    tiny = DatasetOptions(random.randrange(10**9), 2, 10, 20)
+    expected = sum(
+        len(BlockGenerator(tiny, block, hashes).generate()["users"])
+        for block in range(tiny.blocks)
+    )
+
+    assert generate(tiny, workers=1, batch_users=10) == expected
+    assert generate(tiny, workers=1, batch_users=10) == 0
+
+    with Session(engine) as session:
+        loaded = session.exec(
+            select(func.count())
+            .select_from(User)
+            .where(User.email.like(f"%.{tiny.seed}.%@load.example"))
+        ).one()
+    assert loaded == expected
+
+
+def test_keys_are_stamped_with_creation_time() -> None:
+    rows = BlockGenerator(options, 0, hashes).generate()
+    for user in rows["users"]:
+        assert user[0].version == 7
+        unix_ms = user[0].int >> 80
+        assert unix_ms == int(user[11].replace(tzinfo=timezone.utc).timestamp() * 1000)
@@ -0,0 +1,296 @@
+"""Run CRUD code under ``EXPLAIN ANALYZE`` and check the plans it gets.
+
+Every statement a call sends is captured, explained in the same
+transaction and rolled back with it, so write paths can be checked too.
+Plans are reduced to a "shape" (node types, relations and indexes) that is
+stored under ``tests/crud/query_plans/`` and diffed on failure; refresh
+the stored shapes with ``UPDATE_QUERY_PLANS=1``.
+"""
+
+import asyncio
+import difflib
+import os
+import re
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, NullPool, event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.generate_dataset import (
+    PASSWORD_HASHES,
+    BlockGenerator,
+    DatasetOptions,
+    Rows,
+    generate,
+)
+
+PLANS_DIR = Path(__file__).parent.parent / "crud" / "query_plans"
+UPDATE_PLANS = os.getenv("UPDATE_QUERY_PLANS") == "1"
+
+# tables at least this large must never be read with a sequential scan
+BIG_TABLE_ROWS = 10_000
+# row estimates are compared from this many rows up; below it they are noise
+MIN_ESTIMATE_ROWS = 10
+
+# about 45k users: tenants of a few hundred students with their parents
+# and staff, plus families outside any tenant
+DATASET_TENANTS = int(os.getenv("QUERY_PLAN_TENANTS", "100"))
+DATASET = DatasetOptions(
+    seed=25,
+    tenants=DATASET_TENANTS,
+    students_per_tenant=200,
+    independent_families=DATASET_TENANTS * 20,
+)
+
+
+def dataset_block(block: int) -> Rows:
+    """The rows ``generate_dataset`` loads for ``block``, to pick test inputs from."""
+    # ids and emails do not depend on the password hashes
+    return BlockGenerator(DATASET, block, [""] * PASSWORD_HASHES).generate()
+
+
+def load_scaled_dataset(connection: Connection) -> set[str]:
+    """Load the dataset unless it is there and return the big table names.
+
+    Statistics are refreshed every time so the planner sees the real sizes,
+    and the tables are vacuumed so fresh GIN entries are moved out of the
+    indexes' pending lists, which the planner would otherwise cost as a scan.
+    """
+    last_user = dataset_block(DATASET.blocks - 1)["users"][0][0]
+    loaded = connection.execute(
+        text("SELECT 1 FROM users WHERE id = :id"), {"id": last_user}
+    ).first()
+    connection.commit()
+    if not loaded:
+        generate(DATASET, workers=os.cpu_count() or 1, batch_users=20_000)
+
+    connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+        text("VACUUM ANALYZE")
+    )
+    rows = connection.execute(
+        text(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' "
+            "AND relnamespace = 'public'::regnamespace AND reltuples >= :rows"
+        ),
+        {"rows": BIG_TABLE_ROWS},
+    )
+    return set(rows.scalars())
+
+
+def big_table_indexes(connection: Connection, big_tables: set[str]) -> set[str]:
+    rows = connection.execute(
+        text(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE schemaname = 'public' AND tablename = ANY(:tables)"
+        ),
+        {"tables": list(big_tables)},
+    )
+    return set(rows.scalars())
+
+
+@dataclass
+class PlanExpectation:
+    """What every plan a CRUD call produces has to satisfy.
+
+    ``indexes`` must each be used by at least one of the call's statements
+    once their table is big; the planner rightly reads small tables whole,
+    whatever indexes they have. Sequential scans on big tables fail unless the table is listed in
+    ``seq_scans``. Row estimates may be off by ``max_misestimate`` times,
+    and each statement must execute within ``max_ms``.
+    """
+
+    indexes: tuple[str, ...] = ()
+    seq_scans: tuple[str, ...] = ()
+    max_misestimate: float = 100.0
+    max_ms: float = 50.0
+
+
+@dataclass
+class ExplainedStatement:
+    statement: str
+    plan: dict[str, Any]
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def execution_ms(self) -> float:
+        return float(self.plan["Execution Time"])
+
+
+def explain_call(
+    fn: Callable[[AsyncSession], Awaitable[Any]],
+) -> list[ExplainedStatement]:
+    """Run ``fn`` and ``EXPLAIN ANALYZE`` each statement it sent, then roll back.
+
+    INSERTs are not explained; running them twice would only conflict.
+    """
+    from app.core.db import async_engine
+
+    async def run() -> list[ExplainedStatement]:
+        engine = create_async_engine(async_engine.url, poolclass=NullPool)
+        sent: list[tuple[str, Any]] = []
+
+        def before_cursor_execute(
+            _conn: Any, _cursor: Any, statement: str, parameters: Any, *_: Any
+        ) -> None:
+            sent.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await fn(session)
+                event.remove(
+                    engine.sync_engine, "before_cursor_execute", before_cursor_execute
+                )
+                connection = await session.connection()
+                explained = []
+                for statement, parameters in sent:
+                    if statement.lstrip().upper().startswith("INSERT"):
+                        continue
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+                    )
+                    explained.append(ExplainedStatement(statement, result.scalar()[0]))
+                await session.rollback()
+                return explained
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def walk(node: dict[str, Any], depth: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from walk(child, depth + 1)
+
+
+def describe(node: dict[str, Any]) -> str:
+    words = [node["Node Type"]]
+    if "Join Type" in node and node["Join Type"] != "Inner":
+        words.append(f"({node['Join Type']})")
+    if "Index Name" in node:
+        words.append(f"using {node['Index Name']}")
+    if "Relation Name" in node:
+        words.append(f"on {node['Relation Name']}")
+    return " ".join(words)
+
+
+def plan_shape(explained: list[ExplainedStatement]) -> list[str]:
+    """The plans without costs, timings or literal values, one node per line.
+
+    Plans are sorted, since selectin loads run in no fixed order.
+    """
+    blocks = []
+    for statement in explained:
+        verb = statement.statement.split(maxsplit=1)[0].upper()
+        table = re.search(r"\b(?:FROM|UPDATE|DELETE FROM)\s+(\w+)", statement.statement)
+        blocks.append(
+            [
+                f"-- {verb} {table.group(1) if table else ''}".rstrip(),
+                *(
+                    "  " * depth + describe(node)
+                    for depth, node in walk(statement.plan["Plan"])
+                ),
+            ]
+        )
+    return [line for block in sorted(blocks) for line in block]
+
+
+def misestimated_nodes(
+    plan: dict[str, Any], max_misestimate: float
+) -> Iterator[dict[str, Any]]:
+    # below a Limit the planner estimates the full scan, not what was read
+    def visit(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        if node["Node Type"] == "Limit":
+            return
+        if node.get("Actual Loops"):
+            estimated, actual = node["Plan Rows"], node["Actual Rows"]
+            smaller = max(min(estimated, actual), MIN_ESTIMATE_ROWS)
+            if max(estimated, actual) / smaller > max_misestimate:
+                yield node
+        for child in node.get("Plans", []):
+            yield from visit(child)
+
+    return visit(plan)
+
+
+def check_plans(
+    explained: list[ExplainedStatement],
+    expectation: PlanExpectation,
+    big_tables: set[str],
+    big_indexes: set[str],
+) -> list[str]:
+    """Annotate each statement with its problems and return the call's own."""
+    used_indexes = set()
+    for statement in explained:
+        plan = statement.plan["Plan"]
+        for _, node in walk(plan):
+            if "Index Name" in node:
+                used_indexes.add(node["Index Name"])
+            table = node.get("Relation Name")
+            if (
+                node["Node Type"] == "Seq Scan"
+                and table in big_tables
+                and table not in expectation.seq_scans
+            ):
+                statement.problems.append(f"sequential scan on {table}")
+        for node in misestimated_nodes(plan, expectation.max_misestimate):
+            statement.problems.append(
+                f"{describe(node)}: estimated {node['Plan Rows']} rows, "
+                f"got {node['Actual Rows']}"
+            )
+        if statement.execution_ms > expectation.max_ms:
+            statement.problems.append(
+                f"took {statement.execution_ms:.1f} ms, budget {expectation.max_ms} ms"
+            )
+    return [
+        f"index {index} is not used"
+        for index in expectation.indexes
+        if index in big_indexes and index not in used_indexes
+    ]
+
+
+def plan_report(
+    name: str, explained: list[ExplainedStatement], problems: list[str]
+) -> str:
+    """Problems, offending statements and the plan shape diffed against the baseline."""
+    lines = [f"{name}: query plan regression", *(f"  {p}" for p in problems)]
+    for number, statement in enumerate(explained, start=1):
+        if statement.problems:
+            sql = " ".join(statement.statement.split())
+            lines.append(f"statement {number}: {sql[:200]}")
+            lines.extend(f"  {p}" for p in statement.problems)
+
+    baseline_path = PLANS_DIR / f"{name}.txt"
+    shape = plan_shape(explained)
+    if baseline_path.exists():
+        baseline = baseline_path.read_text().splitlines()
+        lines.extend(
+            difflib.unified_diff(
+                baseline, shape, "baseline", "current", lineterm="", n=20
+            )
+        )
+        if shape == baseline:
+            lines.append("plan shape unchanged from the baseline")
+    else:
+        lines.extend(["current plan:", *shape])
+    return "\n".join(lines)
+
+
+def assert_plans(
+    name: str,
+    explained: list[ExplainedStatement],
+    expectation: PlanExpectation,
+    big_tables: set[str],
+    big_indexes: set[str],
+) -> None:
+    problems = check_plans(explained, expectation, big_tables, big_indexes)
+    if UPDATE_PLANS:
+        PLANS_DIR.mkdir(exist_ok=True)
+        (PLANS_DIR / f"{name}.txt").write_text("\n".join(plan_shape(explained)) + "\n")
+    failed = problems or any(statement.problems for statement in explained)
+    assert not failed, plan_report(name, explained, problems)
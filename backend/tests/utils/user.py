@@ -1,10 +1,14 @@
+import uuid
+from typing import Any
+
 from fastapi.testclient import TestClient
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from _app import crud
-from _app.core.config import settings
-from _app.models import User, UserCreate, UserUpdate
-from tests.utils.utils import random_email, random_lower_string
+from app.core.config import settings
+from app.crud import tenant_ops, user_ops
+from app.models import RoleType, Tenant, TenantCreate, User, UserCreate, UserRoleCreate
+from tests.utils.utils import random_email, random_lower_string, run_in_session
 
 
 def user_authentication_headers(
@@ -19,7 +23,70 @@ def user_authentication_headers(
     return headers
 
 
-def create_random_user(db: Session) -> User:
+async def add_tenant(session: AsyncSession, **fields: Any) -> Tenant:
+    tenant = await tenant_ops.tenant_create(
+        session, TenantCreate(name=random_lower_string(), **fields)
+    )
+    assert tenant is not None
+    return tenant
+
+
+def create_tenant(**fields: Any) -> uuid.UUID:
+    """Commit a tenant with a random name and return its id."""
+
+    async def create(session: AsyncSession) -> uuid.UUID:
+        return (await add_tenant(session, **fields)).id
+
+    return run_in_session(create)
+
+
+async def add_user(
+    session: AsyncSession,
+    role_type: RoleType,
+    tenant_id: uuid.UUID | None = None,
+    *,
+    password: str | None = None,
+    password_hash: str | None = None,
+) -> User:
+    """Insert a user with a random email and the given role."""
+    user = await user_ops.create_user_with_role(
+        session,
+        UserCreate(
+            email=random_email(),
+            password=password or random_lower_string(),
+            tenant_id=tenant_id,
+        ),
+        UserRoleCreate(role_type=role_type, user_id=None, tenant_id=None),
+        password_hash=password_hash,
+    )
+    assert user is not None
+    return user
+
+
+def create_user(
+    role_type: RoleType, tenant_id: uuid.UUID | None = None
+) -> tuple[User, str]:
+    """Commit a user with the given role; returns it with its password."""
+    password = random_lower_string()
+    user = run_in_session(
+        lambda session: add_user(session, role_type, tenant_id, password=password)
+    )
+    return user, password
+
+
+def login_headers(client: TestClient, user: User, password: str) -> dict[str, str]:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": user.email, "password": password},
+    )
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def create_random_user(db: Session) -> Any:
+    from _app import crud
+    from _app.models import UserCreate
+
     email = random_email()
     password = random_lower_string()
     user_in = UserCreate(email=email, password=password)
@@ -35,6 +102,9 @@ def authentication_token_from_email(
 
     If the user doesn't exist it is created first.
     """
+    from _app import crud
+    from _app.models import UserCreate, UserUpdate
+
     password = random_lower_string()
     user = crud.get_user_by_email(session=db, email=email)
     if not user:
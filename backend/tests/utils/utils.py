@@ -1,10 +1,19 @@
+import asyncio
 import random
 import string
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
 
 from fastapi.testclient import TestClient
+from sqlalchemy import Engine, NullPool, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from _app.core.config import settings
 
+T = TypeVar("T")
+
 
 def random_lower_string() -> str:
     return "".join(random.choices(string.ascii_lowercase, k=32))
@@ -24,3 +33,64 @@ def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[list[str]]:
+    """Collect every SQL statement sent to the database inside the block."""
+    statements: list[str] = []
+
+    def before_cursor_execute(
+        _conn: Any, _cursor: Any, statement: str, *_: Any
+    ) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _over_budget_counts() -> dict[str, int]:
+    from app.core.metrics import metrics
+
+    return {
+        name: value
+        for name, value in metrics.snapshot().items()
+        if name.endswith("_over_query_budget_total")
+    }
+
+
+@contextmanager
+def assert_within_query_budgets() -> Iterator[None]:
+    """Fail if a route called inside the block ran over its query_budget."""
+    before = _over_budget_counts()
+    yield
+    over = [
+        name.removeprefix("db_route_").removesuffix("_over_query_budget_total")
+        for name, value in _over_budget_counts().items()
+        if value > before.get(name, 0)
+    ]
+    assert not over, f"routes over their query budget: {', '.join(over)}"
+
+
+def run_in_session(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Run async CRUD code against a fresh session and commit it.
+
+    Uses its own unpooled engine, so no connection outlives the event loop
+    that ``asyncio.run`` creates for the call.
+    """
+    from app.core.db import async_engine
+
+    async def run() -> T:
+        engine = create_async_engine(async_engine.url, poolclass=NullPool)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                result = await fn(session)
+                await session.commit()
+                return result
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())